@@ -36,8 +36,7 @@ async function handleEtlIngest(req: Request, env: Env): Promise<Response> {
   }
 
   try {
-    const body = await req.json() as any;
-    const events = body.events;
+    const events = await readEtlEvents(req);
 
     if (!events || !Array.isArray(events) || events.length === 0) {
         return new Response(JSON.stringify({ stored: 0, message: "No events received" }), { status: 200, headers: {'Content-Type': 'application/json'} });
@@ -56,7 +55,8 @@ async function handleEtlIngest(req: Request, env: Env): Promise<Response> {
 
     // 3. Batch Insert (Pakai OR IGNORE biar kalau ada retry dari Gateway gak error)
     const stmt = env.DB_ETL.prepare("INSERT OR IGNORE INTO etl_events (id, topic, payload, ts) VALUES (?, ?, ?, ?)");
-    const batch = events.map((e: any) => stmt.bind(e.id, e.topic, e.payload, Date.now()));
+    const now = Date.now();
+    const batch = events.map((e: any) => stmt.bind(e.id, e.topic, typeof e.payload === "string" ? e.payload : JSON.stringify(e.payload), now));
     await env.DB_ETL.batch(batch);
 
     return new Response(JSON.stringify({ ok: true, stored: events.length }), { status: 200, headers: {'Content-Type': 'application/json'} });
@@ -65,6 +65,22 @@ async function handleEtlIngest(req: Request, env: Env): Promise<Response> {
   }
 }
 
+// Gateway exporter mengirim NDJSON (satu event per baris), biasanya di-gzip.
+// Format lama {"events": [...]} tetap diterima untuk ETL_FORMAT=json.
+async function readEtlEvents(req: Request): Promise<any[]> {
+  let stream = req.body;
+  if (!stream) return [];
+  if ((req.headers.get("Content-Encoding") || "").toLowerCase() === "gzip") {
+    stream = stream.pipeThrough(new DecompressionStream("gzip"));
+  }
+  const text = await new Response(stream).text();
+  if ((req.headers.get("Content-Type") || "").includes("ndjson")) {
+    return text.split("\n").filter((line) => line.trim()).map((line) => JSON.parse(line));
+  }
+  const body = JSON.parse(text || "{}") as any;
+  return body.events;
+}
+
 // === LOGIC 2: Global Idempotency Handler (Atomic) ===
 async function handleIdemClaim(req: Request, env: Env): Promise<Response> {
   // 1. Cek Auth
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\agent_executor_service\agent_executor_service.py total lines 709 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\agent_executor_service\agent_executor_service.py total lines 718 
 ########################################################################
 
 import threading
@@ -18,6 +18,7 @@ from flowork_kernel.swarm import LocalSwarmRegistry, SwarmCoordinator
 from flowork_kernel.context import boot_agent, AgentContext
 from flowork_kernel.fac_enforcer import FacRuntime
 from flowork_kernel.exceptions import PermissionDeniedError
+from .prompt_context import PromptTemplate, AgentContextWindow
 
 
 class AgentExecutorService(BaseService):
@@ -46,11 +47,15 @@ class AgentExecutorService(BaseService):
         from flowork_kernel.services.gateway_connector_service.gateway_connector_service import GatewayConnectorService
         self.gateway_connector: GatewayConnectorService = self.kernel.get_service("gateway_connector_service")
         if self.gateway_connector and hasattr(self.gateway_connector, 'send_gateway_swarm_task'):
+            # Socket Gateway hidup di main loop, yang belum berjalan saat service dibuat (main() masih sync);
+            # loop-nya dicari saat fan_out dipanggil, lalu coroutine dijadwalkan ke sana dari thread agent.
             self.gateway_swarm_coordinator = SwarmCoordinator(
                 send_task_fn=self.gateway_connector.send_gateway_swarm_task,
                 default_timeout_s=120.0,
                 retries=1,
-                backoff_base_s=1.0
+                backoff_base_s=1.0,
+                loop=self._gateway_loop,
+                require_loop=True
             )
             self.logger.info("(R6) Multi-Node Gateway Swarm Coordinator has been initialized.")
         else:
@@ -59,6 +64,20 @@ class AgentExecutorService(BaseService):
 
         self.logger.debug("Service 'AgentExecutor' initialized.")
 
+    def _gateway_loop(self):
+        loop = getattr(self.gateway_connector, "loop", None)
+        if loop is None and self.event_bus is not None:
+            loop = getattr(self.event_bus, "_main_loop", None)
+        return loop
+
+    @staticmethod
+    def _swarm_hedge(tool_data: dict) -> Optional[int]:
+        # Nilai dari LLM bisa berupa string ("2") atau sampah; yang tidak valid berarti tanpa hedge.
+        try:
+            return int(tool_data.get("hedge"))
+        except (TypeError, ValueError):
+            return None
+
     async def start_task(self, instruction: str, tools: List[str], user_id: str) -> str:
         """
         Memulai task agent secara asynchronous (Fire-and-forget).
@@ -210,7 +229,8 @@ class AgentExecutorService(BaseService):
         current_payload = initial_payload.copy()
         if 'data' not in current_payload or not isinstance(current_payload['data'], dict):
             current_payload['data'] = {}
-        conversation_history = []
+        context_window = AgentContextWindow()
+        conversation_history = context_window.messages
         last_observation = "No actions taken yet."
         max_steps = 10
 
@@ -233,22 +253,19 @@ class AgentExecutorService(BaseService):
 
 
         objective = current_payload.get('data', {}).get('prompt', 'No objective provided in payload.')
+        prompt_template = PromptTemplate(full_prompt_template)
+        static_fields = {"objective": objective, "tools_string": tools_prompt_string}
 
         try:
             for i in range(max_steps):
                 status_updater(f"Cycle {i+1}/{max_steps}: Thinking...", "INFO")
                 if self.event_bus: self.event_bus.publish("AGENT_HOST_DISPLAY_UPDATE", {"node_id": host_node_id, "text": f"🤔 Thinking...\n(Cycle {i+1}/{max_steps})"})
-                prompt_to_brain = full_prompt_template
-                prompt_to_brain = prompt_to_brain.replace('{objective}', objective)
-                prompt_to_brain = prompt_to_brain.replace('{tools_string}', tools_prompt_string)
-                prompt_to_brain = prompt_to_brain.replace('{history}', json.dumps(conversation_history, indent=2))
-                prompt_to_brain = prompt_to_brain.replace('{last_observation}', last_observation)
-                self.logger.debug(f"Sending prompt to brain: {ai_brain_endpoint}")
+                prompt_to_brain = prompt_template.render(static_fields, history=context_window.render(), last_observation=last_observation)
+                self.logger.debug(f"Sending prompt to brain: {ai_brain_endpoint} ({context_window.stats()})")
                 ai_response = self.ai_manager.query_ai_by_task('text', prompt_to_brain, endpoint_id=ai_brain_endpoint)
                 if "error" in ai_response:
-                    last_observation = f"AI Brain Error: {ai_response['error']}"
+                    last_observation = context_window.add_observation(f"AI Brain Error: {ai_response['error']}")
                     self.logger.error(f"Error during agent cycle: {last_observation}")
-                    conversation_history.append({"role": "user", "content": f"Observation: {last_observation}"})
                     if self.event_bus: self.event_bus.publish("AGENT_HOST_DISPLAY_UPDATE", {"node_id": host_node_id, "text": f"❌ Brain Error:\n{ai_response['error']}"})
                     continue
                 action_json_str = ai_response.get('data', '{}')
@@ -263,7 +280,7 @@ class AgentExecutorService(BaseService):
                     action = action_data.get("action", {})
                     tool_to_use = action.get("tool_id")
                     tool_data = action.get("data", {})
-                    conversation_history.append({"role": "assistant", "content": action_json_str})
+                    context_window.add("assistant", action_json_str)
                     status_updater(f"Thought: {thought}", "INFO")
                     if self.event_bus: self.event_bus.publish("AGENT_HOST_DISPLAY_UPDATE", {"node_id": host_node_id, "text": f"💡 Thought:\n{thought}"})
                     if tool_to_use == "finish":
@@ -289,11 +306,11 @@ class AgentExecutorService(BaseService):
                         swarm_result = self.local_swarm_coordinator.fan_out(
                             engine_ids=swarm_engine_ids,
                             task=swarm_task,
-                            quorum=swarm_quorum
+                            quorum=swarm_quorum,
+                            hedge=self._swarm_hedge(tool_data)
                         )
 
-                        last_observation = json.dumps(swarm_result, default=str)
-                        conversation_history.append({"role": "user", "content": f"Observation: {last_observation}"})
+                        last_observation = context_window.add_observation(swarm_result)
                         if self.event_bus: self.event_bus.publish("AGENT_HOST_DISPLAY_UPDATE", {"node_id": host_node_id, "text": f"🏁 SWARM (Local) Complete:\n{swarm_result.get('summary')}"})
                         continue
 
@@ -309,24 +326,19 @@ class AgentExecutorService(BaseService):
                         swarm_quorum = tool_data.get("quorum", "all")
 
 
-                        async def _run_gateway_swarm():
+                        try:
                             swarm_task["swarm_timeout_s"] = self.gateway_swarm_coordinator.default_timeout_s
-                            return await self.gateway_swarm_coordinator.fan_out(
+                            swarm_result = self.gateway_swarm_coordinator.fan_out(
                                 engine_ids=swarm_engine_ids,
                                 task=swarm_task,
-                                quorum=swarm_quorum
+                                quorum=swarm_quorum,
+                                hedge=self._swarm_hedge(tool_data)
                             )
-
-                        try:
-                            main_loop = asyncio.get_running_loop()
-                            future = asyncio.run_coroutine_threadsafe(_run_gateway_swarm(), main_loop)
-                            swarm_result = future.result(timeout=130)
                         except Exception as e:
                             self.logger.error(f"[Gateway R6] Failed to run run_coroutine_threadsafe: {e}", exc_info=True)
                             raise Exception(f"Failed to execute Gateway Swarm: {e}")
 
-                        last_observation = json.dumps(swarm_result, default=str)
-                        conversation_history.append({"role": "user", "content": f"Observation: {last_observation}"})
+                        last_observation = context_window.add_observation(swarm_result)
                         if self.event_bus: self.event_bus.publish("AGENT_HOST_DISPLAY_UPDATE", {"node_id": host_node_id, "text": f"🏁 SWARM (Gateway) Complete:\n{swarm_result.get('summary')}"})
                         continue
 
@@ -338,7 +350,6 @@ class AgentExecutorService(BaseService):
                         raise ValueError(f"Tool '{tool_to_use}' was chosen by the AI, but it is not connected to the Agent Host.")
 
                     if self.event_bus: self.event_bus.publish("AGENT_HOST_TOOL_HIGHLIGHT", {"tool_node_id": node_to_run['id'], "host_node_id": host_node_id})
-                    time.sleep(0.5)
                     payload_for_tool = current_payload.copy()
                     if 'data' not in payload_for_tool or not isinstance(payload_for_tool.get('data'), dict):
                         payload_for_tool['data'] = {}
@@ -358,12 +369,10 @@ class AgentExecutorService(BaseService):
                         raise result_from_tool
                     if isinstance(result_from_tool, dict) and "payload" in result_from_tool:
                         current_payload = result_from_tool["payload"]
-                    last_observation = json.dumps(current_payload, default=str)
-                    conversation_history.append({"role": "user", "content": f"Observation: {last_observation}"})
+                    last_observation = context_window.add_observation(current_payload)
                 except Exception as e:
-                    last_observation = f"An error occurred: {e}"
+                    last_observation = context_window.add_observation(f"An error occurred: {e}")
                     self.logger.error(f"Error during agent cycle: {e}")
-                    conversation_history.append({"role": "user", "content": f"Observation: {last_observation}"})
                     if self.event_bus: self.event_bus.publish("AGENT_HOST_DISPLAY_UPDATE", {"node_id": host_node_id, "text": f"❌ Error:\n{e}"})
 
             if agent_context:
@@ -411,7 +420,7 @@ class AgentExecutorService(BaseService):
             tools_for_agent.append({
                 "id": "swarm_fan_out_gateway",
                 "name": "Swarm Fan-Out (Gateway / Multi-Node)",
-                "description": "Executes a task in parallel on *other* engines via the Gateway. 'engine_ids' is a list of *real Engine IDs* (e.g., ['engine-id-A', 'engine-id-B']). 'task' is the payload, which *must* include the 'tool_id' you want those engines to run.",
+                "description": "Executes a task in parallel on *other* engines via the Gateway. 'engine_ids' is a list of *real Engine IDs* (e.g., ['engine-id-A', 'engine-id-B']). 'task' is the payload, which *must* include the 'tool_id' you want those engines to run. Optional 'quorum' ('all', 'majority' or 'any'; 'any' returns with the first success) and 'hedge' (N: start only the N fastest engines and add more if they are slow or fail).",
                 "is_swarm_tool": True
             })
 
@@ -0,0 +1,147 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\agent_executor_service\prompt_context.py total lines 148 
+########################################################################
+
+import os
+import re
+import json
+
+AGENT_CONTEXT_TOKENS = int(os.getenv("AGENT_CONTEXT_TOKENS", "6000"))
+AGENT_OBSERVATION_MAX_CHARS = int(os.getenv("AGENT_OBSERVATION_MAX_CHARS", "4000"))
+CHARS_PER_TOKEN = 4
+MAX_STRING_CHARS = 600
+MAX_LIST_ITEMS = 20
+MAX_DEPTH = 6
+DYNAMIC_FIELDS = ("history", "last_observation")
+
+def estimate_tokens(text: str) -> int:
+    # Perkiraan kasar (~4 karakter per token) sudah cukup untuk budget; tidak butuh tokenizer model.
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def clip_text(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}...[truncated {len(text) - max_chars} chars]"
+
+def _shrink(value, depth=0):
+    if depth >= MAX_DEPTH:
+        return "..."
+    if isinstance(value, dict):
+        return {str(k): _shrink(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_shrink(v, depth + 1) for v in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"... {len(value) - MAX_LIST_ITEMS} more items")
+        return items
+    if isinstance(value, str):
+        return clip_text(value, MAX_STRING_CHARS)
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return clip_text(str(value), MAX_STRING_CHARS)
+
+def compact_observation(value, max_chars: int = AGENT_OBSERVATION_MAX_CHARS) -> str:
+    """
+    Summarizes a tool result for the prompt: long strings and lists are cut per field first, so the
+    structure stays readable, then the whole JSON is clipped to max_chars.
+    """
+    if isinstance(value, str):
+        return clip_text(value, max_chars)
+    return clip_text(json.dumps(_shrink(value), default=str, ensure_ascii=False), max_chars)
+
+class PromptTemplate:
+    """
+    Parses the agent prompt template once into literal/placeholder segments; render() is a single join.
+    Everything before the first per-cycle field ({history} / {last_observation}) is the stable prefix,
+    identical every cycle so a resident llama.cpp worker can reuse its KV cache for it.
+    """
+    _FIELD = re.compile(r"\{(objective|tools_string|history|last_observation)\}")
+
+    def __init__(self, template: str):
+        self.template = template or ""
+        self.segments = []
+        pos = 0
+        for m in self._FIELD.finditer(self.template):
+            self.segments.append((False, self.template[pos:m.start()]))
+            self.segments.append((True, m.group(1)))
+            pos = m.end()
+        self.segments.append((False, self.template[pos:]))
+        self._prefix_cache = None
+
+    def stable_prefix(self, static_values: dict) -> str:
+        if self._prefix_cache is None:
+            parts = []
+            for is_field, text in self.segments:
+                if is_field and text in DYNAMIC_FIELDS:
+                    break
+                parts.append(str(static_values.get(text, "")) if is_field else text)
+            self._prefix_cache = "".join(parts)
+        return self._prefix_cache
+
+    def render(self, static_values: dict, **dynamic_values) -> str:
+        prefix = self.stable_prefix(static_values)
+        parts = [prefix]
+        started = False
+        for is_field, text in self.segments:
+            if not started:
+                if is_field and text in DYNAMIC_FIELDS:
+                    started = True
+                else:
+                    continue
+            if is_field:
+                parts.append(str(dynamic_values[text] if text in dynamic_values else static_values.get(text, "")))
+            else:
+                parts.append(text)
+        return "".join(parts)
+
+class AgentContextWindow:
+    """
+    Agent conversation history with a token budget. Each message is serialized once when added and
+    the rendered history is cached until it changes. When the budget is exceeded the oldest messages
+    are dropped down to half the budget in one go, so the rendered history stays a stable
+    (append-only) prefix for several cycles instead of shifting every turn.
+    """
+
+    def __init__(self, max_tokens: int = AGENT_CONTEXT_TOKENS, observation_chars: int = AGENT_OBSERVATION_MAX_CHARS):
+        self.max_tokens = max(256, max_tokens)
+        self.observation_chars = observation_chars
+        self.messages = []
+        self._lines = []
+        self._start = 0
+        self._window_tokens = 0
+        self._rendered = None
+
+    def add(self, role: str, content: str):
+        msg = {"role": role, "content": content}
+        line = json.dumps(msg, ensure_ascii=False)
+        self.messages.append(msg)
+        self._lines.append((line, estimate_tokens(line)))
+        self._window_tokens += self._lines[-1][1]
+        self._rendered = None
+        self._fit()
+        return msg
+
+    def add_observation(self, observation) -> str:
+        text = compact_observation(observation, self.observation_chars)
+        self.add("user", f"Observation: {text}")
+        return text
+
+    def _fit(self):
+        if self._window_tokens <= self.max_tokens:
+            return
+        target = self.max_tokens // 2
+        # Pesan terakhir selalu dipertahankan supaya model tetap melihat langkah terbarunya.
+        while self._window_tokens > target and self._start < len(self._lines) - 1:
+            self._window_tokens -= self._lines[self._start][1]
+            self._start += 1
+
+    def render(self) -> str:
+        if self._rendered is None:
+            lines = [line for line, _ in self._lines[self._start:]]
+            if self._start:
+                lines.insert(0, json.dumps({"role": "system", "content": f"{self._start} earlier messages omitted to fit the context budget."}))
+            self._rendered = "[\n  " + ",\n  ".join(lines) + "\n]" if lines else "[]"
+        return self._rendered
+
+    def stats(self) -> dict:
+        return {"messages": len(self.messages), "in_window": len(self._lines) - self._start, "window_tokens": self._window_tokens, "max_tokens": self.max_tokens}
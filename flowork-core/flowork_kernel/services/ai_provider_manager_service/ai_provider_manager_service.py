@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\ai_provider_manager_service.py total lines 741 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\ai_provider_manager_service.py total lines 782 
 ########################################################################
 
 import os
@@ -15,15 +15,18 @@ import shutil
 import traceback
 import time
 import hashlib
-import threading
-import select
 import asyncio
 import uuid
-import glob
 from datetime import datetime
 from aiohttp import web
 from ..base_service import BaseService
 from flowork_kernel.utils.file_helper import sanitize_filename
+from .gguf_pool import GGUFModelPool, GGUFWorkerError, GGUF_WORKERS_PER_MODEL
+from .neural_queue import NeuralQueue, parse_lane_limits
+from .token_stream import read_pipe_text, coalesce_tokens, STREAM_FLUSH_SECONDS
+from .response_cache import ResponseCache, parse_policy, make_key, is_cacheable
+from .model_residency import ModelResidencyManager, ModelLoadError, estimate_model_bytes
+from .session_store import SessionStore
 
 try:
     import torch
@@ -66,9 +69,12 @@ class AIProviderManagerService(BaseService):
 
         self.loaded_providers = {}
         self.local_models = {}
-        self.hf_pipelines = {}
 
-        self.model_load_lock = threading.Lock()
+        # Satu budget RAM untuk semua backend lokal (diffusers in-process, worker GGUF, subprocess TTS).
+        self.model_residency = ModelResidencyManager(logger=self.logger, on_event=self._record_model_event)
+        self.model_prefetch = os.getenv("AI_MODEL_PREFETCH", "1").lower() not in ("0", "false", "no")
+        self.gguf_resident = os.getenv("AI_GGUF_RESIDENT", "1").lower() not in ("0", "false", "no")
+        self.gguf_pool = GGUFModelPool(logger=self.logger, residency=self.model_residency)
         self.engine_id = os.getenv("FLOWORK_ENGINE_ID", "unknown_engine")
 
         self.image_output_dir = os.path.join(self.kernel.data_path, "generated_images_by_service")
@@ -79,10 +85,18 @@ class AIProviderManagerService(BaseService):
 
         self.sessions_dir = os.path.join(self.kernel.data_path, "ai_sessions")
         os.makedirs(self.sessions_dir, exist_ok=True)
+        self.session_store = SessionStore(self.sessions_dir, logger=self.logger)
 
-        self.job_queue = asyncio.Queue()
-        self.active_jobs = {} # {job_id: {status: 'QUEUED'|'PROCESSING'|'COMPLETED'|'FAILED', result: ...}}
-        self.is_worker_running = False
+        self.default_cache_policy = os.getenv("AI_RESPONSE_CACHE", "off")
+        self.response_cache = ResponseCache(
+            db_path=os.path.join(self.kernel.data_path, "ai_response_cache.db"),
+            on_lookup=self._record_cache_lookup
+        )
+
+        self.lane_limits = parse_lane_limits(os.getenv("AI_LANE_LIMITS", ""))
+        self.cloud_lane_concurrency = int(os.getenv("AI_LANE_CLOUD_CONCURRENCY", "8"))
+        self.neural_queue = NeuralQueue(self._execute_job_logic, self._lane_for_job, logger=self.logger, on_status=self._on_job_status)
+        self.active_jobs = self.neural_queue.jobs # {job_id: {status: 'QUEUED'|'PROCESSING'|'COMPLETED'|'FAILED'|'CANCELLED', result: ...}}
 
         self._startup_session_cleanup()
 
@@ -91,37 +105,26 @@ class AIProviderManagerService(BaseService):
 
     def _startup_session_cleanup(self):
         """
-        The Janitor: Scans all session files on startup.
-        If any session says 'PROCESSING' (which means it crashed/died), set to 'CANCELLED'.
+        The Janitor: one indexed query on startup instead of parsing every session file.
+        Any session still 'QUEUED'/'PROCESSING' belongs to a job that died with the engine -> 'CANCELLED'.
         """
         self.logger.info("🧹 [The Janitor] Cleaning up zombie sessions...")
         try:
-            session_files = glob.glob(os.path.join(self.sessions_dir, "*.json"))
-            count = 0
-            for s_file in session_files:
-                try:
-                    with open(s_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-
-                    if data.get('active_job_status') in ['QUEUED', 'PROCESSING']:
-                        data['active_job_status'] = 'CANCELLED'
-                        data['active_job_id'] = None
-
-                        data['messages'].append({
-                            "role": "assistant",
-                            "content": "⚠️ [System] Engine restarted. Previous task was cancelled.",
-                            "timestamp": int(time.time() * 1000),
-                            "error": True
-                        })
-
-                        with open(s_file, 'w', encoding='utf-8') as f:
-                            json.dump(data, f, indent=2)
-                        count += 1
-                except Exception as e:
-                    self.logger.error(f"Failed to clean session {s_file}: {e}")
-
-            if count > 0:
-                self.logger.warning(f"🧹 [The Janitor] Cleaned {count} zombie sessions.")
+            migrated = self.session_store.migrate_json_sessions()
+            if migrated:
+                self.logger.info(f"[Session Store] Migrated {migrated} legacy JSON sessions into the index.")
+
+            zombie_ids = self.session_store.cancel_active()
+            for session_id in zombie_ids:
+                self.session_store.append_message(session_id, {
+                    "role": "assistant",
+                    "content": "⚠️ [System] Engine restarted. Previous task was cancelled.",
+                    "timestamp": int(time.time() * 1000),
+                    "error": True
+                })
+
+            if zombie_ids:
+                self.logger.warning(f"🧹 [The Janitor] Cleaned {len(zombie_ids)} zombie sessions.")
         except Exception as e:
             self.logger.error(f"[The Janitor] Critical Error: {e}")
 
@@ -140,114 +143,101 @@ class AIProviderManagerService(BaseService):
         self.save_session(session_id, session_data)
         return session_data
 
-    def get_session(self, session_id):
-        path = os.path.join(self.sessions_dir, f"{session_id}.json")
-        if not os.path.exists(path):
-            return None
+    def get_session(self, session_id, with_messages=True):
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
+            return self.session_store.get(session_id, with_messages=with_messages)
+        except Exception as e:
+            self.logger.error(f"[Session Store] Failed to read session {session_id}: {e}")
             return None
 
     def save_session(self, session_id, data):
-        path = os.path.join(self.sessions_dir, f"{session_id}.json")
-        data['updated_at'] = int(time.time() * 1000)
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        self.session_store.save(session_id, data)
 
     def delete_session(self, session_id):
-        path = os.path.join(self.sessions_dir, f"{session_id}.json")
-        if os.path.exists(path):
-            os.remove(path)
-            return True
-        return False
-
-    def list_sessions(self):
-        sessions = []
-        files = glob.glob(os.path.join(self.sessions_dir, "*.json"))
-        files.sort(key=os.path.getmtime, reverse=True)
-
-        for f_path in files[:50]: # Limit to 50 recent
-            try:
-                with open(f_path, 'r', encoding='utf-8') as f:
-                    sessions.append(json.load(f))
-            except: pass
-        return sessions
+        return self.session_store.delete(session_id)
+
+    def list_sessions(self, user_id=None, limit=50):
+        """Metadata only (no message bodies), newest first; fetch a single session for its messages."""
+        return self.session_store.list(user_id=user_id, limit=limit)
 
     async def submit_job(self, task_type, payload):
         """
         Main Entrypoint for Phase 2 API.
-        Puts a job into the Async Queue.
+        Puts a job into its lane of the Neural Queue (payload 'priority': higher runs first, default 10).
         """
-        if not self.is_worker_running:
-            asyncio.create_task(self._queue_worker_loop())
-            self.is_worker_running = True
-
         job_id = f"job_{uuid.uuid4().hex[:8]}"
-        job_data = {
-            "id": job_id,
-            "type": task_type,
-            "payload": payload,
-            "status": "QUEUED",
-            "submitted_at": time.time(),
-            "position": self.job_queue.qsize() + 1
-        }
-
-        self.active_jobs[job_id] = job_data
-        await self.job_queue.put(job_id)
+        job_data = self.neural_queue.submit(task_type, payload, job_id)
 
-        self.logger.info(f"📥 [Neural Queue] Job {job_id} added. Position: {job_data['position']}")
+        self.logger.info(f"📥 [Neural Queue] Job {job_id} added to lane '{job_data['lane']}'. Position: {job_data['position']}")
+        if job_data['status'] == "QUEUED":
+            self._prefetch_for_job(job_data)
         return job_data
 
-    async def _queue_worker_loop(self):
+    def _prefetch_for_job(self, job):
+        """Starts loading a queued job's local model while it waits, so the load overlaps the jobs ahead of it."""
+        m = self.local_models.get(job['payload'].get('endpoint_id'))
+        if not m or not self.model_prefetch:
+            return
+        try:
+            if 'image' in m['type'] and DIFFUSERS_AVAILABLE:
+                self.model_residency.prefetch(
+                    ("diffusers", m['name']), lambda: self._load_diffuser(m),
+                    backend="diffusers", est_bytes=self._model_bytes(m)
+                )
+            elif m['type'] == 'gguf' and self.gguf_resident and LLAMA_CPP_AVAILABLE:
+                n_ctx = int(self.loc.get_setting("ai_gguf_n_ctx", 4096))
+                self.gguf_pool.prefetch(m['full_path'], n_ctx=n_ctx, gpu_layers=int(self.loc.get_setting("ai_gpu_layers", 40)))
+        except Exception as e:
+            self.logger.warning(f"[Model Residency] Prefetch skipped for {m['name']}: {e}")
+
+    def _model_bytes(self, model_data):
+        if 'est_bytes' not in model_data:
+            model_data['est_bytes'] = estimate_model_bytes(model_data.get('full_path'))
+        return model_data['est_bytes']
+
+    def _record_model_event(self, event, backend, info):
+        metrics = self.kernel.get_service("metrics_service")
+        if metrics is None or not hasattr(metrics, "AI_MODEL_EVENTS"):
+            return
+        if event != "state":
+            metrics.AI_MODEL_EVENTS.labels(backend, event).inc()
+        if info.get("seconds") is not None:
+            metrics.AI_MODEL_LOAD_SECONDS.labels(backend).observe(info["seconds"])
+        by_backend = self.model_residency.stats()["resident_bytes_by_backend"]
+        for name in ("diffusers", "gguf", "tts", "whisper", "subprocess", backend):
+            metrics.AI_MODEL_RESIDENT_BYTES.labels(name).set(by_backend.get(name, 0))
+
+    def get_job_position(self, job_id):
+        return self.neural_queue.position(job_id)
+
+    def cancel_job(self, job_id):
+        return self.neural_queue.cancel(job_id)
+
+    def _lane_for_job(self, task_type, payload):
         """
-        The FIFO Worker. Eats jobs one by one.
+        Cloud providers get a wide lane each, a CPU GGUF model gets one slot per resident worker,
+        and GPU-bound local models (GGUF with offload, diffusers, TTS) share a single 'gpu' lane.
         """
-        self.logger.info("🚀 [Neural Queue] Worker Loop Started.")
-        while True:
-            try:
-                job_id = await self.job_queue.get()
-
-                if job_id not in self.active_jobs:
-                    self.job_queue.task_done()
-                    continue
-
-                job = self.active_jobs[job_id]
-                job['status'] = "PROCESSING"
-                job['started_at'] = time.time()
-
-                session_id = job['payload'].get('session_id')
-                if session_id:
-                    session = self.get_session(session_id)
-                    if session:
-                        session['active_job_id'] = job_id
-                        session['active_job_status'] = "PROCESSING"
-                        self.save_session(session_id, session)
-
-                self.logger.info(f"⚙️ [Neural Queue] Processing {job_id} ({job['type']})...")
-
-                try:
-                    result = await self._execute_job_logic(job)
-                    job['status'] = "COMPLETED"
-                    job['result'] = result
-                except Exception as e:
-                    self.logger.error(f"❌ [Neural Queue] Job {job_id} Failed: {e}")
-                    job['status'] = "FAILED"
-                    job['error'] = str(e)
-                finally:
-                    job['completed_at'] = time.time()
-                    self.job_queue.task_done()
-
-                    if session_id:
-                        session = self.get_session(session_id)
-                        if session:
-                            session['active_job_status'] = job['status']
-                            self.save_session(session_id, session)
-
-            except Exception as e:
-                self.logger.error(f"🔥 [Neural Queue] Worker Loop Crash: {e}")
-                await asyncio.sleep(1) # Prevent tight loop crash
+        target = payload.get('endpoint_id')
+        if target in self.loaded_providers:
+            name, default = f"provider:{target}", self.cloud_lane_concurrency
+        elif target in self.local_models:
+            m = self.local_models[target]
+            if m['type'] == 'gguf' and int(self.loc.get_setting("ai_gpu_layers", 40) or 0) == 0:
+                name, default = f"local:{target}", GGUF_WORKERS_PER_MODEL
+            else:
+                name, default = "gpu", 1
+        else:
+            name, default = "default", 1
+        return name, self.lane_limits.get(name, default)
+
+    def _on_job_status(self, job):
+        session_id = job['payload'].get('session_id')
+        if not session_id:
+            return
+        # Hanya baris index yang diubah; log pesan tidak disentuh.
+        job_id = job['id'] if job['status'] == "PROCESSING" else None
+        self.session_store.update_status(session_id, job['status'], job_id=job_id)
 
     async def _execute_job_logic(self, job):
         """
@@ -510,12 +500,36 @@ class AIProviderManagerService(BaseService):
             })
         return sorted(info, key=lambda x: x['name'])
 
+    def _record_cache_lookup(self, hit):
+        metrics = self.kernel.get_service("metrics_service")
+        counter = getattr(metrics, "AI_CACHE_LOOKUPS", None) if metrics else None
+        if counter is not None:
+            counter.labels("hit" if hit else "miss").inc()
+
     def query_ai_by_task(self, task_type: str, prompt: str, endpoint_id: str = None, messages: list = None, stream: bool = False, **kwargs):
         """
         [Legacy/Direct Executor]
         This function is now wrapped by `_execute_job_logic` for queued jobs,
         but kept accessible for direct synchronous calls if needed.
+        Pass response_cache='exact'|'normalized'|{"mode", "ttl", "persist"} (from node config) to reuse
+        answers for repeated prompts; AI_RESPONSE_CACHE sets the default (off).
         """
+        policy = parse_policy(kwargs.pop('response_cache', None) or self.default_cache_policy)
+        if policy['mode'] == 'off' or stream or not endpoint_id:
+            return self._query_ai_uncached(task_type, prompt, endpoint_id, messages, stream, **kwargs)
+
+        cache_key = make_key(policy['mode'], endpoint_id, prompt, messages, kwargs)
+        cached = self.response_cache.get(cache_key, persist=policy['persist'])
+        if cached is not None:
+            self.logger.info(f"[AI Query] Cache hit ({policy['mode']}) for {endpoint_id}")
+            return cached
+
+        result = self._query_ai_uncached(task_type, prompt, endpoint_id, messages, stream, **kwargs)
+        if is_cacheable(result):
+            self.response_cache.put(cache_key, result, policy['ttl'], persist=policy['persist'])
+        return result
+
+    def _query_ai_uncached(self, task_type: str, prompt: str, endpoint_id: str = None, messages: list = None, stream: bool = False, **kwargs):
         target = endpoint_id
         if not target: return {"error": "No AI model selected."}
 
@@ -561,17 +575,50 @@ class AIProviderManagerService(BaseService):
         if messages:
             final_input = self._construct_contextual_prompt(messages, prompt)
 
+        if self.gguf_resident:
+            return self._run_gguf_resident(path, final_input, gpu, stream)
+
         cmd = [sys.executable, "-u", worker, path, str(gpu)]
 
         if stream:
             return self._stream_gguf_process(cmd, final_input)
 
         try:
-            res = subprocess.run(cmd, input=final_input, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=1800)
+            with self.model_residency.transient(("gguf", path), self._model_bytes(model_data), backend="gguf"):
+                res = subprocess.run(cmd, input=final_input, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=1800)
             if res.returncode == 0: return {"type": "text", "data": res.stdout}
             return {"type": "text", "data": f"Error: {res.stderr}"}
         except Exception as e: return {"error": str(e)}
 
+    def _run_gguf_resident(self, path, final_input, gpu, stream):
+        n_ctx = int(self.loc.get_setting("ai_gguf_n_ctx", 4096))
+        chat = [{"role": "user", "content": final_input}]
+        if stream:
+            return self._stream_gguf_resident(path, chat, n_ctx, gpu)
+        try:
+            # Satu request per worker dari pool: llama.cpp tidak punya batch chat multi-sequence, jadi
+            # permintaan bersamaan lebih cepat tersebar ke worker yang bebas daripada diantrekan dalam satu batch.
+            result = self.gguf_pool.generate(path, chat, n_ctx=n_ctx, gpu_layers=int(gpu))
+            return {"type": "text", "data": result.get("content", "")}
+        except GGUFWorkerError as e:
+            return {"type": "text", "data": f"Error: {e}"}
+        except Exception as e: return {"error": str(e)}
+
+    def _stream_gguf_resident(self, path, chat, n_ctx, gpu):
+        try:
+            frames = self.gguf_pool.stream(path, chat, n_ctx=n_ctx, gpu_layers=int(gpu), ping_interval=STREAM_FLUSH_SECONDS)
+            for frame in coalesce_tokens(frames):
+                if frame["type"] == "token":
+                    yield {"type": "token", "content": frame["content"]}
+                elif frame["type"] == "ping":
+                    yield {"type": "ping"}
+                elif frame["type"] == "error":
+                    self.logger.error(f"[AI Worker Error] {frame.get('content')}")
+                    yield {"type": "error", "content": f"\n[System Error: {frame.get('content')}]"}
+        except Exception as e:
+            self.logger.error(f"Streaming Exception: {e}")
+            yield {"type": "error", "content": f"[System Error: {str(e)}]"}
+
     def _run_audio_worker(self, model_data, prompt, **kwargs):
         path = model_data['full_path']
         worker = os.path.join(self.kernel.project_root_path, "flowork_kernel", "workers", "ai_worker.py")
@@ -579,7 +626,8 @@ class AIProviderManagerService(BaseService):
         cmd = [sys.executable, "-u", worker, path]
 
         try:
-            res = subprocess.run(cmd, input=prompt, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=300)
+            with self.model_residency.transient(("tts", path), self._model_bytes(model_data), backend="tts"):
+                res = subprocess.run(cmd, input=prompt, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=300)
 
             if res.returncode != 0:
                 self.logger.error(f"[Audio Worker Fail] {res.stderr}")
@@ -631,24 +679,9 @@ class AIProviderManagerService(BaseService):
 
             self.logger.warning("!!! [AI STREAM] Connected. Waiting for tokens... !!!")
 
-            while True:
-                reads = [process.stdout.fileno()]
-                try:
-                    ret = select.select(reads, [], [], 1.0)
-                except (ValueError, OSError):
-                    break
-
-                if reads[0] in ret[0]:
-                    char = process.stdout.read(1)
-                    if not char:
-                        if process.poll() is not None: break
-                        continue
-                    try:
-                        yield {"type": "token", "content": char.decode('utf-8', errors='replace')}
-                    except Exception: pass
-                else:
-                    yield {"type": "ping"}
+            yield from coalesce_tokens(read_pipe_text(process.stdout))
 
+            process.wait()
             if process.returncode != 0 and process.returncode is not None:
                 err = f"Worker exited with code {process.returncode}."
                 self.logger.error(f"[AI Worker Error] {err}")
@@ -658,63 +691,63 @@ class AIProviderManagerService(BaseService):
             self.logger.error(f"Streaming Exception: {e}")
             yield {"type": "error", "content": f"[System Error: {str(e)}]"}
 
-    def _run_diffuser(self, model_data, prompt, **kwargs):
-        if not DIFFUSERS_AVAILABLE: return {"error": "Diffusers/Torch not installed on this Core."}
+    def _load_diffuser(self, model_data):
         name = model_data['name']
+        self.logger.info(f"Loading Image Model: {name} (This may take time)...")
+        path = model_data['full_path']
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        dtype = torch.float16 if device == "cuda" else torch.float32
 
-        with self.model_load_lock:
-            if name not in self.hf_pipelines:
-                self.logger.info(f"Loading Image Model: {name} (This may take time)...")
-                try:
-                    path = model_data['full_path']
-                    device = "cuda" if torch.cuda.is_available() else "cpu"
-                    dtype = torch.float16 if device == "cuda" else torch.float32
-
-                    vae = None
-                    if os.path.isdir(path):
-                        vae_path = os.path.join(path, "vae")
-                    else:
-                        vae_path = os.path.join(os.path.dirname(path), "vae")
-
-                    if os.path.isdir(vae_path):
-                        self.logger.info(f"Found local VAE at: {vae_path}")
-                        try:
-                            vae = AutoencoderKL.from_pretrained(vae_path, torch_dtype=dtype).to(device)
-                        except Exception as vae_err:
-                            self.logger.warning(f"Failed to load VAE: {vae_err}")
-                            vae = None
+        vae = None
+        if os.path.isdir(path):
+            vae_path = os.path.join(path, "vae")
+        else:
+            vae_path = os.path.join(os.path.dirname(path), "vae")
 
-                    load_args = {"torch_dtype": dtype}
-                    if vae is not None:
-                        load_args["vae"] = vae
+        if os.path.isdir(vae_path):
+            self.logger.info(f"Found local VAE at: {vae_path}")
+            try:
+                vae = AutoencoderKL.from_pretrained(vae_path, torch_dtype=dtype).to(device)
+            except Exception as vae_err:
+                self.logger.warning(f"Failed to load VAE: {vae_err}")
+                vae = None
 
-                    if model_data['type'] == 'hf_image_single_file':
-                        pipe = StableDiffusionXLPipeline.from_single_file(path, **load_args)
-                    else:
-                        pipe = StableDiffusionXLPipeline.from_pretrained(path, **load_args)
+        load_args = {"torch_dtype": dtype}
+        if vae is not None:
+            load_args["vae"] = vae
 
-                    if device == "cuda":
-                        try:
-                            pipe.enable_model_cpu_offload()
-                            self.logger.info("Enabled Model CPU Offload.")
-                        except Exception as e:
-                            self.logger.warning(f"CPU Offload failed: {e}")
-                            pipe.to("cuda")
+        if model_data['type'] == 'hf_image_single_file':
+            pipe = StableDiffusionXLPipeline.from_single_file(path, **load_args)
+        else:
+            pipe = StableDiffusionXLPipeline.from_pretrained(path, **load_args)
+
+        if device == "cuda":
+            try:
+                pipe.enable_model_cpu_offload()
+                self.logger.info("Enabled Model CPU Offload.")
+            except Exception as e:
+                self.logger.warning(f"CPU Offload failed: {e}")
+                pipe.to("cuda")
 
-                    self.hf_pipelines[name] = pipe
-                    self.logger.info(f"Model {name} Loaded successfully.")
-                except Exception as e:
-                    self.logger.error(f"Model Load Failed: {e}")
-                    return {"error": f"Failed to load model {name}. Details: {str(e)}"}
+        self.logger.info(f"Model {name} Loaded successfully.")
+        return pipe
+
+    def _run_diffuser(self, model_data, prompt, **kwargs):
+        if not DIFFUSERS_AVAILABLE: return {"error": "Diffusers/Torch not installed on this Core."}
+        name = model_data['name']
 
         try:
             negative = kwargs.get('negative_prompt', 'blurry, low quality, ugly, deformed')
-            pipe = self.hf_pipelines[name]
 
-            img = pipe(
-                prompt=prompt, negative_prompt=negative,
-                width=1024, height=1024, num_inference_steps=30
-            ).images[0]
+            # Pipeline dipin selama generate; load per-model, jadi model lain tidak ikut menunggu.
+            with self.model_residency.acquire(
+                ("diffusers", name), lambda: self._load_diffuser(model_data),
+                backend="diffusers", est_bytes=self._model_bytes(model_data)
+            ) as pipe:
+                img = pipe(
+                    prompt=prompt, negative_prompt=negative,
+                    width=1024, height=1024, num_inference_steps=30
+                ).images[0]
 
             user_id = kwargs.get('user_id')
             if not user_id or user_id == "None":
@@ -733,8 +766,16 @@ class AIProviderManagerService(BaseService):
             url_with_engine = f"/api/v1/ai/files/view?path={safe_path_url}&engine_id={self.engine_id}"
 
             return {"type": "image", "data": filepath, "url": url_with_engine}
+        except ModelLoadError as e:
+            self.logger.error(f"Model Load Failed: {e}")
+            return {"error": f"Failed to load model {name}. Details: {str(e)}"}
         except Exception as e:
             return {"error": f"Generation failed: {str(e)}"}
 
+    def stop(self):
+        self.gguf_pool.shutdown()
+        self.model_residency.unload_idle(0)
+        self.session_store.close()
+
     def install_component(self, zip_path): return False, "Manual install only."
     def uninstall_component(self, comp_id): return False, "Manual uninstall only."
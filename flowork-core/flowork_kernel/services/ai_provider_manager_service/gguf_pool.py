@@ -0,0 +1,330 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\gguf_pool.py total lines 331 
+########################################################################
+
+import os
+import sys
+import json
+import time
+import uuid
+import select
+import logging
+import argparse
+import threading
+import subprocess
+from flowork_kernel.workers.gguf_server import read_frame, write_frame
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "workers", "gguf_server.py")
+GGUF_IDLE_SECONDS = int(os.getenv("AI_GGUF_IDLE_SECONDS", "900"))
+GGUF_WORKERS_PER_MODEL = int(os.getenv("AI_GGUF_WORKERS_PER_MODEL", "1"))
+GGUF_LOAD_TIMEOUT = int(os.getenv("AI_GGUF_LOAD_TIMEOUT", "600"))
+GGUF_REQUEST_TIMEOUT = int(os.getenv("AI_GGUF_REQUEST_TIMEOUT", "1800"))
+GGUF_OVERHEAD_FACTOR = 1.2
+
+def _default_budget_bytes() -> int:
+    env = os.getenv("AI_GGUF_MEMORY_BUDGET_MB")
+    if env:
+        return int(float(env) * 1024 * 1024)
+    if psutil is not None:
+        return int(psutil.virtual_memory().total * 0.6)
+    return 0
+
+class GGUFWorkerError(RuntimeError):
+    pass
+
+class GGUFWorker:
+    """Satu proses gguf_server.py yang memegang satu model di memori. Satu request pada satu waktu."""
+
+    def __init__(self, key, model_path, n_ctx, gpu_layers, threads=0, logger=None):
+        self.key = key
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.gpu_layers = gpu_layers
+        self.threads = threads
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.process = None
+        self.last_used = time.time()
+        self.load_seconds = None
+        self.requests_served = 0
+        try:
+            size = os.path.getsize(model_path)
+        except OSError:
+            size = 0
+        self.est_bytes = int(size * GGUF_OVERHEAD_FACTOR)
+
+    def start(self):
+        cmd = [sys.executable, "-u", SERVER_PATH, "--model", self.model_path, "--n-ctx", str(self.n_ctx),
+               "--gpu-layers", str(self.gpu_layers), "--threads", str(self.threads)]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=sys.stderr, bufsize=0)
+        if not self._wait_readable(GGUF_LOAD_TIMEOUT):
+            self.stop(force=True)
+            raise GGUFWorkerError(f"Model load timed out after {GGUF_LOAD_TIMEOUT}s")
+        frame = read_frame(self.process.stdout)
+        if not frame or frame.get("type") != "ready":
+            self.stop(force=True)
+            raise GGUFWorkerError((frame or {}).get("content") or "GGUF server exited during load")
+        self.load_seconds = frame.get("load_seconds")
+        self.logger.info(f"[GGUF Pool] Worker pid {self.process.pid} ready for {os.path.basename(self.model_path)} ({self.load_seconds}s load)")
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _wait_readable(self, timeout) -> bool:
+        try:
+            ready, _, _ = select.select([self.process.stdout.fileno()], [], [], timeout)
+            return bool(ready)
+        except (ValueError, OSError):
+            # Windows: select() tidak mendukung pipe, baca blocking saja.
+            return True
+
+    def request(self, req, ping_interval=None):
+        """
+        Generator of response frames for one request; the caller must already hold self.lock.
+        Yields {"type": "ping"} every ping_interval seconds of silence when set.
+        """
+        req_id = req.setdefault("id", uuid.uuid4().hex[:12])
+        finished = False
+        try:
+            write_frame(self.process.stdin, req)
+            deadline = time.time() + GGUF_REQUEST_TIMEOUT
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise GGUFWorkerError(f"Request timed out after {GGUF_REQUEST_TIMEOUT}s")
+                # Selalu tunggu dengan batas waktu sebelum read_frame, supaya worker yang hang tidak memblokir caller.
+                if not self._wait_readable(min(ping_interval, remaining) if ping_interval else remaining):
+                    if ping_interval and time.time() < deadline:
+                        yield {"type": "ping"}
+                    continue
+                frame = read_frame(self.process.stdout)
+                if frame is None:
+                    raise GGUFWorkerError(f"GGUF server exited (code {self.process.poll()})")
+                if frame.get("id") not in (None, req_id):
+                    continue
+                if frame.get("type") in ("done", "error"):
+                    finished = True
+                yield frame
+                if finished:
+                    return
+        finally:
+            self.last_used = time.time()
+            self.requests_served += 1
+            if not finished:
+                # Consumer berhenti di tengah stream: sisa frame tidak bisa disinkronkan lagi, matikan worker.
+                self.stop(force=True)
+
+    def stop(self, force=False):
+        proc, self.process = self.process, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            if not force:
+                write_frame(proc.stdin, {"op": "shutdown"})
+                proc.wait(timeout=10)
+                return
+        except Exception:
+            pass
+        try:
+            proc.kill()
+            proc.wait(timeout=5)
+        except Exception:
+            pass
+
+class GGUFModelPool:
+    """
+    Long-lived llama.cpp workers keyed by (model_path, n_ctx, gpu_layers).
+    Idle workers are unloaded after GGUF_IDLE_SECONDS; spawning a new one evicts idle LRU workers
+    until its estimated footprint fits in the memory budget. With a `residency` manager attached the
+    budget is the shared one, and idle workers compete in LRU order with diffusers pipelines.
+    """
+
+    def __init__(self, logger=None, memory_budget_bytes=None, idle_seconds=GGUF_IDLE_SECONDS, workers_per_model=GGUF_WORKERS_PER_MODEL, residency=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.memory_budget = _default_budget_bytes() if memory_budget_bytes is None else memory_budget_bytes
+        self.idle_seconds = idle_seconds
+        self.workers_per_model = max(1, workers_per_model)
+        self._workers = {}
+        self._lock = threading.RLock()
+        self.residency = residency
+        if residency is not None:
+            residency.register_tenant("gguf", self.resident_bytes, self.idle_candidates)
+        self._reaper = None
+        self._stopped = threading.Event()
+
+    def _ensure_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_loop, name="gguf-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._stopped.wait(min(60, max(5, self.idle_seconds // 4))):
+            self.unload_idle()
+
+    def resident_bytes(self) -> int:
+        return sum(w.est_bytes for ws in self._workers.values() for w in ws if w.alive)
+
+    def idle_candidates(self) -> list:
+        with self._lock:
+            return [(w.last_used, w.est_bytes, os.path.basename(w.model_path), lambda w=w: self._evict_worker(w))
+                    for ws in self._workers.values() for w in ws if w.alive and not w.lock.locked()]
+
+    def _evict_worker(self, w) -> bool:
+        with self._lock:
+            if not w.lock.acquire(blocking=False):
+                return False
+            try:
+                if w in self._workers.get(w.key, []):
+                    self._workers[w.key].remove(w)
+                w.stop()
+            finally:
+                w.lock.release()
+        return True
+
+    def _evict_for(self, needed: int):
+        if self.residency is not None:
+            self.residency.make_room(needed)
+            return
+        if not self.memory_budget:
+            return
+        victims = sorted((w for ws in self._workers.values() for w in ws if w.alive and not w.lock.locked()), key=lambda w: w.last_used)
+        for w in victims:
+            if self.resident_bytes() + needed <= self.memory_budget:
+                break
+            self.logger.info(f"[GGUF Pool] Evicting {os.path.basename(w.model_path)} (pid {w.process.pid}) to fit memory budget")
+            self._workers[w.key].remove(w)
+            w.stop()
+        if self.resident_bytes() + needed > self.memory_budget:
+            self.logger.warning(f"[GGUF Pool] Memory budget exceeded: {(self.resident_bytes() + needed) >> 20}MB > {self.memory_budget >> 20}MB (busy workers cannot be evicted)")
+
+    def _checkout(self, model_path, n_ctx, gpu_layers, threads) -> GGUFWorker:
+        key = (os.path.abspath(model_path), int(n_ctx), int(gpu_layers), int(threads))
+        with self._lock:
+            workers = self._workers.setdefault(key, [])
+            workers[:] = [w for w in workers if w.alive]
+            for w in workers:
+                if w.lock.acquire(blocking=False):
+                    return w
+            if len(workers) >= self.workers_per_model:
+                target = min(workers, key=lambda w: w.last_used)
+                spawn = None
+            else:
+                spawn = GGUFWorker(key, key[0], n_ctx, gpu_layers, threads, self.logger)
+                self._evict_for(spawn.est_bytes)
+                spawn.lock.acquire()
+                workers.append(spawn)
+        if spawn is None:
+            target.lock.acquire()
+            if target.alive:
+                return target
+            target.lock.release()
+            return self._checkout(model_path, n_ctx, gpu_layers, threads)
+        try:
+            spawn.start()
+        except Exception:
+            with self._lock:
+                if spawn in self._workers.get(key, []):
+                    self._workers[key].remove(spawn)
+            spawn.lock.release()
+            raise
+        self._ensure_reaper()
+        return spawn
+
+    def generate(self, model_path, messages, n_ctx=4096, gpu_layers=-1, threads=0, params=None) -> dict:
+        worker = self._checkout(model_path, n_ctx, gpu_layers, threads)
+        try:
+            for frame in worker.request({"op": "generate", "messages": messages, "stream": False, "params": params or {}}):
+                if frame["type"] == "error":
+                    raise GGUFWorkerError(frame.get("content"))
+                if frame["type"] == "done":
+                    return frame
+            raise GGUFWorkerError("No response from GGUF server")
+        finally:
+            worker.lock.release()
+
+    def prefetch(self, model_path, n_ctx=4096, gpu_layers=-1, threads=0):
+        """Spawns (or touches) the worker in the background so a queued job finds the model loaded."""
+        key = (os.path.abspath(model_path), int(n_ctx), int(gpu_layers), int(threads))
+        with self._lock:
+            if any(w.alive for w in self._workers.get(key, [])):
+                return None
+        def run():
+            try:
+                self._checkout(model_path, n_ctx, gpu_layers, threads).lock.release()
+            except Exception as e:
+                self.logger.warning(f"[GGUF Pool] Prefetch of {os.path.basename(model_path)} failed: {e}")
+        thread = threading.Thread(target=run, name="gguf-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def stream(self, model_path, messages, n_ctx=4096, gpu_layers=-1, threads=0, params=None, ping_interval=1.0):
+        worker = self._checkout(model_path, n_ctx, gpu_layers, threads)
+        try:
+            for frame in worker.request({"op": "generate", "messages": messages, "stream": True, "params": params or {}}, ping_interval=ping_interval):
+                yield frame
+        finally:
+            worker.lock.release()
+
+    def unload_idle(self, max_idle=None) -> int:
+        max_idle = self.idle_seconds if max_idle is None else max_idle
+        now = time.time()
+        unloaded = 0
+        with self._lock:
+            for key, workers in self._workers.items():
+                for w in list(workers):
+                    if not w.alive:
+                        workers.remove(w)
+                    elif now - w.last_used >= max_idle and w.lock.acquire(blocking=False):
+                        workers.remove(w)
+                        self.logger.info(f"[GGUF Pool] Unloading idle {os.path.basename(w.model_path)} (pid {w.process.pid})")
+                        w.stop()
+                        w.lock.release()
+                        unloaded += 1
+        return unloaded
+
+    def shutdown(self):
+        self._stopped.set()
+        self.unload_idle(max_idle=0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_budget_mb": self.memory_budget >> 20,
+                "resident_mb": self.resident_bytes() >> 20,
+                "workers": [
+                    {"model": os.path.basename(w.model_path), "pid": w.process.pid if w.process else None, "busy": w.lock.locked(),
+                     "idle_seconds": round(time.time() - w.last_used, 1), "requests": w.requests_served, "load_seconds": w.load_seconds}
+                    for ws in self._workers.values() for w in ws if w.alive
+                ],
+            }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold vs warm latency of the resident GGUF pool.")
+    parser.add_argument("--model", required=True, help="Path to a (small, CPU-friendly) .gguf model")
+    parser.add_argument("--prompt", default="Say hello in five words.")
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=32)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    pool = GGUFModelPool(idle_seconds=3600)
+    messages = [{"role": "user", "content": args.prompt}]
+    timings = []
+    try:
+        for _ in range(args.requests):
+            started = time.time()
+            pool.generate(args.model, messages, gpu_layers=0, params={"max_tokens": args.max_tokens, "temperature": 0})
+            timings.append(round(time.time() - started, 3))
+        print(json.dumps({"cold_seconds": timings[0], "warm_seconds": timings[1:], "pool": pool.stats()}, indent=2))
+    finally:
+        pool.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\model_residency.py total lines 283 
+########################################################################
+
+import os
+import gc
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MODEL_OVERHEAD_FACTOR = 1.2
+MODEL_WEIGHT_EXTS = (".safetensors", ".bin", ".ckpt", ".pt", ".pth", ".gguf", ".onnx")
+
+def default_budget_bytes() -> int:
+    env = os.getenv("AI_MODEL_MEMORY_BUDGET_MB")
+    if env:
+        return int(float(env) * 1024 * 1024)
+    if psutil is not None:
+        return int(psutil.virtual_memory().total * 0.7)
+    return 0
+
+def estimate_model_bytes(path: str) -> int:
+    """Ukuran file bobot di disk (file tunggal atau folder HF) x overhead; cukup untuk akuntansi budget."""
+    if not path:
+        return 0
+    if os.path.isfile(path):
+        return int(os.path.getsize(path) * MODEL_OVERHEAD_FACTOR)
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            if f.lower().endswith(MODEL_WEIGHT_EXTS):
+                try:
+                    total += os.path.getsize(os.path.join(root, f))
+                except OSError:
+                    pass
+    return int(total * MODEL_OVERHEAD_FACTOR)
+
+def release_torch_memory():
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+
+class ModelLoadError(RuntimeError):
+    pass
+
+class ResidentModel:
+    def __init__(self, key, backend, est_bytes):
+        self.key = key
+        self.backend = backend
+        self.est_bytes = est_bytes
+        self.obj = None
+        self.unloader = None
+        self.pins = 0
+        self.loaded = False
+        self.loading = False
+        self.last_used = time.time()
+        self.load_seconds = None
+        self.load_lock = threading.Lock()
+
+class ModelResidencyManager:
+    """
+    Process-wide RAM budget for loaded AI models, shared by every local backend.
+
+    In-process models (diffusers pipelines) are loaded through acquire(), which pins them while
+    in use; each key has its own load lock so one slow load never blocks other models.
+    Out-of-process residents (the GGUF worker pool) join via register_tenant() and are evicted
+    in the same global LRU order. Short-lived subprocess models (TTS, one-shot LLM) reserve
+    their footprint with transient() for the duration of the call.
+    """
+
+    def __init__(self, budget_bytes=None, logger=None, on_event=None):
+        self.budget = default_budget_bytes() if budget_bytes is None else budget_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self.on_event = on_event
+        self._models = {}
+        self._transient = {}
+        self._tenants = []
+        self._lock = threading.RLock()
+
+    def _emit(self, event, backend, **info):
+        if self.on_event:
+            try:
+                self.on_event(event, backend, info)
+            except Exception:
+                pass
+
+    def register_tenant(self, name, resident_bytes, idle_candidates):
+        """
+        resident_bytes() -> int currently held by the tenant.
+        idle_candidates() -> [(last_used, est_bytes, label, evict_fn), ...] for entries that may be unloaded now.
+        """
+        with self._lock:
+            self._tenants.append((name, resident_bytes, idle_candidates))
+
+    def resident_bytes(self) -> int:
+        # Tenant dipanggil di luar self._lock: tenant boleh memanggil make_room() sambil memegang lock-nya sendiri.
+        with self._lock:
+            total = sum(m.est_bytes for m in self._models.values() if m.loaded or m.loading) + sum(self._transient.values())
+            tenants = list(self._tenants)
+        for _, resident_fn, _ in tenants:
+            try:
+                total += resident_fn()
+            except Exception:
+                pass
+        return total
+
+    def make_room(self, needed: int, exclude=None) -> bool:
+        """Evicts idle models (any backend) in LRU order until `needed` more bytes fit. False if it cannot."""
+        if not self.budget:
+            return True
+        with self._lock:
+            candidates = [
+                (m.last_used, m.est_bytes, m.key, m.backend, lambda k=m.key: self.evict(k, reason="budget"))
+                for m in self._models.values() if m.loaded and not m.pins and m.key != exclude
+            ]
+            tenants = list(self._tenants)
+        for name, _, idle_fn in tenants:
+            try:
+                candidates.extend((lu, size, label, name, fn) for lu, size, label, fn in idle_fn())
+            except Exception as e:
+                self.logger.warning(f"[Model Residency] Tenant '{name}' failed to list idle models: {e}")
+        candidates.sort(key=lambda c: c[0])
+        for _, size, label, backend, evict in candidates:
+            if self.resident_bytes() + needed <= self.budget:
+                break
+            self.logger.info(f"[Model Residency] Evicting {backend}:{label} ({size >> 20}MB) to fit memory budget")
+            try:
+                if evict() is False:
+                    continue
+            except Exception as e:
+                self.logger.warning(f"[Model Residency] Evicting {label} failed: {e}")
+                continue
+            if any(backend == t[0] for t in tenants):
+                # Model in-process sudah mencatat evictionnya sendiri di _unload().
+                self._emit("evicted", backend, reason="budget")
+        fits = self.resident_bytes() + needed <= self.budget
+        if not fits:
+            self.logger.warning(f"[Model Residency] Memory budget exceeded: {(self.resident_bytes() + needed) >> 20}MB > {self.budget >> 20}MB (models in use cannot be evicted)")
+        return fits
+
+    def _entry(self, key, backend, est_bytes) -> ResidentModel:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                entry = self._models[key] = ResidentModel(key, backend, est_bytes)
+            return entry
+
+    def _load(self, entry, loader, unloader):
+        # Dipanggil dengan entry.load_lock dipegang; model lain tetap bisa load/generate paralel.
+        if entry.loaded:
+            self._emit("hit", entry.backend)
+            return
+        # Reservasi dulu, baru cari ruang: load paralel model lain langsung melihat bytes ini.
+        with self._lock:
+            entry.loading = True
+        started = time.time()
+        try:
+            self.make_room(0, exclude=entry.key)
+            entry.obj = loader()
+        except Exception as e:
+            self._emit("load_failed", entry.backend)
+            raise ModelLoadError(str(e)) from e
+        finally:
+            entry.loading = False
+        entry.unloader = unloader
+        entry.load_seconds = round(time.time() - started, 2)
+        entry.loaded = True
+        entry.last_used = time.time()
+        self.logger.info(f"[Model Residency] Loaded {entry.backend}:{entry.key} in {entry.load_seconds}s (~{entry.est_bytes >> 20}MB)")
+        self._emit("loaded", entry.backend, seconds=entry.load_seconds)
+
+    @contextmanager
+    def acquire(self, key, loader, backend="diffusers", est_bytes=0, unloader=None):
+        """Yields the loaded model, pinned (not evictable) until the block exits."""
+        entry = self._entry(key, backend, est_bytes)
+        with self._lock:
+            entry.pins += 1
+        try:
+            with entry.load_lock:
+                self._load(entry, loader, unloader)
+            entry.last_used = time.time()
+            yield entry.obj
+        finally:
+            with self._lock:
+                entry.pins -= 1
+                entry.last_used = time.time()
+            self._emit("state", backend)
+
+    def prefetch(self, key, loader, backend="diffusers", est_bytes=0, unloader=None):
+        """Starts loading in the background (e.g. when a job is queued) so the job finds it resident."""
+        entry = self._entry(key, backend, est_bytes)
+        if entry.loaded or entry.load_lock.locked():
+            return None
+        def run():
+            with entry.load_lock:
+                try:
+                    self._load(entry, loader, unloader)
+                    self._emit("prefetched", backend)
+                except Exception as e:
+                    self.logger.warning(f"[Model Residency] Prefetch of {key} failed: {e}")
+        thread = threading.Thread(target=run, name=f"model-prefetch-{backend}", daemon=True)
+        thread.start()
+        return thread
+
+    @contextmanager
+    def transient(self, key, est_bytes, backend="subprocess"):
+        """Accounts a model living only for the duration of one subprocess call."""
+        self.make_room(est_bytes)
+        token = (key, object())
+        with self._lock:
+            self._transient[token] = est_bytes
+        self._emit("state", backend)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._transient.pop(token, None)
+            self._emit("state", backend)
+
+    def _unload(self, entry, reason):
+        obj, entry.obj = entry.obj, None
+        entry.loaded = False
+        try:
+            if entry.unloader:
+                entry.unloader(obj)
+        finally:
+            del obj
+            release_torch_memory()
+        self._emit("evicted", entry.backend, reason=reason)
+
+    def evict(self, key, reason="manual") -> bool:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None or not entry.loaded or entry.pins:
+                return False
+            self._unload(entry, reason)
+            return True
+
+    def unload_idle(self, max_idle: float) -> int:
+        now = time.time()
+        with self._lock:
+            idle = [k for k, m in self._models.items() if m.loaded and not m.pins and now - m.last_used >= max_idle]
+        return sum(1 for k in idle if self.evict(k, reason="idle"))
+
+    def is_resident(self, key) -> bool:
+        entry = self._models.get(key)
+        return bool(entry and entry.loaded)
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_backend = {}
+            for m in self._models.values():
+                if m.loaded:
+                    by_backend[m.backend] = by_backend.get(m.backend, 0) + m.est_bytes
+            for name, resident_fn, _ in self._tenants:
+                try:
+                    by_backend[name] = by_backend.get(name, 0) + resident_fn()
+                except Exception:
+                    pass
+            if self._transient:
+                by_backend["subprocess"] = by_backend.get("subprocess", 0) + sum(self._transient.values())
+            return {
+                "budget_mb": self.budget >> 20,
+                "resident_mb": self.resident_bytes() >> 20,
+                "resident_bytes_by_backend": by_backend,
+                "models": [
+                    {"key": str(m.key), "backend": m.backend, "mb": m.est_bytes >> 20, "pinned": m.pins,
+                     "idle_seconds": round(time.time() - m.last_used, 1), "load_seconds": m.load_seconds}
+                    for m in self._models.values() if m.loaded
+                ],
+            }
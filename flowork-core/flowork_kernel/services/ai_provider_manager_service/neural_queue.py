@@ -0,0 +1,181 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\neural_queue.py total lines 182 
+########################################################################
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict
+
+JOB_RETENTION_MAX = int(os.getenv("AI_JOB_RETENTION_MAX", "1000"))
+JOB_RETENTION_SECONDS = int(os.getenv("AI_JOB_RETENTION_SECONDS", "3600"))
+DEFAULT_PRIORITY = 10
+FINISHED_STATUSES = ("COMPLETED", "FAILED", "CANCELLED")
+
+def parse_lane_limits(spec: str) -> dict:
+    # "gpu=1,provider:openai=4" -> {"gpu": 1, "provider:openai": 4}
+    limits = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        name, _, value = part.rpartition("=")
+        try:
+            limits[name.strip()] = max(1, int(value))
+        except ValueError:
+            continue
+    return limits
+
+class Lane:
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.running = set()
+        self._heap = []
+
+    def push(self, job):
+        # Prioritas lebih tinggi jalan duluan (sama seperti job_orchestrator: ORDER BY priority DESC, created_at ASC).
+        heapq.heappush(self._heap, (-job["priority"], job["seq"], job["id"]))
+
+    def pop(self, jobs):
+        while self._heap:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = jobs.get(job_id)
+            if job is not None and job["status"] == "QUEUED":
+                return job
+        return None
+
+    def position(self, job, jobs) -> int:
+        key = (-job["priority"], job["seq"])
+        return 1 + sum(1 for p, s, jid in self._heap if (p, s) < key and jobs.get(jid, {}).get("status") == "QUEUED")
+
+    def queued(self, jobs) -> int:
+        return sum(1 for _, _, jid in self._heap if jobs.get(jid, {}).get("status") == "QUEUED")
+
+class NeuralQueue:
+    """
+    Multi-lane scheduler for AI jobs. Each lane (one per cloud provider, local model or shared GPU)
+    has its own concurrency limit and priority heap, so a cloud chat never waits behind an SDXL render.
+    Finished jobs are kept for JOB_RETENTION_SECONDS, at most JOB_RETENTION_MAX of them.
+    """
+
+    def __init__(self, runner, lane_resolver, logger=None, on_status=None):
+        self.runner = runner
+        self.lane_resolver = lane_resolver
+        self.on_status = on_status
+        self.logger = logger or logging.getLogger(__name__)
+        self.jobs = OrderedDict()
+        self.lanes = {}
+        self._tasks = {}
+        self._seq = itertools.count()
+
+    def _lane(self, name: str, concurrency: int) -> Lane:
+        lane = self.lanes.get(name)
+        if lane is None:
+            lane = self.lanes[name] = Lane(name, concurrency)
+        return lane
+
+    def submit(self, task_type: str, payload: dict, job_id: str) -> dict:
+        lane_name, concurrency = self.lane_resolver(task_type, payload)
+        try:
+            priority = int(payload.get("priority", DEFAULT_PRIORITY))
+        except (TypeError, ValueError):
+            priority = DEFAULT_PRIORITY
+        job = {
+            "id": job_id,
+            "type": task_type,
+            "payload": payload,
+            "status": "QUEUED",
+            "lane": lane_name,
+            "priority": priority,
+            "seq": next(self._seq),
+            "submitted_at": time.time(),
+        }
+        self.jobs[job_id] = job
+        lane = self._lane(lane_name, concurrency)
+        lane.push(job)
+        job["position"] = lane.position(job, self.jobs)
+        self._prune()
+        self._dispatch(lane)
+        return job
+
+    def position(self, job_id: str) -> int:
+        job = self.jobs.get(job_id)
+        if not job or job["status"] != "QUEUED":
+            return 0
+        return self.lanes[job["lane"]].position(job, self.jobs)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if not job or job["status"] in FINISHED_STATUSES:
+            return False
+        # Job QUEUED cukup ditandai (lane.pop melewatinya). Job PROCESSING tidak bisa dihentikan paksa:
+        # thread executor tetap jalan, jadi slot lane baru dilepas di finally _run saat runner benar-benar
+        # selesai, dan hasilnya dibuang karena status sudah bukan PROCESSING.
+        self._finish(job, "CANCELLED", error="Cancelled by user")
+        return True
+
+    def _dispatch(self, lane: Lane):
+        while len(lane.running) < lane.concurrency:
+            job = lane.pop(self.jobs)
+            if job is None:
+                return
+            job["status"] = "PROCESSING"
+            job["started_at"] = time.time()
+            job["position"] = 0
+            lane.running.add(job["id"])
+            self._notify(job)
+            self._tasks[job["id"]] = asyncio.ensure_future(self._run(lane, job))
+
+    async def _run(self, lane: Lane, job):
+        self.logger.info(f"⚙️ [Neural Queue] Processing {job['id']} ({job['type']}) on lane '{lane.name}'...")
+        try:
+            result = await self.runner(job)
+            if job["status"] == "PROCESSING":
+                job["result"] = result
+                self._finish(job, "COMPLETED")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.logger.error(f"❌ [Neural Queue] Job {job['id']} Failed: {e}")
+            if job["status"] == "PROCESSING":
+                self._finish(job, "FAILED", error=str(e))
+        finally:
+            self._tasks.pop(job["id"], None)
+            lane.running.discard(job["id"])
+            self._dispatch(lane)
+
+    def _finish(self, job, status, error=None):
+        job["status"] = status
+        job["completed_at"] = time.time()
+        job["position"] = 0
+        if error:
+            job["error"] = error
+        self.jobs.move_to_end(job["id"])
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_status:
+            try:
+                self.on_status(job)
+            except Exception as e:
+                self.logger.error(f"[Neural Queue] Status hook failed for {job['id']}: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        finished = [jid for jid, j in self.jobs.items() if j["status"] in FINISHED_STATUSES]
+        overflow = len(finished) - JOB_RETENTION_MAX
+        for jid in finished:
+            job = self.jobs[jid]
+            if overflow > 0 or job.get("completed_at", 0) < cutoff:
+                del self.jobs[jid]
+                overflow -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            name: {"concurrency": lane.concurrency, "running": len(lane.running), "queued": lane.queued(self.jobs)}
+            for name, lane in self.lanes.items()
+        }
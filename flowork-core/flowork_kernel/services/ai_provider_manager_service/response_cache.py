@@ -0,0 +1,161 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\response_cache.py total lines 162 
+########################################################################
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "2000"))
+CACHE_DEFAULT_TTL = int(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+CACHE_MODES = ("off", "exact", "normalized")
+# Parameter yang tidak mempengaruhi output model, jadi tidak ikut kunci cache.
+NON_SEMANTIC_KWARGS = {"user_id", "response_cache", "stream", "messages", "session_id", "job_id", "workflow_id", "execution_id"}
+_WS = re.compile(r"\s+")
+
+def parse_policy(policy) -> dict:
+    """
+    Node config -> policy. Accepts "exact" / "normalized" / "off", True, or
+    {"mode": ..., "ttl": seconds, "persist": bool}. Anything else means off.
+    """
+    if isinstance(policy, str):
+        policy = {"mode": policy}
+    elif policy is True:
+        policy = {"mode": "exact"}
+    if not isinstance(policy, dict):
+        return {"mode": "off"}
+    mode = str(policy.get("mode", "exact")).lower()
+    if mode not in CACHE_MODES:
+        mode = "off"
+    try:
+        ttl = int(policy.get("ttl", CACHE_DEFAULT_TTL))
+    except (TypeError, ValueError):
+        ttl = CACHE_DEFAULT_TTL
+    return {"mode": mode, "ttl": max(1, ttl), "persist": bool(policy.get("persist", False))}
+
+def normalize_text(text) -> str:
+    if not isinstance(text, str):
+        return text
+    return _WS.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def make_key(mode: str, endpoint_id: str, prompt, messages, params: dict) -> str:
+    norm = normalize_text if mode == "normalized" else (lambda t: t)
+    msgs = [{"role": m.get("role"), "content": norm(m.get("content"))} for m in (messages or []) if isinstance(m, dict)]
+    material = {
+        "endpoint": endpoint_id,
+        "prompt": norm(prompt),
+        "messages": msgs,
+        "params": {k: v for k, v in sorted((params or {}).items()) if k not in NON_SEMANTIC_KWARGS},
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def is_cacheable(result) -> bool:
+    # Hanya hasil teks/json yang sukses; generator (stream) dan error tidak pernah disimpan.
+    return isinstance(result, dict) and "error" not in result and result.get("type") in ("text", "json")
+
+class ResponseCache:
+    """
+    TTL + LRU cache for deterministic AI responses, with an optional SQLite file behind it
+    so entries survive an engine restart. Opt-in per call via the node's 'response_cache' policy.
+    """
+
+    def __init__(self, db_path: str = None, max_entries: int = CACHE_MAX_ENTRIES, on_lookup=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.on_lookup = on_lookup
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db_ready = False
+
+    def _db(self):
+        con = sqlite3.connect(self.db_path, timeout=5.0)
+        if not self._db_ready:
+            con.execute("PRAGMA journal_mode=WAL;")
+            con.execute("CREATE TABLE IF NOT EXISTS ai_response_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_ai_response_cache_exp ON ai_response_cache(expires_at)")
+            self._db_ready = True
+        return con
+
+    def _count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.on_lookup:
+            try:
+                self.on_lookup(hit)
+            except Exception:
+                pass
+
+    def get(self, key: str, persist: bool = False):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._count(True)
+                    return json.loads(entry[0])
+                del self._entries[key]
+        if persist and self.db_path:
+            try:
+                con = self._db()
+                try:
+                    row = con.execute("SELECT value, expires_at FROM ai_response_cache WHERE key=? AND expires_at>?", (key, now)).fetchone()
+                finally:
+                    con.close()
+                if row:
+                    self._remember(key, row[0], row[1])
+                    self._count(True)
+                    return json.loads(row[0])
+            except sqlite3.Error:
+                pass
+        self._count(False)
+        return None
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, result: dict, ttl: int, persist: bool = False):
+        value = json.dumps(result, ensure_ascii=False)
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        if persist and self.db_path:
+            try:
+                con = self._db()
+                try:
+                    con.execute("INSERT OR REPLACE INTO ai_response_cache(key, value, expires_at) VALUES(?,?,?)", (key, value, expires_at))
+                    con.execute("DELETE FROM ai_response_cache WHERE expires_at<=?", (time.time(),))
+                    con.commit()
+                finally:
+                    con.close()
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.db_path and os.path.exists(self.db_path):
+            con = self._db()
+            try:
+                con.execute("DELETE FROM ai_response_cache")
+                con.commit()
+            finally:
+                con.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hits / total, 4) if total else 0.0}
@@ -0,0 +1,240 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\session_store.py total lines 241 
+########################################################################
+
+import os
+import glob
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+
+META_COLUMNS = ("id", "user_id", "title", "modelId", "created_at", "updated_at", "active_job_id", "active_job_status")
+ACTIVE_STATUSES = ("QUEUED", "PROCESSING")
+
+def _message_line(msg) -> str:
+    return json.dumps(msg, ensure_ascii=False, sort_keys=True)
+
+def _chain(prev_hash: str, line: str) -> str:
+    # Hash berantai: bisa dilanjutkan dari nilai tersimpan tanpa membaca ulang log.
+    return hashlib.sha1(f"{prev_hash}\n{line}".encode("utf-8")).hexdigest()
+
+class SessionStore:
+    """
+    Chat sessions as a SQLite metadata index (listing, status, ownership) plus one append-only
+    JSONL message log per session. Status updates never touch message bodies, listing never opens
+    a log, and message bodies are read only when a single session is fetched.
+
+    A save whose message list extends the stored one (checked with a chained hash, no disk read)
+    appends just the new lines; any other edit rewrites that session's log atomically.
+    """
+
+    def __init__(self, base_dir: str, logger=None):
+        self.base_dir = base_dir
+        self.logger = logger or logging.getLogger(__name__)
+        os.makedirs(base_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(base_dir, "sessions.db"), timeout=10.0, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL;")
+        self._db.execute("PRAGMA synchronous=NORMAL;")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                user_id TEXT,
+                title TEXT,
+                model_id TEXT,
+                created_at INTEGER,
+                updated_at INTEGER,
+                active_job_id TEXT,
+                active_job_status TEXT,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                log_hash TEXT NOT NULL DEFAULT '',
+                extra TEXT NOT NULL DEFAULT '{}'
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_updated ON sessions(user_id, updated_at DESC)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at DESC)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(active_job_status)")
+        self._db.commit()
+
+    def _log_path(self, session_id):
+        return os.path.join(self.base_dir, f"{session_id}.jsonl")
+
+    def _row_to_meta(self, row) -> dict:
+        sid, user_id, title, model_id, created_at, updated_at, job_id, job_status, count, _, extra = row
+        meta = json.loads(extra or "{}")
+        meta.update({
+            "id": sid, "title": title, "modelId": model_id, "created_at": created_at, "updated_at": updated_at,
+            "active_job_id": job_id, "active_job_status": job_status, "message_count": count,
+        })
+        if user_id is not None:
+            meta["user_id"] = user_id
+        return meta
+
+    def _fetch_row(self, session_id):
+        return self._db.execute("SELECT * FROM sessions WHERE id=?", (session_id,)).fetchone()
+
+    def exists(self, session_id) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM sessions WHERE id=?", (session_id,)).fetchone() is not None
+
+    def get(self, session_id, with_messages: bool = True):
+        with self._lock:
+            row = self._fetch_row(session_id)
+        if row is None:
+            return None
+        session = self._row_to_meta(row)
+        if with_messages:
+            session["messages"] = self.load_messages(session_id)
+        return session
+
+    def load_messages(self, session_id) -> list:
+        messages = []
+        try:
+            with open(self._log_path(session_id), "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        messages.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Baris terakhir bisa terpotong kalau proses mati saat menulis; lewati saja.
+                        continue
+        except FileNotFoundError:
+            pass
+        return messages
+
+    def save(self, session_id, data: dict):
+        """Upserts metadata; syncs the message log when data carries a 'messages' list."""
+        now = int(time.time() * 1000)
+        data["updated_at"] = now
+        extra = {k: v for k, v in data.items() if k not in META_COLUMNS and k not in ("messages", "message_count")}
+        with self._lock:
+            row = self._fetch_row(session_id)
+            count, log_hash = (row[8], row[9]) if row else (0, "")
+            messages = data.get("messages")
+            if isinstance(messages, list):
+                count, log_hash = self._sync_log(session_id, messages, count, log_hash)
+            self._db.execute("""
+                INSERT INTO sessions(id, user_id, title, model_id, created_at, updated_at, active_job_id, active_job_status, message_count, log_hash, extra)
+                VALUES(?,?,?,?,?,?,?,?,?,?,?)
+                ON CONFLICT(id) DO UPDATE SET user_id=excluded.user_id, title=excluded.title, model_id=excluded.model_id,
+                    updated_at=excluded.updated_at, active_job_id=excluded.active_job_id, active_job_status=excluded.active_job_status,
+                    message_count=excluded.message_count, log_hash=excluded.log_hash, extra=excluded.extra
+            """, (
+                session_id, data.get("user_id"), data.get("title"), data.get("modelId"), data.get("created_at", now), now,
+                data.get("active_job_id"), data.get("active_job_status"), count, log_hash, json.dumps(extra, ensure_ascii=False),
+            ))
+            self._db.commit()
+
+    def _sync_log(self, session_id, messages, stored_count, stored_hash):
+        lines = [_message_line(m) for m in messages]
+        prefix_hash = ""
+        for line in lines[:stored_count]:
+            prefix_hash = _chain(prefix_hash, line)
+        prefix_ok = len(lines) >= stored_count and prefix_hash == stored_hash
+        new_hash = prefix_hash
+        for line in lines[stored_count:]:
+            new_hash = _chain(new_hash, line)
+        path = self._log_path(session_id)
+        if prefix_ok:
+            new_lines = lines[stored_count:]
+            if new_lines:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(new_lines) + "\n")
+        else:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+            os.replace(tmp, path)
+        return len(lines), new_hash
+
+    def append_message(self, session_id, message: dict) -> bool:
+        with self._lock:
+            row = self._fetch_row(session_id)
+            if row is None:
+                return False
+            line = _message_line(message)
+            with open(self._log_path(session_id), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._db.execute("UPDATE sessions SET message_count=message_count+1, log_hash=?, updated_at=? WHERE id=?",
+                             (_chain(row[9], line), int(time.time() * 1000), session_id))
+            self._db.commit()
+            return True
+
+    def update_status(self, session_id, status, job_id=None) -> bool:
+        with self._lock:
+            if job_id is not None:
+                cur = self._db.execute("UPDATE sessions SET active_job_status=?, active_job_id=?, updated_at=? WHERE id=?",
+                                       (status, job_id, int(time.time() * 1000), session_id))
+            else:
+                cur = self._db.execute("UPDATE sessions SET active_job_status=?, updated_at=? WHERE id=?",
+                                       (status, int(time.time() * 1000), session_id))
+            self._db.commit()
+            return cur.rowcount > 0
+
+    def delete(self, session_id) -> bool:
+        with self._lock:
+            cur = self._db.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+            self._db.commit()
+        try:
+            os.remove(self._log_path(session_id))
+        except FileNotFoundError:
+            pass
+        return cur.rowcount > 0
+
+    def list(self, user_id=None, limit: int = 50) -> list:
+        with self._lock:
+            if user_id is None:
+                rows = self._db.execute("SELECT * FROM sessions ORDER BY updated_at DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self._db.execute("SELECT * FROM sessions WHERE user_id=? ORDER BY updated_at DESC LIMIT ?", (user_id, limit)).fetchall()
+        return [self._row_to_meta(r) for r in rows]
+
+    def cancel_active(self) -> list:
+        """Indexed janitor query: sessions left QUEUED/PROCESSING by a dead engine become CANCELLED."""
+        with self._lock:
+            ids = [r[0] for r in self._db.execute(
+                f"SELECT id FROM sessions WHERE active_job_status IN ({','.join('?' * len(ACTIVE_STATUSES))})", ACTIVE_STATUSES
+            ).fetchall()]
+            if ids:
+                self._db.execute(
+                    f"UPDATE sessions SET active_job_status='CANCELLED', active_job_id=NULL WHERE id IN ({','.join('?' * len(ids))})", ids
+                )
+                self._db.commit()
+        return ids
+
+    def migrate_json_sessions(self) -> int:
+        """One-time import of legacy <id>.json files; they are moved to legacy_json/ so boot never rescans them."""
+        files = glob.glob(os.path.join(self.base_dir, "*.json"))
+        if not files:
+            return 0
+        legacy_dir = os.path.join(self.base_dir, "legacy_json")
+        os.makedirs(legacy_dir, exist_ok=True)
+        migrated = 0
+        for path in files:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                session_id = data.get("id") or os.path.splitext(os.path.basename(path))[0]
+                updated_at = data.get("updated_at")
+                self.save(session_id, data)
+                if updated_at:
+                    with self._lock:
+                        self._db.execute("UPDATE sessions SET updated_at=? WHERE id=?", (updated_at, session_id))
+                        self._db.commit()
+                shutil.move(path, os.path.join(legacy_dir, os.path.basename(path)))
+                migrated += 1
+            except Exception as e:
+                self.logger.error(f"[SessionStore] Failed to migrate {path}: {e}")
+        return migrated
+
+    def close(self):
+        with self._lock:
+            self._db.close()
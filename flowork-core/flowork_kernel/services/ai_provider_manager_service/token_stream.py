@@ -0,0 +1,130 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\ai_provider_manager_service\token_stream.py total lines 131 
+########################################################################
+
+import os
+import time
+import codecs
+import select
+import asyncio
+import threading
+import concurrent.futures
+
+STREAM_FLUSH_SECONDS = int(os.getenv("AI_STREAM_FLUSH_MS", "40")) / 1000.0
+STREAM_MAX_CHARS = int(os.getenv("AI_STREAM_MAX_CHARS", "256"))
+STREAM_QUEUE_SIZE = int(os.getenv("AI_STREAM_QUEUE_SIZE", "64"))
+STREAM_PING_SECONDS = 1.0
+PIPE_READ_BYTES = 64 * 1024
+
+def read_pipe_text(pipe, tick_seconds=STREAM_FLUSH_SECONDS, chunk_size=PIPE_READ_BYTES):
+    """
+    Reads a child's stdout in large chunks and decodes UTF-8 incrementally, so a multi-byte
+    character split across two reads is never mangled. Yields {"type": "ping"} on every
+    silent tick so the caller can flush time-bucketed deltas.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    fd = pipe.fileno()
+    while True:
+        try:
+            ready = select.select([fd], [], [], tick_seconds)[0]
+        except (ValueError, OSError):
+            ready = [fd]
+        if not ready:
+            yield {"type": "ping"}
+            continue
+        data = os.read(fd, chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield {"type": "token", "content": text}
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield {"type": "token", "content": tail}
+
+def coalesce_tokens(packets, flush_seconds=STREAM_FLUSH_SECONDS, max_chars=STREAM_MAX_CHARS, ping_seconds=STREAM_PING_SECONDS):
+    """
+    Merges token packets into deltas of up to max_chars, flushed at least every flush_seconds.
+    Upstream pings act as clock ticks; only one ping per ping_seconds of silence is passed on.
+    """
+    parts = []
+    size = 0
+    bucket_started = None
+    last_out = time.time()
+    for packet in packets:
+        now = time.time()
+        kind = packet.get("type") if isinstance(packet, dict) else "token"
+        if kind == "token":
+            text = packet.get("content", "") if isinstance(packet, dict) else str(packet)
+            if not text:
+                continue
+            if bucket_started is None:
+                bucket_started = now
+            parts.append(text)
+            size += len(text)
+            if size < max_chars and now - bucket_started < flush_seconds:
+                continue
+        elif kind == "ping":
+            if not (parts and now - bucket_started >= flush_seconds):
+                if now - last_out >= ping_seconds:
+                    last_out = now
+                    yield {"type": "ping"}
+                continue
+        if parts:
+            yield {"type": "token", "content": "".join(parts)}
+            parts, size, bucket_started = [], 0, None
+            last_out = now
+        if kind not in ("token", "ping"):
+            last_out = now
+            yield packet
+    if parts:
+        yield {"type": "token", "content": "".join(parts)}
+
+async def iterate_in_thread(generator, maxsize=STREAM_QUEUE_SIZE):
+    """
+    Drives a blocking generator on an executor thread through a bounded queue. When the socket
+    consumer falls behind the queue fills, the thread stops pulling, and the model worker blocks
+    on its pipe: backpressure end to end instead of buffering everything in memory.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    sentinel = object()
+
+    def put(item):
+        fut = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                fut.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    fut.cancel()
+                    return False
+
+    def pump():
+        try:
+            for item in generator:
+                if stop.is_set() or not put(item):
+                    break
+        except Exception as e:
+            put({"type": "error", "content": f"[System Error: {e}]"})
+        finally:
+            try:
+                generator.close()
+            except Exception:
+                pass
+            if not stop.is_set():
+                put(sentinel)
+
+    loop.run_in_executor(None, pump)
+    try:
+        while True:
+            item = await queue.get()
+            if item is sentinel:
+                break
+            yield item
+    finally:
+        # Client disconnected or finished: the pump thread notices within one put() timeout and closes the generator.
+        stop.set()
@@ -1,9 +1,10 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\model_routes.py total lines 388 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\model_routes.py total lines 403 
 ########################################################################
 
 from .base_api_route import BaseApiRoute
+from flowork_kernel.services.ai_provider_manager_service.token_stream import iterate_in_thread
 from aiohttp import web
 import types
 import json
@@ -49,6 +50,7 @@ class ModelRoutes(BaseApiRoute):
 
             "POST /api/v1/ai/jobs/submit": self.handle_submit_job,
             "GET /api/v1/ai/jobs/{id}": self.handle_get_job_status,
+            "DELETE /api/v1/ai/jobs/{id}": self.handle_cancel_job,
 
             "GET /api/v1/models/conversions": self.handle_get_conversion_status,
             "POST /api/v1/models/convert": self.handle_post_model_conversion, # [FIXED] Updated route name match
@@ -89,9 +91,7 @@ class ModelRoutes(BaseApiRoute):
         if not ai_manager: return self._json_response({"error": "AI Service unavailable."}, status=503)
 
         user_id = self._get_user_id(request)
-        all_sessions = ai_manager.list_sessions()
-
-        my_sessions = [s for s in all_sessions if s.get('user_id') == user_id]
+        my_sessions = ai_manager.list_sessions(user_id=user_id)
 
         return self._json_response(my_sessions)
 
@@ -134,7 +134,7 @@ class ModelRoutes(BaseApiRoute):
         session_id = request.match_info['id']
         user_id = self._get_user_id(request)
 
-        session = ai_manager.get_session(session_id)
+        session = ai_manager.get_session(session_id, with_messages=False)
         if not session: return self._json_response({"status": "ignored"})
 
 
@@ -154,7 +154,7 @@ class ModelRoutes(BaseApiRoute):
 
             session_id = payload.get('session_id')
             if session_id:
-                sess = ai_manager.get_session(session_id)
+                sess = ai_manager.get_session(session_id, with_messages=False)
                 if not sess:
                     return self._json_response({"error": "Invalid Session ID"}, status=400)
 
@@ -185,26 +185,41 @@ class ModelRoutes(BaseApiRoute):
             if job_owner and job_owner != user_id:
                 return self._json_response({"error": "Unauthorized"}, status=403)
 
-            current_pos = 0
-            if job['status'] == 'QUEUED':
-                current_pos = job['position']
-
             response = {
                 "id": job['id'],
                 "status": job['status'],
                 "created_at": job['submitted_at'],
-                "position": current_pos
+                "position": ai_manager.get_job_position(job_id),
+                "lane": job.get('lane'),
+                "priority": job.get('priority')
             }
 
             if job['status'] == 'COMPLETED':
                 response['result'] = job.get('result')
-            elif job['status'] == 'FAILED':
+            elif job['status'] in ('FAILED', 'CANCELLED'):
                 response['error'] = job.get('error')
 
             return self._json_response(response)
 
         return self._json_response({"error": "Job not found or expired"}, status=404)
 
+    async def handle_cancel_job(self, request):
+        ai_manager = self.service_instance.ai_provider_manager_service
+        job_id = request.match_info['id']
+        user_id = self._get_user_id(request)
+
+        job = ai_manager.active_jobs.get(job_id)
+        if not job:
+            return self._json_response({"error": "Job not found or expired"}, status=404)
+
+        job_owner = job.get('payload', {}).get('user_id')
+        if job_owner and job_owner != user_id:
+            return self._json_response({"error": "Unauthorized"}, status=403)
+
+        if not ai_manager.cancel_job(job_id):
+            return self._json_response({"status": job['status'], "message": "Job already finished."}, status=409)
+        return self._json_response({"status": "CANCELLED", "job_id": job_id})
+
     async def handle_get_local_models(self, request):
         ai_manager = self.service_instance.ai_provider_manager_service
         if not ai_manager: return self._json_response({"error": "AI Service unavailable."}, status=503)
@@ -289,7 +304,7 @@ class ModelRoutes(BaseApiRoute):
                     result = await future
 
                     if isinstance(result, types.GeneratorType):
-                        for packet in result:
+                        async for packet in iterate_in_thread(result):
                             if isinstance(packet, dict):
                                 if packet.get("type") == "token":
                                     chunk_payload = json.dumps({
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\gateway_connector_service\gateway_connector_service.py total lines 334 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\gateway_connector_service\gateway_connector_service.py total lines 337 
 ########################################################################
 
 """
@@ -45,6 +45,7 @@ CURRENT_PAYLOAD_VERSION = 2
 class GatewayConnectorService(BaseService):
     def __init__(self, kernel, service_id):
         super().__init__(kernel, service_id)
+        self.loop = None
         self.sio = socketio.AsyncClient(
             logger=False,
             engineio_logger=False,
@@ -284,6 +285,8 @@ class GatewayConnectorService(BaseService):
             self.logger.error(f"[GatewayConnector] Heartbeat task crashed: {e}", exc_info=True)
 
     async def start(self):
+        # Loop pemilik AsyncClient; thread lain menjadwalkan send_gateway_swarm_task ke sini.
+        self.loop = asyncio.get_running_loop()
         if not self.engine_id or not self.engine_token or not self.gateway_url:
             self.logger.error("GatewayConnectorService not properly set up. Missing URL, Engine ID or Token.")
             return
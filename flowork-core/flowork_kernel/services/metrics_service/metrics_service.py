@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\metrics_service\metrics_service.py total lines 61 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\metrics_service\metrics_service.py total lines 90 
 ########################################################################
 
 import threading
@@ -34,6 +34,35 @@ class MetricsService(BaseService):
             "flowork_memory_usage_mb",
             "Current memory usage (RSS) of the Core Engine process",
         )
+        self.AI_CACHE_LOOKUPS = Counter(
+            "flowork_ai_response_cache_lookups_total",
+            "AI response cache lookups",
+            [
+                "result"
+            ],
+        )
+        self.AI_MODEL_RESIDENT_BYTES = Gauge(
+            "flowork_ai_model_resident_bytes",
+            "Estimated memory held by loaded AI models",
+            [
+                "backend"
+            ],
+        )
+        self.AI_MODEL_EVENTS = Counter(
+            "flowork_ai_model_residency_events_total",
+            "AI model loads, cache hits, prefetches and evictions",
+            [
+                "backend",
+                "event"
+            ],
+        )
+        self.AI_MODEL_LOAD_SECONDS = Histogram(
+            "flowork_ai_model_load_seconds",
+            "Time spent loading an AI model into memory",
+            [
+                "backend"
+            ],
+        )
         self.update_thread = None
         self.stop_event = threading.Event()
     def start(self):
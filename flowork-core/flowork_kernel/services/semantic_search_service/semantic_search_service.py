@@ -1,29 +1,59 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\semantic_search_service\semantic_search_service.py total lines 144 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\semantic_search_service\semantic_search_service.py total lines 164 
 ########################################################################
 
 import threading
+from collections import OrderedDict
 from ..base_service import BaseService
+from flowork_kernel.utils.micro_batcher import MicroBatcher
 import os
 import json
 import time
 try:
     from sentence_transformers import SentenceTransformer
-    from sentence_transformers.util import cos_sim
-    import torch
+    from .vector_index import VectorIndex, EmbeddingStore, content_hash
     SENTENCE_TRANSFORMERS_AVAILABLE = True
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
+MODEL_NAME = 'all-MiniLM-L6-v2'
+MIN_SCORE = 0.25
+QUERY_CACHE_SIZE = int(os.getenv("SEMANTIC_QUERY_CACHE_SIZE", "512"))
 class SemanticSearchService(BaseService):
 
     def __init__(self, kernel, service_id: str):
         super().__init__(kernel, service_id)
         self.logger = self.kernel.write_to_log
         self.model = None
-        self.component_embeddings = {}
+        self.indexes = {}
         self.is_ready = False
         self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        # Query embeddings dari banyak agent node paralel digabung jadi satu forward pass.
+        self.query_batcher = MicroBatcher(self._encode_batch, name="semantic-query")
+        self.query_cache = OrderedDict()
+        self.query_cache_lock = threading.Lock()
+        self.embedding_store = None
+        if SENTENCE_TRANSFORMERS_AVAILABLE:
+            index_dir = os.path.join(self.kernel.data_path, "semantic_index")
+            os.makedirs(index_dir, exist_ok=True)
+            self.embedding_store = EmbeddingStore(os.path.join(index_dir, "embeddings.db"))
+    def _encode_batch(self, texts):
+
+        return list(self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, batch_size=len(texts)))
+    def encode_query(self, query: str):
+
+        with self.query_cache_lock:
+            cached = self.query_cache.get(query)
+            if cached is not None:
+                self.query_cache.move_to_end(query)
+                return cached
+        embedding = self.query_batcher.submit(query)
+        with self.query_cache_lock:
+            self.query_cache[query] = embedding
+            while len(self.query_cache) > QUERY_CACHE_SIZE:
+                self.query_cache.popitem(last=False)
+        return embedding
     def start(self):
 
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
@@ -39,7 +69,7 @@ class SemanticSearchService(BaseService):
 
         try:
             self.logger("Loading sentence transformer model... (This may take a moment)", "INFO")
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model = SentenceTransformer(MODEL_NAME)
             self.logger("Sentence transformer model loaded successfully.", "SUCCESS")
         except Exception as e:
             self.logger(f"Failed to initialize Semantic Search Service model: {e}", "CRITICAL")
@@ -56,12 +86,10 @@ class SemanticSearchService(BaseService):
             "plugins": module_manager.loaded_modules if module_manager else {},
             "widgets": widget_manager.loaded_widgets if widget_manager else {}
         }
-        with self.lock:
-            self.component_embeddings.clear()
+        with self.build_lock:
+            entries = {}
             for comp_type, components in component_sources.items():
-                self.component_embeddings[comp_type] = []
-                texts_to_encode = []
-                component_ids = []
+                entries[comp_type] = []
                 for comp_id, data in components.items():
                     installed_as = data.get('installed_as')
                     if comp_type == 'modules' and installed_as != 'module':
@@ -70,17 +98,27 @@ class SemanticSearchService(BaseService):
                         continue
                     manifest = data.get('manifest', {})
                     searchable_text = f"Name: {manifest.get('name', '')}. Description: {manifest.get('description', '')}. ID: {comp_id}"
-                    texts_to_encode.append(searchable_text)
-                    component_ids.append(comp_id)
-                if texts_to_encode:
-                    embeddings = self.model.encode(texts_to_encode, convert_to_tensor=True)
-                    for i, comp_id in enumerate(component_ids):
-                        self.component_embeddings[comp_type].append({
-                            'id': comp_id,
-                            'embedding': embeddings[i]
-                        })
-            self.is_ready = True
-            self.logger("Semantic search index built successfully.", "SUCCESS")
+                    entries[comp_type].append((comp_id, searchable_text, content_hash(MODEL_NAME, searchable_text)))
+
+            # Hanya teks yang berubah (hash baru) yang di-encode ulang; sisanya dari cache disk.
+            all_hashes = {h: text for items in entries.values() for _, text, h in items}
+            vectors = self.embedding_store.get_many(all_hashes.keys())
+            missing = [h for h in all_hashes if h not in vectors]
+            if missing:
+                encoded = self.model.encode([all_hashes[h] for h in missing], convert_to_numpy=True, normalize_embeddings=True)
+                fresh = list(zip(missing, encoded))
+                vectors.update(fresh)
+                self.embedding_store.put_many(fresh)
+            self.embedding_store.prune(all_hashes.keys())
+
+            new_indexes = {
+                comp_type: VectorIndex([cid for cid, _, _ in items], [vectors[h] for _, _, h in items])
+                for comp_type, items in entries.items() if items
+            }
+            with self.lock:
+                self.indexes = new_indexes
+                self.is_ready = True
+            self.logger(f"Semantic search index built successfully ({len(all_hashes) - len(missing)} cached, {len(missing)} encoded).", "SUCCESS")
             event_bus = self.kernel.get_service("event_bus")
             if event_bus:
                 event_bus.publish("SEMANTIC_INDEX_BUILT", {"status": "ready"})
@@ -88,20 +126,12 @@ class SemanticSearchService(BaseService):
 
         if not self.is_ready or not self.model:
             return []
+        query_embedding = self.encode_query(query)
         with self.lock:
-            if component_type not in self.component_embeddings or not self.component_embeddings[component_type]:
-                return []
-            corpus = self.component_embeddings[component_type]
-            corpus_embeddings = [item['embedding'] for item in corpus]
-            corpus_tensor = torch.stack(corpus_embeddings)
-            query_embedding = self.model.encode(query, convert_to_tensor=True)
-            cos_scores = cos_sim(query_embedding, corpus_tensor)[0]
-            top_results = cos_scores.topk(min(top_k, len(corpus)), largest=True)
-            ranked_ids = []
-            for score, idx in zip(top_results[0], top_results[1]):
-                if score > 0.25:
-                    ranked_ids.append(corpus[idx]['id'])
-            return ranked_ids
+            index = self.indexes.get(component_type)
+        if not index:
+            return []
+        return [comp_id for comp_id, _ in index.search(query_embedding, top_k, MIN_SCORE)]
 
     def search_in_specific_dbs(self, query: str, allowed_db_ids: list, top_k: int = 5) -> list[dict]:
 
@@ -110,33 +140,23 @@ class SemanticSearchService(BaseService):
             return []
 
         all_results = []
-        query_embedding = self.model.encode(query, convert_to_tensor=True)
+        query_embedding = self.encode_query(query)
 
         with self.lock:
-            for comp_type in allowed_db_ids:
-                if comp_type not in self.component_embeddings or not self.component_embeddings[comp_type]:
-                    self.logger(f"MemoryMount: Skipping search in '{comp_type}', not found or empty.", "DEBUG")
-                    continue
-
-                corpus = self.component_embeddings[comp_type]
-                corpus_embeddings = [item['embedding'] for item in corpus]
-                if not corpus_embeddings:
-                    continue
-
-                corpus_tensor = torch.stack(corpus_embeddings)
-
-                cos_scores = cos_sim(query_embedding, corpus_tensor)[0]
-
-                top_k_for_db = min(top_k, len(corpus))
-                top_results = cos_scores.topk(top_k_for_db, largest=True)
-
-                for score, idx in zip(top_results[0], top_results[1]):
-                    if score > 0.25:
-                        all_results.append({
-                            "id": corpus[idx]['id'],
-                            "score": float(score),
-                            "source_db": comp_type
-                        })
+            indexes = self.indexes
+
+        for comp_type in allowed_db_ids:
+            index = indexes.get(comp_type)
+            if not index:
+                self.logger(f"MemoryMount: Skipping search in '{comp_type}', not found or empty.", "DEBUG")
+                continue
+
+            for comp_id, score in index.search(query_embedding, top_k, MIN_SCORE):
+                all_results.append({
+                    "id": comp_id,
+                    "score": score,
+                    "source_db": comp_type
+                })
 
         sorted_results = sorted(all_results, key=lambda x: x['score'], reverse=True)
 
@@ -0,0 +1,89 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\semantic_search_service\vector_index.py total lines 90 
+########################################################################
+
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+def content_hash(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+def normalize_rows(matrix) -> np.ndarray:
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class VectorIndex:
+    """
+    One contiguous, L2-normalized float32 matrix per component type: cosine similarity for a query is a
+    single matvec, and top-k is argpartition over the scores instead of a full sort.
+    """
+
+    def __init__(self, ids, vectors):
+        self.ids = list(ids)
+        self.matrix = normalize_rows(vectors) if self.ids else np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query_vec, top_k: int, min_score: float = 0.0) -> list:
+        if not self.ids or top_k <= 0:
+            return []
+        q = normalize_rows(query_vec)[0]
+        scores = self.matrix @ q
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] > min_score]
+
+class EmbeddingStore:
+    """SQLite cache of embeddings keyed by content hash (model + searchable text), so restarts and hot reloads only encode what changed."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.db_path, timeout=10.0)
+            con.execute("PRAGMA journal_mode=WAL;")
+            con.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, dim INTEGER NOT NULL, vec BLOB NOT NULL)")
+            self._local.con = con
+        return con
+
+    def get_many(self, hashes) -> dict:
+        found = {}
+        hashes = list(hashes)
+        con = self._conn()
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            rows = con.execute(f"SELECT hash, dim, vec FROM embeddings WHERE hash IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            for h, dim, blob in rows:
+                vec = np.frombuffer(blob, dtype=np.float32)
+                if vec.shape[0] == dim:
+                    found[h] = vec
+        return found
+
+    def put_many(self, items):
+        con = self._conn()
+        con.executemany(
+            "INSERT OR REPLACE INTO embeddings(hash, dim, vec) VALUES(?,?,?)",
+            [(h, int(v.shape[0]), np.ascontiguousarray(v, dtype=np.float32).tobytes()) for h, v in items]
+        )
+        con.commit()
+
+    def prune(self, keep_hashes):
+        # Hapus embedding milik komponen yang sudah tidak terpasang.
+        con = self._conn()
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS keep_hashes (hash TEXT PRIMARY KEY)")
+        con.execute("DELETE FROM keep_hashes")
+        con.executemany("INSERT OR IGNORE INTO keep_hashes(hash) VALUES(?)", [(h,) for h in keep_hashes])
+        con.execute("DELETE FROM embeddings WHERE hash NOT IN (SELECT hash FROM keep_hashes)")
+        con.commit()
@@ -1,17 +1,18 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\swarm.py total lines 239 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\swarm.py total lines 362 
 ########################################################################
 
 from __future__ import annotations
-from typing import Dict, Any, List, Callable, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future, TimeoutError as FutTimeout
-from collections import deque
+from typing import Dict, Any, List, Callable, Optional, Tuple, Awaitable, Union
+from concurrent.futures import ThreadPoolExecutor
+import os
 import time
 import uuid
 import math
+import asyncio
+import inspect
 import threading
-import traceback
 
 try:
     from .gremlin import maybe_chaos_inject
@@ -19,7 +20,21 @@ except Exception:
     def maybe_chaos_inject(stage: str) -> None:
         return
 
-SendTaskFn = Callable[[str, Dict[str, Any]], Dict[str, Any]]
+SendTaskFn = Callable[[str, Dict[str, Any]], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]
+
+SWARM_MAX_WORKERS = int(os.getenv("FLOWORK_SWARM_MAX_WORKERS", "32"))
+LATENCY_EWMA_ALPHA = 0.3
+
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+def _get_shared_executor() -> ThreadPoolExecutor:
+    # Satu pool untuk semua swarm (dulu: ThreadPoolExecutor baru per fan_out).
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(max_workers=SWARM_MAX_WORKERS, thread_name_prefix="swarm")
+        return _shared_executor
 
 def _now_ms() -> float:
     return time.time() * 1000.0
@@ -32,6 +47,15 @@ def _p95(values: List[float]) -> float:
     return s[idx]
 
 class SwarmCoordinator:
+    """
+    asyncio-native fan-out over engines/tools. send_task_fn may be sync (run on a shared thread pool)
+    or async (awaited directly, e.g. the Gateway connector). Outstanding calls are cancelled as soon as
+    the quorum is decided (met or impossible), so an "any" swarm returns with its fastest responder.
+    Optional hedging starts only the `hedge` fastest engines (by observed latency) and adds one more
+    every `hedge_delay_s` without a success or immediately after a failure.
+
+    fan_out()/map_reduce() are blocking wrappers for worker threads; coroutines use the *_async variants.
+    """
 
     def __init__(self,
                  send_task_fn: SendTaskFn,
@@ -40,22 +64,39 @@ class SwarmCoordinator:
                  default_timeout_s: float = 30.0,
                  retries: int = 0,
                  backoff_base_s: float = 0.5,
-                 timeline: Optional[Any] = None):
+                 timeline: Optional[Any] = None,
+                 loop: Optional[Any] = None,
+                 require_loop: bool = False,
+                 hedge_delay_s: float = 2.0):
         self.send_task_fn = send_task_fn
         self.max_workers = max_workers
         self.default_timeout_s = float(default_timeout_s)
         self.retries = int(max(0, retries))
         self.backoff_base_s = float(max(0.0, backoff_base_s))
         self.timeline = timeline
-
-    def fan_out(self,
-                engine_ids: List[str],
-                task: Dict[str, Any],
-                *,
-                quorum: str = "all",
-                per_engine_timeout_s: Optional[float] = None,
-                retries: Optional[int] = None,
-                backoff_base_s: Optional[float] = None) -> Dict[str, Any]:
+        # loop: event loop tempat fan_out() dijadwalkan, atau callable yang mengembalikannya saat dipanggil
+        # (loop pemilik socket biasanya baru ada setelah service dibuat).
+        self.loop = loop
+        self.require_loop = require_loop
+        self.hedge_delay_s = float(hedge_delay_s)
+        self.latency_ewma_ms: Dict[str, float] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swarm") if max_workers else None
+        self._is_async = inspect.iscoroutinefunction(send_task_fn)
+
+    def fan_out(self, engine_ids: List[str], task: Dict[str, Any], **kw) -> Dict[str, Any]:
+        return self._run_sync(self.fan_out_async(engine_ids, task, **kw))
+
+    async def fan_out_async(self,
+                            engine_ids: List[str],
+                            task: Dict[str, Any],
+                            *,
+                            quorum: str = "all",
+                            per_engine_timeout_s: Optional[float] = None,
+                            retries: Optional[int] = None,
+                            backoff_base_s: Optional[float] = None,
+                            hedge: Optional[int] = None,
+                            on_result: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+                            payload_for: Optional[Callable[[str], Dict[str, Any]]] = None) -> Dict[str, Any]:
 
         swarm_id = str(uuid.uuid4())
         t_start = _now_ms()
@@ -65,49 +106,81 @@ class SwarmCoordinator:
         rtries = int(self.retries if retries is None else max(0, retries))
         bbase = float(self.backoff_base_s if backoff_base_s is None else max(0.0, backoff_base_s))
 
-        max_workers = self.max_workers or max(1, len(engine_ids))
+        total = len(engine_ids)
         results: Dict[str, Dict[str, Any]] = {}
         latencies: List[float] = []
-        success_count = 0
-        failure_count = 0
-
-        with ThreadPoolExecutor(max_workers=max_workers) as pool:
-            future_map: Dict[Future, Tuple[str, Dict[str, Any]]] = {}
-            for eid in engine_ids:
-                payload = dict(task)
-                payload.setdefault("task_id", str(uuid.uuid4()))
-                payload.setdefault("swarm_id", swarm_id)
-                fut = pool.submit(self._call_with_retry, eid, payload, timeout_s, rtries, bbase)
-                future_map[fut] = (eid, payload)
-
-            for fut in as_completed(future_map):
-                eid, payload = future_map[fut]
-                t0 = _now_ms()
-                try:
-                    ok, value, err, latency_ms = fut.result(timeout=timeout_s + 0.1)
-                except Exception as e:
-                    ok, value, err = False, None, f"executor_error: {e}"
-                    latency_ms = _now_ms() - t0
-
-                latencies.append(latency_ms)
-                if ok:
-                    success_count += 1
-                    results[eid] = {"ok": True, "value": value, "error": None, "latency_ms": round(latency_ms, 2)}
-                else:
-                    failure_count += 1
-                    results[eid] = {"ok": False, "value": None, "error": str(err), "latency_ms": round(latency_ms, 2)}
+        counts = {"success": 0, "failure": 0}
+
+        if hedge and hedge > 0:
+            # Engine tercepat (EWMA latency) duluan; engine tanpa riwayat dianggap cepat supaya tetap dicoba.
+            order = sorted(engine_ids, key=lambda e: self.latency_ewma_ms.get(e, 0.0))
+        else:
+            order = list(engine_ids)
+        waiting = list(order)
+        running: Dict[asyncio.Task, str] = {}
+
+        def launch():
+            eid = waiting.pop(0)
+            payload = dict(payload_for(eid)) if payload_for else dict(task)
+            payload.setdefault("task_id", str(uuid.uuid4()))
+            payload.setdefault("swarm_id", swarm_id)
+            running[asyncio.ensure_future(self._call_with_retry(eid, payload, timeout_s, rtries, bbase))] = eid
+
+        for _ in range(min(hedge, total) if hedge and hedge > 0 else total):
+            launch()
 
-                if quorum == "any" and success_count >= 1:
-                    pass
-
-        total = len(engine_ids)
-        quorum_met = self._check_quorum(quorum, total, success_count)
+        try:
+            while running or waiting:
+                wait_timeout = self.hedge_delay_s if waiting else None
+                done, _ = await asyncio.wait(list(running), timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for fut in done:
+                    eid = running.pop(fut)
+                    try:
+                        ok, value, err, latency_ms = fut.result()
+                    except Exception as e:
+                        ok, value, err, latency_ms = False, None, f"executor_error: {e}", 0.0
+
+                    latencies.append(latency_ms)
+                    if ok:
+                        counts["success"] += 1
+                        results[eid] = {"ok": True, "value": value, "error": None, "latency_ms": round(latency_ms, 2)}
+                        prev = self.latency_ewma_ms.get(eid)
+                        self.latency_ewma_ms[eid] = latency_ms if prev is None else prev + LATENCY_EWMA_ALPHA * (latency_ms - prev)
+                    else:
+                        counts["failure"] += 1
+                        results[eid] = {"ok": False, "value": None, "error": str(err), "latency_ms": round(latency_ms, 2)}
+                    if on_result is not None:
+                        try:
+                            on_result(eid, results[eid])
+                        except Exception as e:
+                            self._log("swarm_on_result_error", {"swarm_id": swarm_id, "engine_id": eid, "error": str(e)})
+
+                if self._quorum_decided(quorum, total, counts["success"], counts["failure"]):
+                    break
+                # Quorum belum putus: tiap engine yang selesai (sukses atau gagal) digantikan engine berikutnya.
+                for _ in range(min(len(done), len(waiting))):
+                    launch()
+        finally:
+            for fut, eid in running.items():
+                fut.cancel()
+                elapsed = _now_ms() - t_start
+                # Engine yang dibatalkan minimal selambat ini; dipakai untuk urutan hedge berikutnya.
+                self.latency_ewma_ms[eid] = max(self.latency_ewma_ms.get(eid, 0.0), elapsed)
+                results[eid] = {"ok": False, "value": None, "error": "cancelled: quorum decided", "latency_ms": round(elapsed, 2), "cancelled": True}
+            for eid in waiting:
+                results[eid] = {"ok": False, "value": None, "error": "skipped: quorum decided", "latency_ms": 0.0, "cancelled": True}
+
+        quorum_met = self._check_quorum(quorum, total, counts["success"])
         t_total = _now_ms() - t_start
 
         summary = {
             "total": total,
-            "success": success_count,
-            "failure": failure_count,
+            "success": counts["success"],
+            "failure": counts["failure"],
+            "cancelled": len(running) + len(waiting),
             "quorum": quorum,
             "quorum_met": quorum_met,
             "latency_ms_avg": round(sum(latencies)/len(latencies), 2) if latencies else 0.0,
@@ -135,45 +208,75 @@ class SwarmCoordinator:
         kw.setdefault("quorum", "majority")
         return self.fan_out(engine_ids, task, **kw)
 
-    def map_reduce(self,
-                   engine_ids: List[str],
-                   task_builder: Callable[[str], Dict[str, Any]],
-                   reducer: Callable[[List[Tuple[str, Dict[str, Any]]]], Any],
-                   *,
-                   quorum: str = "all",
-                   per_engine_timeout_s: Optional[float] = None,
-                   retries: Optional[int] = None,
-                   backoff_base_s: Optional[float] = None) -> Dict[str, Any]:
-
-        swarm_id = str(uuid.uuid4())
+    def map_reduce(self, engine_ids: List[str], task_builder: Callable[[str], Dict[str, Any]], reducer: Callable, **kw) -> Dict[str, Any]:
+        return self._run_sync(self.map_reduce_async(engine_ids, task_builder, reducer, **kw))
+
+    async def map_reduce_async(self,
+                               engine_ids: List[str],
+                               task_builder: Callable[[str], Dict[str, Any]],
+                               reducer: Callable,
+                               *,
+                               quorum: str = "all",
+                               per_engine_timeout_s: Optional[float] = None,
+                               retries: Optional[int] = None,
+                               backoff_base_s: Optional[float] = None,
+                               incremental: bool = False,
+                               initial: Any = None) -> Dict[str, Any]:
+        """
+        reducer(list_of_(eid, value)) runs once at the end, or with incremental=True
+        reducer(acc, (eid, value)) -> acc is folded over results as they stream in.
+        """
         tasks = {eid: task_builder(eid) for eid in engine_ids}
-        def send_mux(eid: str, _: Dict[str, Any]) -> Dict[str, Any]:
-            p = dict(tasks[eid])
-            p.setdefault("task_id", str(uuid.uuid4()))
-            p.setdefault("swarm_id", swarm_id)
-            return self.send_task_fn(eid, p)
-
-        tmp = SwarmCoordinator(
-            send_mux,
-            max_workers=self.max_workers,
-            default_timeout_s=per_engine_timeout_s or self.default_timeout_s,
-            retries=self.retries if retries is None else retries,
-            backoff_base_s=self.backoff_base_s if backoff_base_s is None else backoff_base_s,
-            timeline=self.timeline
-        )
-        res = tmp.fan_out(engine_ids, task={"map_reduce": True}, quorum=quorum)
         oks: List[Tuple[str, Dict[str, Any]]] = []
-        for eid, r in res["results"].items():
-            if r.get("ok"):
-                oks.append((eid, r["value"]))
+        state = {"acc": initial, "error": None}
+
+        def on_result(eid: str, r: Dict[str, Any]) -> None:
+            if not r.get("ok"):
+                return
+            oks.append((eid, r["value"]))
+            if incremental and state["error"] is None:
+                try:
+                    state["acc"] = reducer(state["acc"], (eid, r["value"]))
+                except Exception as e:
+                    state["error"] = e
+
+        res = await self.fan_out_async(
+            engine_ids, {"map_reduce": True}, quorum=quorum, per_engine_timeout_s=per_engine_timeout_s,
+            retries=retries, backoff_base_s=backoff_base_s, on_result=on_result, payload_for=tasks.__getitem__
+        )
         agg = None
         try:
-            agg = reducer(oks)
+            if incremental:
+                if state["error"] is not None:
+                    raise state["error"]
+                agg = state["acc"]
+            else:
+                agg = reducer(oks)
         except Exception as e:
             agg = {"error": f"reducer_error: {e}"}
         res["aggregate"] = agg
         return res
 
+    def _target_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        loop = self.loop() if callable(self.loop) else self.loop
+        return loop if loop is not None and loop.is_running() else None
+
+    def _run_sync(self, coro):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        target = self._target_loop()
+        if target is not None and target is not running:
+            return asyncio.run_coroutine_threadsafe(coro, target).result()
+        if self.require_loop:
+            coro.close()
+            raise RuntimeError("SwarmCoordinator: target event loop is not running; cannot schedule the fan-out.")
+        if running is not None:
+            coro.close()
+            raise RuntimeError("SwarmCoordinator: blocking call inside an event loop, await the *_async variant instead.")
+        return asyncio.run(coro)
+
     def _log(self, event: str, data: Dict[str, Any]) -> None:
         if self.timeline is not None and hasattr(self.timeline, "log"):
             try:
@@ -190,12 +293,31 @@ class SwarmCoordinator:
             return success > total // 2
         return success == total
 
-    def _call_with_retry(self,
-                         engine_id: str,
-                         payload: Dict[str, Any],
-                         timeout_s: float,
-                         retries: int,
-                         backoff_base_s: float) -> Tuple[bool, Any, Optional[str], float]:
+    def _quorum_decided(self, quorum: str, total: int, success: int, failure: int) -> bool:
+        if self._check_quorum(quorum, total, success):
+            return True
+        if quorum == "any":
+            return failure >= total
+        if quorum == "majority":
+            return failure >= total - total // 2
+        # "all" tetap menunggu semua hasil supaya laporan per-engine lengkap.
+        return success + failure >= total
+
+    async def _send_once(self, engine_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self._is_async:
+            return await self.send_task_fn(engine_id, payload)
+        loop = asyncio.get_running_loop()
+        v = await loop.run_in_executor(self._executor or _get_shared_executor(), self.send_task_fn, engine_id, payload)
+        if inspect.isawaitable(v):
+            v = await v
+        return v
+
+    async def _call_with_retry(self,
+                               engine_id: str,
+                               payload: Dict[str, Any],
+                               timeout_s: float,
+                               retries: int,
+                               backoff_base_s: float) -> Tuple[bool, Any, Optional[str], float]:
 
         attempts = 0
         last_err: Optional[str] = None
@@ -203,11 +325,13 @@ class SwarmCoordinator:
         while True:
             maybe_chaos_inject("swarm_before_send")
             try:
-                v = self.send_task_fn(engine_id, payload)
+                v = await asyncio.wait_for(self._send_once(engine_id, payload), timeout=timeout_s)
                 if isinstance(v, dict) and ("error" in v) and v["error"]:
                     raise RuntimeError(str(v["error"]))
                 latency_ms = _now_ms() - t0
                 return True, v, None, latency_ms
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 last_err = f"{type(e).__name__}: {e}"
                 attempts += 1
@@ -215,7 +339,7 @@ class SwarmCoordinator:
                     latency_ms = _now_ms() - t0
                     return False, None, last_err, latency_ms
                 delay = min(backoff_base_s * (2 ** (attempts - 1)), max(0.0, timeout_s / 2.0))
-                time.sleep(delay)
+                await asyncio.sleep(delay)
                 continue
 
 class LocalSwarmRegistry:
@@ -0,0 +1,77 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\ffmpeg_graph.py total lines 78 
+########################################################################
+
+def escape_filter_path(path: str) -> str:
+    """Path for filter options (subtitles=, movie=): forward slashes, ':' escaped (Windows drive letters)."""
+    return path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+def escape_drawtext(text: str) -> str:
+    return str(text).replace("\\", "\\\\").replace("'", "\u2019").replace(":", "\\:").replace("%", "\\%")
+
+class FilterGraph:
+    """
+    Small builder for -filter_complex strings so several steps (trim/concat, crop, overlays, outro)
+    compose into one ffmpeg run with a single encode. Labels are generated, so steps can be chained
+    without knowing each other's pad names.
+
+        g = FilterGraph()
+        v = g.add("0:v", "scale=1080:-2")
+        v, a = g.trim_concat(v, "0:a", [(0, 4.2), (5.0, 9.1)])
+        cmd += ["-filter_complex", str(g), "-map", v, "-map", a]
+    """
+
+    def __init__(self):
+        self.chains = []
+        self._n = 0
+
+    def label(self, prefix: str = "s") -> str:
+        self._n += 1
+        return f"[{prefix}{self._n}]"
+
+    @staticmethod
+    def _pad(label: str) -> str:
+        return label if label.startswith("[") else f"[{label}]"
+
+    def add(self, inputs, filters, outputs=1, prefix: str = "s"):
+        """Appends `in1in2 f1,f2 out`; returns the output label (or a list when outputs > 1)."""
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs)
+        filters = [filters] if isinstance(filters, str) else list(filters)
+        outs = [self.label(prefix) for _ in range(outputs)]
+        self.chains.append("".join(self._pad(i) for i in inputs) + ",".join(filters) + "".join(outs))
+        return outs[0] if outputs == 1 else outs
+
+    def split(self, label, n: int, audio: bool = False) -> list:
+        if n <= 1:
+            return [label]
+        return self.add(label, f"{'asplit' if audio else 'split'}={n}", outputs=n, prefix="a" if audio else "v")
+
+    def concat(self, segments, video: bool = True, audio: bool = True):
+        """segments: [(vlabel, alabel), ...] in order -> (vlabel, alabel)."""
+        inputs = [lbl for seg in segments for lbl, keep in zip(seg, (video, audio)) if keep]
+        outs = self.add(inputs, f"concat=n={len(segments)}:v={int(video)}:a={int(audio)}", outputs=int(video) + int(audio), prefix="c")
+        if video and audio:
+            return outs[0], outs[1]
+        return (outs, None) if video else (None, outs)
+
+    def trim_concat(self, vlabel, alabel, keep_segments):
+        """Keeps only keep_segments [(start, end), ...] of the stream(s); alabel may be None (video only)."""
+        if not keep_segments:
+            return vlabel, alabel
+        vs = self.split(vlabel, len(keep_segments))
+        as_ = self.split(alabel, len(keep_segments), audio=True) if alabel else [None] * len(keep_segments)
+        parts = []
+        for (start, end), v, a in zip(keep_segments, vs, as_):
+            tv = self.add(v, [f"trim=start={start:.3f}:end={end:.3f}", "setpts=PTS-STARTPTS"])
+            ta = self.add(a, [f"atrim=start={start:.3f}:end={end:.3f}", "asetpts=PTS-STARTPTS"]) if a else None
+            parts.append((tv, ta))
+        if len(parts) == 1:
+            return parts[0]
+        return self.concat(parts, video=True, audio=alabel is not None)
+
+    def __str__(self):
+        return ";".join(self.chains)
+
+    def __bool__(self):
+        return bool(self.chains)
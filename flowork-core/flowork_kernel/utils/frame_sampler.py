@@ -0,0 +1,190 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\frame_sampler.py total lines 191 
+########################################################################
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+FRAME_SAMPLER_BACKEND = os.getenv("FRAME_SAMPLER_BACKEND", "auto")
+SAMPLE_MAX_WIDTH = int(os.getenv("FRAME_SAMPLER_MAX_WIDTH", "640"))
+
+def _startup_info():
+    if os.name == 'nt':
+        info = subprocess.STARTUPINFO()
+        info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return info
+    return None
+
+def video_info(path):
+    """(width, height, fps) from the container header; no frame is decoded."""
+    cap = cv2.VideoCapture(path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), cap.get(cv2.CAP_PROP_FPS) or 30.0
+    finally:
+        cap.release()
+
+def scaled_size(width, height, max_width):
+    if not max_width or width <= max_width:
+        return width, height
+    # Dimensi genap: beberapa pixel format/encoder menolak ukuran ganjil.
+    w = max_width - max_width % 2
+    h = max(2, int(round(height * w / width / 2)) * 2)
+    return w, h
+
+def _resize(frame, size):
+    if frame.shape[1] == size[0] and frame.shape[0] == size[1]:
+        return frame
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+def _sample_ffmpeg(path, every_sec, size, ffmpeg_path, start=0.0, duration=None):
+    # fps + scale jalan di dalam ffmpeg: hanya frame yang dipakai yang di-convert dan dikirim lewat pipe.
+    w, h = size
+    window = (["-ss", f"{start:.3f}"] if start else []) + (["-t", f"{duration:.3f}"] if duration else [])
+    cmd = [ffmpeg_path, "-nostdin", "-v", "error"] + window + ["-i", path, "-an", "-sn",
+           "-vf", f"fps=1/{every_sec:.6f},scale={w}:{h}:flags=area", "-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+    frame_bytes = w * h * 3
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=frame_bytes * 2, startupinfo=_startup_info())
+    try:
+        n = 0
+        while True:
+            buf = proc.stdout.read(frame_bytes)
+            if len(buf) < frame_bytes:
+                break
+            yield n * every_sec, np.frombuffer(buf, dtype=np.uint8).reshape(h, w, 3)
+            n += 1
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+def _sample_grab(path, every_sec, size, start=0.0, duration=None):
+    # grab() demux+decode tanpa konversi warna/copy ke numpy; retrieve() hanya untuk frame sampel.
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        step = max(1, int(round(fps * every_sec)))
+        if start:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000.0)
+        last = int(duration * fps) if duration else None
+        idx = 0
+        while (last is None or idx < last) and cap.grab():
+            if idx % step == 0:
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                yield idx / fps, _resize(frame, size)
+            idx += 1
+    finally:
+        cap.release()
+
+def _sample_seek(path, every_sec, size, start=0.0, duration=None):
+    # Seek langsung ke tiap timestamp: decoder mulai dari keyframe terdekat, bagian lain dilompati.
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+        remaining = total / fps - start if total > 0 else float("inf")
+        duration = min(duration, remaining) if duration else remaining
+        t = 0.0
+        while t < duration:
+            cap.set(cv2.CAP_PROP_POS_MSEC, (start + t) * 1000.0)
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield t, _resize(frame, size)
+            t += every_sec
+    finally:
+        cap.release()
+
+def resolve_backend(backend, ffmpeg_path):
+    if backend and backend != "auto":
+        return backend
+    return "ffmpeg" if ffmpeg_path and (os.path.exists(ffmpeg_path) or shutil.which(ffmpeg_path)) else "grab"
+
+def sample_frames(path, every_sec, max_width=SAMPLE_MAX_WIDTH, ffmpeg_path="ffmpeg", backend=FRAME_SAMPLER_BACKEND, src_size=None, start=0.0, duration=None):
+    """
+    Yields (time_sec, frame) for one frame every `every_sec` seconds, as BGR uint8 arrays downscaled
+    to at most max_width (aspect kept). With start/duration only that window of the file is read and
+    time_sec is relative to `start`. Backends:
+      ffmpeg - fps/scale filters, raw frames over a pipe (default when ffmpeg is available)
+      grab   - OpenCV grab() for skipped frames, retrieve() only for sampled ones
+      seek   - OpenCV seek per sample; best when samples are far apart relative to the GOP
+    """
+    width, height = src_size or video_info(path)[:2]
+    if not width or not height:
+        return
+    size = scaled_size(width, height, max_width)
+    backend = resolve_backend(backend, ffmpeg_path)
+    if backend == "ffmpeg":
+        yield from _sample_ffmpeg(path, every_sec, size, ffmpeg_path, start, duration)
+    elif backend == "seek":
+        yield from _sample_seek(path, every_sec, size, start, duration)
+    else:
+        yield from _sample_grab(path, every_sec, size, start, duration)
+
+def _make_synthetic_video(path, seconds, width, height, fps, ffmpeg_path):
+    cmd = [ffmpeg_path, "-y", "-v", "error", "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+           "-c:v", "libx264", "-preset", "ultrafast", "-g", str(fps * 2), "-pix_fmt", "yuv420p", path]
+    subprocess.run(cmd, check=True, startupinfo=_startup_info())
+
+def _bench_read_all(path, every_sec, size):
+    # Cara lama: decode + convert setiap frame, pakai satu per interval.
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, int(fps * every_sec))
+    idx, out = 0, 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if idx % step == 0:
+            _resize(frame, size)
+            out += 1
+        idx += 1
+    cap.release()
+    return out
+
+def main():
+    """Benchmark: python -m flowork_kernel.utils.frame_sampler --seconds 60 --every 3"""
+    parser = argparse.ArgumentParser(description="Frame sampling backends on a synthetic test video")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--every", type=float, default=3.0, help="sample interval in seconds")
+    parser.add_argument("--max-width", type=int, default=SAMPLE_MAX_WIDTH)
+    parser.add_argument("--ffmpeg", default=shutil.which("ffmpeg") or "ffmpeg")
+    args = parser.parse_args()
+    if not CV2_AVAILABLE:
+        print("opencv-python is required for the benchmark", file=sys.stderr)
+        return 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.mp4")
+        _make_synthetic_video(path, args.seconds, args.width, args.height, args.fps, args.ffmpeg)
+        size = scaled_size(args.width, args.height, args.max_width)
+        print(f"{args.seconds}s {args.width}x{args.height}@{args.fps} -> 1 frame / {args.every}s at {size[0]}x{size[1]}")
+        started = time.perf_counter()
+        n = _bench_read_all(path, args.every, size)
+        print(f"  read-all  {time.perf_counter() - started:7.2f}s  {n} frames")
+        for backend in ("grab", "seek", "ffmpeg"):
+            started = time.perf_counter()
+            n = sum(1 for _ in sample_frames(path, args.every, args.max_width, args.ffmpeg, backend))
+            print(f"  {backend:<8}  {time.perf_counter() - started:7.2f}s  {n} frames")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\media_jobs.py total lines 214 
+########################################################################
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+MEDIA_ENCODER_THREADS = int(os.getenv("MEDIA_ENCODER_THREADS", os.getenv("CLIP_ENCODER_THREADS", "4")))
+MEDIA_ENCODER_SLOTS = int(os.getenv("MEDIA_ENCODER_SLOTS", "0")) or max(1, (os.cpu_count() or 4) // max(1, MEDIA_ENCODER_THREADS))
+MEDIA_COPY_SLOTS = int(os.getenv("MEDIA_COPY_SLOTS", str(max(2, min(8, os.cpu_count() or 4)))))
+LEDGER_NAME = ".flowork_jobs.json"
+
+# Codec yang bisa masuk container mp4 apa adanya (stream copy tanpa remux error).
+MP4_COPY_CODECS = {"h264", "hevc", "mpeg4", "av1", "aac", "mp3", "ac3", "eac3", "alac"}
+
+def _startup_info():
+    if os.name == 'nt':
+        info = subprocess.STARTUPINFO()
+        info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return info
+    return None
+
+def job_key(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+def part_path(path: str) -> str:
+    """Temp name next to the final output (same extension, so ffmpeg still picks the muxer)."""
+    base, ext = os.path.splitext(path)
+    return f"{base}.part{ext}"
+
+def stream_signature(probe, path):
+    """What the concat demuxer needs to match for a stream copy, or None when the file is unreadable."""
+    info = probe.probe(path) or {}
+    video = [s for s in info.get("streams", []) if s.get("codec_type") == "video"]
+    if not video:
+        return None
+    v = video[0]
+    sar = v.get("sample_aspect_ratio") or "1:1"
+    audio = tuple((s.get("codec_name"), s.get("sample_rate"), s.get("channels")) for s in info.get("streams", []) if s.get("codec_type") == "audio")
+    return (v.get("codec_name"), v.get("width"), v.get("height"), v.get("pix_fmt"), v.get("r_frame_rate"), "1:1" if sar == "0:1" else sar, audio)
+
+def concat_copy_compatible(probe, paths, width=None, height=None, fps=None) -> bool:
+    """True when every clip has the same codecs/size/fps/audio layout (and matches the target, if given)."""
+    sigs = {stream_signature(probe, p) for p in paths}
+    if len(sigs) != 1 or None in sigs:
+        return False
+    codec, w, h, pix_fmt, rate, sar, audio = sigs.pop()
+    if codec not in MP4_COPY_CODECS or sar != "1:1" or any(a[0] not in MP4_COPY_CODECS for a in audio):
+        return False
+    if width and height and (w, h) != (width, height):
+        return False
+    return not fps or rate == f"{fps}/1"
+
+def mp4_copy_compatible(probe, path) -> bool:
+    """
+    False only when a video/audio stream has a codec mp4 cannot hold. Data/subtitle streams (e.g. the
+    tmcd timecode track of phone .mov files) are dropped by the copy (-dn -sn) instead of forcing an
+    encode, and a file ffprobe cannot read is copied as before.
+    """
+    streams = (probe.probe(path) or {}).get("streams", [])
+    return all(s.get("codec_name") in MP4_COPY_CODECS for s in streams
+               if s.get("codec_type") in ("video", "audio") and not (s.get("disposition") or {}).get("attached_pic"))
+
+def outputs_valid(probe, paths, expected_duration: float = None, tolerance: float = 0.02) -> bool:
+    """Every output readable with a video stream; with expected_duration their total must match it."""
+    total = 0.0
+    for p in paths:
+        if not os.path.exists(p) or probe.video_stream(p) is None:
+            return False
+        d = probe.duration(p)
+        if d <= 0:
+            return False
+        total += d
+    if expected_duration:
+        return abs(total - expected_duration) <= max(1.5, expected_duration * tolerance)
+    return bool(paths)
+
+class JobLedger:
+    """
+    Completed jobs of one output folder ({key: {"outputs": {name: size}, ...}} in LEDGER_NAME).
+    A job is recorded only after its outputs are in place and validated, so after an interruption
+    done() tells which work can be skipped; outputs that changed size since are redone.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.path = os.path.join(folder, LEDGER_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def done(self, key):
+        """Absolute output paths of a completed job whose files are unchanged, else None."""
+        with self._lock:
+            entry = self.entries.get(key)
+        if not entry:
+            return None
+        paths = []
+        for name, size in entry.get("outputs", {}).items():
+            p = os.path.join(self.folder, name)
+            try:
+                if os.path.getsize(p) != size:
+                    return None
+            except OSError:
+                return None
+            paths.append(p)
+        return paths or None
+
+    def get(self, key) -> dict:
+        with self._lock:
+            return dict(self.entries.get(key) or {})
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self.entries.items())
+
+    def mark(self, key, outputs, **meta):
+        entry = dict(meta, outputs={os.path.basename(p): os.path.getsize(p) for p in outputs}, finished_at=time.time())
+        with self._lock:
+            self.entries[key] = entry
+            tmp = f"{self.path}.{uuid.uuid4().hex[:6]}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+
+class MediaJobExecutor:
+    """
+    Process-wide runner for batch ffmpeg work (splitting, stitching, clip rendering).
+
+    - run_ffmpeg(): encodes take one of MEDIA_ENCODER_SLOTS slots and are limited to
+      -threads MEDIA_ENCODER_THREADS, so parallel encoders share the cores instead of fighting
+      over them; stream copies are disk-bound and take one of MEDIA_COPY_SLOTS slots instead.
+    - map(): runs a job function over many items in parallel and yields results as they finish,
+      so a module reports progress while the next jobs are already running.
+    """
+
+    def __init__(self, encoder_threads: int = MEDIA_ENCODER_THREADS, encoder_slots: int = MEDIA_ENCODER_SLOTS,
+                 copy_slots: int = MEDIA_COPY_SLOTS, logger=None):
+        self.encoder_threads = encoder_threads
+        self.encoder_slots = encoder_slots
+        self.copy_slots = copy_slots
+        self.logger = logger or logging.getLogger(__name__)
+        self._encode = threading.BoundedSemaphore(encoder_slots)
+        self._copy = threading.BoundedSemaphore(copy_slots)
+        self._ledgers = {}
+        self._lock = threading.Lock()
+        self.encodes = 0
+        self.copies = 0
+
+    def default_parallel(self) -> int:
+        # Slot membatasi proses ffmpeg; thread ekstra hanya menyiapkan job berikutnya (probe, list file).
+        return self.encoder_slots + self.copy_slots
+
+    def run_ffmpeg(self, cmd, encode: bool = True, **kwargs):
+        """cmd must end with the output path; -threads is inserted before it for encodes."""
+        if encode:
+            cmd = cmd[:-1] + ['-threads', str(self.encoder_threads), cmd[-1]]
+        kwargs.setdefault("startupinfo", _startup_info())
+        with self._encode if encode else self._copy:
+            with self._lock:
+                if encode: self.encodes += 1
+                else: self.copies += 1
+            return subprocess.run(cmd, **kwargs)
+
+    def map(self, fn, items, max_parallel: int = 0, thread_name_prefix: str = "media-job"):
+        """Yields (item, result, error) in completion order; pending jobs are cancelled if the caller stops early."""
+        items = list(items)
+        if not items:
+            return
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_parallel or self.default_parallel(), len(items))), thread_name_prefix=thread_name_prefix)
+        try:
+            futures = {pool.submit(fn, item): item for item in items}
+            for fut in as_completed(futures):
+                try:
+                    yield futures[fut], fut.result(), None
+                except Exception as e:
+                    yield futures[fut], None, e
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def ledger(self, folder: str) -> JobLedger:
+        """One ledger object per output folder, shared by every job writing there."""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            ledger = self._ledgers.get(folder)
+            if ledger is None:
+                ledger = self._ledgers[folder] = JobLedger(folder)
+            return ledger
+
+    def stats(self) -> dict:
+        return {"encoder_slots": self.encoder_slots, "encoder_threads": self.encoder_threads, "copy_slots": self.copy_slots,
+                "encodes": self.encodes, "copies": self.copies}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_media_jobs() -> MediaJobExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = MediaJobExecutor()
+        return _executor
@@ -0,0 +1,214 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\media_probe.py total lines 215 
+########################################################################
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+MEDIA_PROBE_WORKERS = int(os.getenv("MEDIA_PROBE_WORKERS", str(min(8, os.cpu_count() or 4))))
+MEDIA_PROBE_TIMEOUT = float(os.getenv("MEDIA_PROBE_TIMEOUT", "30"))
+MEDIA_EXTS = (".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v", ".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg")
+
+def _startup_info():
+    if os.name == 'nt':
+        info = subprocess.STARTUPINFO()
+        info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return info
+    return None
+
+def _file_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+class MediaProbeCache:
+    """
+    One `ffprobe -show_streams -show_format` JSON per media file, cached by (path, size, mtime) in
+    memory and in a SQLite index, so a file is probed once until it changes on disk - across jobs,
+    modules and restarts. prime() probes a whole folder/list in parallel before a job walks it.
+
+    Files ffprobe cannot read are cached as {} (same key) so a broken clip in a pool is not
+    re-spawned on every pass; a missing ffprobe binary is never cached.
+    """
+
+    def __init__(self, db_path: str, ffprobe_path: str = "ffprobe", logger=None):
+        self.db_path = db_path
+        self.ffprobe_path = ffprobe_path
+        self.logger = logger or logging.getLogger(__name__)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._mem = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.spawns = 0
+        self.hits = 0
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.db_path, timeout=10.0)
+            con.execute("PRAGMA journal_mode=WAL;")
+            con.execute("PRAGMA synchronous=NORMAL;")
+            con.execute("CREATE TABLE IF NOT EXISTS probes (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, info TEXT NOT NULL, probed_at REAL NOT NULL)")
+            self._local.con = con
+        return con
+
+    def _run_ffprobe(self, path):
+        cmd = [self.ffprobe_path, "-v", "error", "-print_format", "json", "-show_streams", "-show_format", path]
+        self.spawns += 1
+        res = subprocess.run(cmd, capture_output=True, text=True, timeout=MEDIA_PROBE_TIMEOUT, startupinfo=_startup_info())
+        if res.returncode != 0:
+            return {}
+        try:
+            return json.loads(res.stdout or "{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def _lookup(self, paths_keys) -> dict:
+        """Memory first, then one SQLite query per 500 paths. Returns {path: info} for fresh entries only."""
+        found, misses = {}, []
+        with self._lock:
+            for path, key in paths_keys.items():
+                cached = self._mem.get(path)
+                if cached and cached[0] == key:
+                    found[path] = cached[1]
+                else:
+                    misses.append(path)
+        con = self._conn()
+        for i in range(0, len(misses), 500):
+            chunk = misses[i:i + 500]
+            rows = con.execute(f"SELECT path, size, mtime_ns, info FROM probes WHERE path IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            for path, size, mtime_ns, info in rows:
+                if paths_keys[path] == (size, mtime_ns):
+                    found[path] = json.loads(info)
+                    with self._lock:
+                        self._mem[path] = ((size, mtime_ns), found[path])
+        self.hits += len(found)
+        return found
+
+    def _store(self, results):
+        # results: [(path, key, info), ...]
+        if not results:
+            return
+        with self._lock:
+            for path, key, info in results:
+                self._mem[path] = (key, info)
+        con = self._conn()
+        now = time.time()
+        con.executemany(
+            "INSERT OR REPLACE INTO probes(path, size, mtime_ns, info, probed_at) VALUES(?,?,?,?,?)",
+            [(path, key[0], key[1], json.dumps(info), now) for path, key, info in results]
+        )
+        con.commit()
+
+    def probe(self, path):
+        """Parsed ffprobe JSON ({'streams': [...], 'format': {...}}), {} if unreadable, None if the file is missing."""
+        path = os.path.abspath(path)
+        key = _file_key(path)
+        if key is None:
+            return None
+        found = self._lookup({path: key})
+        if path in found:
+            return found[path]
+        try:
+            info = self._run_ffprobe(path)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.logger.warning(f"[MediaProbe] ffprobe failed for {path}: {e}")
+            return {}
+        self._store([(path, key, info)])
+        return info
+
+    def prime(self, paths, workers: int = None, exts=MEDIA_EXTS) -> dict:
+        """
+        Probes every media file under `paths` (a folder, or a list of files/folders) in parallel and
+        returns {abspath: info}. Files already in the index cost one stat and a batched lookup.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        files = []
+        for p in paths:
+            if os.path.isdir(p):
+                files.extend(os.path.join(p, f) for f in os.listdir(p) if f.lower().endswith(exts))
+            else:
+                files.append(p)
+        paths_keys = {}
+        for f in files:
+            f = os.path.abspath(f)
+            key = _file_key(f)
+            if key is not None:
+                paths_keys[f] = key
+        found = self._lookup(paths_keys)
+        todo = [p for p in paths_keys if p not in found]
+        if not todo:
+            return found
+
+        def run(path):
+            try:
+                return path, paths_keys[path], self._run_ffprobe(path)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                self.logger.warning(f"[MediaProbe] ffprobe failed for {path}: {e}")
+                return path, paths_keys[path], None
+
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or MEDIA_PROBE_WORKERS, len(todo))), thread_name_prefix="media-probe") as pool:
+            results = list(pool.map(run, todo))
+        stored = [r for r in results if r[2] is not None]
+        self._store(stored)
+        found.update((path, info) for path, _, info in stored)
+        self.logger.info(f"[MediaProbe] Probed {len(todo)} new file(s) in {time.time() - started:.1f}s ({len(found) - len(stored)} cached)")
+        return found
+
+    def duration(self, path, default: float = 0.0) -> float:
+        info = self.probe(path) or {}
+        try:
+            return float(info["format"]["duration"])
+        except (KeyError, TypeError, ValueError):
+            pass
+        # Beberapa container (mis. webm hasil stream-copy) tidak punya durasi format; pakai stream terpanjang.
+        durations = []
+        for s in info.get("streams", []):
+            try:
+                durations.append(float(s["duration"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return max(durations) if durations else default
+
+    def streams(self, path, codec_type: str = None) -> list:
+        streams = (self.probe(path) or {}).get("streams", [])
+        return [s for s in streams if codec_type is None or s.get("codec_type") == codec_type]
+
+    def has_audio(self, path) -> bool:
+        return bool(self.streams(path, "audio"))
+
+    def video_stream(self, path):
+        video = self.streams(path, "video")
+        return video[0] if video else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries_in_memory": len(self._mem), "ffprobe_spawns": self.spawns, "cache_hits": self.hits}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+def get_media_probe(ffprobe_path: str = None, data_path: str = None) -> MediaProbeCache:
+    """
+    Process-wide probe cache shared by every module. The index lives in <data_path>/media_probe/
+    (or MEDIA_PROBE_DB). The first caller that knows a concrete ffprobe binary sets it.
+    """
+    db_path = os.getenv("MEDIA_PROBE_DB") or os.path.join(data_path or os.path.join(os.path.expanduser("~"), ".flowork"), "media_probe", "probe_index.db")
+    with _instances_lock:
+        cache = _instances.get(db_path)
+        if cache is None:
+            cache = _instances[db_path] = MediaProbeCache(db_path, ffprobe_path or "ffprobe")
+        elif ffprobe_path and cache.ffprobe_path == "ffprobe":
+            cache.ffprobe_path = ffprobe_path
+        return cache
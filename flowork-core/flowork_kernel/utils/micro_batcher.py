@@ -0,0 +1,151 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\micro_batcher.py total lines 152 
+########################################################################
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+BATCH_WINDOW_MS = float(os.getenv("AI_BATCH_WINDOW_MS", "5"))
+BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "32"))
+BATCH_SUBMIT_TIMEOUT = float(os.getenv("AI_BATCH_SUBMIT_TIMEOUT", "120"))
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submit() calls that arrive within window_ms into one batch_fn(items) call
+    (at most max_batch items) and fans the results back out to the waiting callers.
+    batch_fn must return one result per item, in order; an exception fails the whole batch.
+
+    Only embedding-style work is batched (SemanticSearchService query embeddings). Local text generation
+    through query_ai_by_task is deliberately not: llama.cpp has no multi-sequence chat call here, so a
+    "batch" would just run prompts back to back on one worker and make short prompts wait behind long ones.
+    """
+
+    def __init__(self, batch_fn, max_batch: int = BATCH_MAX_SIZE, window_ms: float = BATCH_WINDOW_MS, name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        self.name = name
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name=f"microbatch-{self.name}", daemon=True)
+            self._thread.start()
+
+    def submit_async(self, item) -> Future:
+        fut = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"MicroBatcher '{self.name}' is closed")
+            self._pending.append((item, fut))
+            self._ensure_thread()
+            self._cond.notify()
+        return fut
+
+    def submit(self, item, timeout: float = BATCH_SUBMIT_TIMEOUT):
+        fut = self.submit_async(item)
+        try:
+            return fut.result(timeout=timeout)
+        except FuturesTimeout:
+            # Item yang belum diambil batch dibatalkan supaya tidak dihitung lagi untuk pemanggil yang sudah pergi.
+            fut.cancel()
+            raise
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # Jendela dimulai saat item pertama datang; lepas lebih awal kalau batch sudah penuh.
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+
+    def _loop(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+                for (_, fut), res in zip(batch, results):
+                    fut.set_result(res)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+            self.batches += 1
+            self.items += len(items)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items, "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0}
+
+def _bench(encode_one, encode_many, texts, clients, window_ms, max_batch):
+    started = time.time()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(encode_one, texts))
+    unbatched = time.time() - started
+    batcher = MicroBatcher(encode_many, max_batch=max_batch, window_ms=window_ms, name="bench")
+    started = time.time()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(batcher.submit, texts))
+    batched = time.time() - started
+    batcher.close()
+    return {
+        "requests": len(texts), "clients": clients,
+        "unbatched_rps": round(len(texts) / unbatched, 1), "batched_rps": round(len(texts) / batched, 1),
+        "speedup": round(unbatched / batched, 2), **batcher.stats(),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput of per-request vs micro-batched SentenceTransformer.encode.")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=BATCH_MAX_SIZE)
+    args = parser.parse_args(argv)
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model, device="cpu")
+    lock = threading.Lock()
+    def encode_one(text):
+        with lock:
+            return model.encode(text)
+    def encode_many(texts):
+        with lock:
+            return list(model.encode(texts, batch_size=len(texts)))
+    texts = [f"Node {i}: download a file, resize the image and post it to channel #{i % 17}" for i in range(args.requests)]
+    encode_many(texts[:8])
+    print(json.dumps(_bench(encode_one, encode_many, texts, args.clients, args.window_ms, args.max_batch), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\transcript_cache.py total lines 179 
+########################################################################
+
+import os
+import json
+import uuid
+import bisect
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+TRANSCRIPT_WORKERS = int(os.getenv("TRANSCRIPT_WORKERS", "2"))
+SPAN_MERGE_GAP = 2.0
+HASH_SAMPLE_BYTES = 4 * 1024 * 1024
+
+def _startup_info():
+    if os.name == 'nt':
+        info = subprocess.STARTUPINFO()
+        info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return info
+    return None
+
+def source_hash(path: str) -> str:
+    """
+    Content hash of a media file: size + head/middle/tail samples. Reading a multi-GB video in full
+    would cost more than the transcription it saves; re-encodes and edits change these samples.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(0, size // 2 - HASH_SAMPLE_BYTES // 2), max(0, size - HASH_SAMPLE_BYTES)}):
+            f.seek(offset)
+            h.update(f.read(HASH_SAMPLE_BYTES))
+    return h.hexdigest()
+
+def merge_spans(spans, gap: float = SPAN_MERGE_GAP) -> list:
+    merged = []
+    for a, b in sorted((float(a), float(b)) for a, b in spans if b > a):
+        if merged and a <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], b)
+        else:
+            merged.append([a, b])
+    return [tuple(s) for s in merged]
+
+def subtract_spans(spans, covered) -> list:
+    """Parts of `spans` not inside `covered` (both lists of (start, end), covered already merged)."""
+    missing = []
+    for a, b in spans:
+        cur = a
+        for ca, cb in covered:
+            if cb <= cur or ca >= b:
+                continue
+            if ca > cur:
+                missing.append((cur, ca))
+            cur = max(cur, cb)
+            if cur >= b:
+                break
+        if cur < b:
+            missing.append((cur, b))
+    return [s for s in missing if s[1] - s[0] > 0.05]
+
+class Transcript:
+    """Word-level transcript of one source (absolute source seconds); callers slice it instead of re-transcribing."""
+
+    def __init__(self, words=None, covered=None):
+        self.words = sorted((float(s), float(e), w) for s, e, w in (words or []))
+        self.covered = merge_spans(covered or [], gap=0.0)
+        self._starts = [w[0] for w in self.words]
+
+    def covers(self, start, end) -> bool:
+        return not subtract_spans([(start, end)], self.covered)
+
+    def words_between(self, start, end) -> list:
+        """Words that start inside [start, end), as (start, end, text)."""
+        lo = bisect.bisect_left(self._starts, start)
+        hi = bisect.bisect_left(self._starts, end)
+        return self.words[lo:hi]
+
+    def add(self, words, span):
+        # Kata di luar span yang baru ditranskrip dibuang: tepi span bisa memotong kata jadi setengah.
+        a, b = span
+        self.words = [w for w in self.words if not (a <= w[0] < b)]
+        self.words.extend(w for w in words if a <= w[0] < b)
+        self.words.sort()
+        self._starts = [w[0] for w in self.words]
+        self.covered = merge_spans(self.covered + [span], gap=0.0)
+
+    def to_dict(self) -> dict:
+        return {"words": [list(w) for w in self.words], "covered": [list(c) for c in self.covered]}
+
+class TranscriptCache:
+    """
+    Word-timestamp transcripts cached per source content hash + model, on disk as JSON.
+
+    ensure() transcribes only the parts of the requested spans that are not cached yet: nearby spans
+    are merged into one pass, separate spans run in parallel (TRANSCRIPT_WORKERS), and a later run
+    with other timestamps on the same video reuses everything already transcribed.
+
+    transcribe_fn(audio_path) -> iterable of (start, end, word) relative to the audio file.
+    """
+
+    def __init__(self, cache_dir: str, ffmpeg_path: str = "ffmpeg", logger=None):
+        self.cache_dir = cache_dir
+        self.ffmpeg_path = ffmpeg_path
+        self.logger = logger or logging.getLogger(__name__)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _key_lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _load(self, key) -> Transcript:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return Transcript(data.get("words"), data.get("covered"))
+        except (OSError, ValueError):
+            return Transcript()
+
+    def _save(self, key, transcript):
+        path = self._path(key)
+        tmp = f"{path}.{uuid.uuid4().hex[:6]}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(transcript.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _extract_audio(self, source, start, end, out_path):
+        cmd = [self.ffmpeg_path, "-y", "-v", "error", "-ss", f"{start:.3f}", "-i", source, "-t", f"{end - start:.3f}",
+               "-vn", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", out_path]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, startupinfo=_startup_info())
+
+    def _transcribe_span(self, source, span, transcribe_fn):
+        a, b = span
+        audio = os.path.join(tempfile.gettempdir(), f"flowork_tr_{uuid.uuid4().hex}.wav")
+        try:
+            self._extract_audio(source, a, b, audio)
+            return [(a + float(s), a + float(e), str(w).strip()) for s, e, w in transcribe_fn(audio) if str(w).strip()]
+        finally:
+            if os.path.exists(audio):
+                os.remove(audio)
+
+    def ensure(self, source, spans, transcribe_fn, model_tag: str = "", workers: int = None) -> Transcript:
+        key = hashlib.sha1(f"{source_hash(source)}|{model_tag}".encode()).hexdigest()
+        with self._key_lock(key):
+            transcript = self._load(key)
+            missing = subtract_spans(merge_spans(spans), transcript.covered)
+            if not missing:
+                return transcript
+            self.logger.info(f"[TranscriptCache] Transcribing {len(missing)} span(s), {sum(b - a for a, b in missing):.0f}s of {os.path.basename(source)}")
+            with ThreadPoolExecutor(max_workers=max(1, min(workers or TRANSCRIPT_WORKERS, len(missing))), thread_name_prefix="transcribe") as pool:
+                results = list(pool.map(lambda s: (s, self._transcribe_span(source, s, transcribe_fn)), missing))
+            for span, words in results:
+                transcript.add(words, span)
+            self._save(key, transcript)
+            return transcript
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+def get_transcript_cache(data_path: str = None, ffmpeg_path: str = None) -> TranscriptCache:
+    cache_dir = os.path.join(data_path or os.path.join(os.path.expanduser("~"), ".flowork"), "transcripts")
+    with _instances_lock:
+        cache = _instances.get(cache_dir)
+        if cache is None:
+            cache = _instances[cache_dir] = TranscriptCache(cache_dir, ffmpeg_path or "ffmpeg")
+        elif ffmpeg_path and cache.ffmpeg_path == "ffmpeg":
+            cache.ffmpeg_path = ffmpeg_path
+        return cache
@@ -0,0 +1,216 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\whisper_pool.py total lines 217 
+########################################################################
+
+import os
+import gc
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    WhisperModel = None
+    FASTER_WHISPER_AVAILABLE = False
+
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", str(max(1, (os.cpu_count() or 4) // 2))))
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "2"))
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "0"))
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "0"))
+WHISPER_IDLE_SECONDS = float(os.getenv("WHISPER_IDLE_SECONDS", "600"))
+
+# Perkiraan RAM per ukuran model (int8, MB). Cukup untuk akuntansi budget.
+MODEL_MB = {"tiny": 80, "base": 150, "small": 500, "medium": 1500, "large": 3100, "large-v1": 3100, "large-v2": 3100, "large-v3": 3100, "turbo": 1700}
+
+def estimate_whisper_bytes(size: str) -> int:
+    name = str(size).split("/")[-1].replace("distil-", "").replace(".en", "")
+    return MODEL_MB.get(name, 1500) * 1024 * 1024
+
+class PooledWhisper:
+    """One loaded model. transcribe() goes through the model's request queue and returns (list(segments), info)."""
+
+    def __init__(self, pool, key):
+        self.pool = pool
+        self.key = key
+        self.model = None
+        self.batched = None
+        self.refs = 0
+        self.est_bytes = estimate_whisper_bytes(key[0])
+        self.last_used = time.time()
+        self.load_lock = threading.Lock()
+        self.queue = ThreadPoolExecutor(max_workers=max(1, pool.num_workers), thread_name_prefix=f"whisper-{key[0]}")
+        self.inflight = {}
+
+    def transcribe(self, audio_path, **options):
+        return self.pool._submit(self, audio_path, options).result()
+
+class WhisperPool:
+    """
+    Process-wide faster-whisper models shared by every media module.
+
+    - Loading is refcounted: lease() pins a model for the duration of a job; unpinned models stay
+      warm for WHISPER_IDLE_SECONDS and are the first to go when the memory budget is needed.
+    - The budget is WHISPER_MEMORY_BUDGET_MB, or the kernel-wide model residency manager when
+      attached (then Whisper competes in the same LRU as GGUF/diffusers models).
+    - Each model has a request queue with num_workers slots, matching the CTranslate2 workers so
+      concurrent jobs queue instead of oversubscribing the CPU. Identical concurrent requests (same
+      file, same options) are coalesced, and with WHISPER_BATCH_SIZE > 0 the 30s windows of one
+      file are decoded in batches (BatchedInferencePipeline).
+    """
+
+    def __init__(self, cpu_threads: int = WHISPER_CPU_THREADS, num_workers: int = WHISPER_NUM_WORKERS,
+                 budget_bytes: int = WHISPER_MEMORY_BUDGET_MB * 1024 * 1024, batch_size: int = WHISPER_BATCH_SIZE, logger=None):
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.budget = budget_bytes
+        self.batch_size = batch_size
+        self.logger = logger or logging.getLogger(__name__)
+        self.residency = None
+        self._models = {}
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.coalesced = 0
+
+    def attach_residency(self, residency):
+        with self._lock:
+            if self.residency is not None or residency is None:
+                return
+            self.residency = residency
+        residency.register_tenant("whisper", self.resident_bytes, self.idle_candidates)
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(m.est_bytes for m in self._models.values() if m.model is not None)
+
+    def idle_candidates(self) -> list:
+        with self._lock:
+            return [(m.last_used, m.est_bytes, m.key[0], lambda k=m.key: self._unload(k, "budget"))
+                    for m in self._models.values() if m.model is not None and not m.refs]
+
+    def _unload(self, key, reason) -> bool:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None or entry.model is None or entry.refs:
+                return False
+            entry.model = entry.batched = None
+        gc.collect()
+        self.logger.info(f"[WhisperPool] Unloaded {key[0]} ({reason})")
+        return True
+
+    def _make_room(self, entry):
+        if self.residency is not None:
+            self.residency.make_room(entry.est_bytes)
+            return
+        if not self.budget:
+            return
+        for last_used, size, _, evict in sorted(self.idle_candidates(), key=lambda c: c[0]):
+            if self.resident_bytes() + entry.est_bytes <= self.budget:
+                break
+            evict()
+
+    def unload_idle(self, max_idle: float = WHISPER_IDLE_SECONDS) -> int:
+        now = time.time()
+        return sum(1 for last_used, _, _, evict in self.idle_candidates() if now - last_used >= max_idle and evict())
+
+    def _load(self, entry):
+        with entry.load_lock:
+            if entry.model is not None:
+                return
+            if not FASTER_WHISPER_AVAILABLE:
+                raise RuntimeError("faster-whisper library not installed. Please run 'pip install faster-whisper'")
+            self._make_room(entry)
+            size, device, compute_type = entry.key
+            started = time.time()
+            model = WhisperModel(size, device=device, compute_type=compute_type, cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+            entry.batched = BatchedInferencePipeline(model=model) if self.batch_size > 0 and BatchedInferencePipeline is not None else None
+            entry.model = model
+            self.loads += 1
+            self.logger.info(f"[WhisperPool] Loaded {size} on {device}/{compute_type} in {time.time() - started:.1f}s (~{entry.est_bytes >> 20}MB)")
+
+    @contextmanager
+    def lease(self, size: str = "base", device: str = "cpu", compute_type: str = "int8"):
+        """Yields a loaded PooledWhisper, pinned (never evicted) until the block exits."""
+        self.unload_idle()
+        key = (size, device, compute_type)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                entry = self._models[key] = PooledWhisper(self, key)
+            entry.refs += 1
+        try:
+            self._load(entry)
+            yield entry
+        finally:
+            with self._lock:
+                entry.refs -= 1
+                entry.last_used = time.time()
+
+    def transcribe(self, audio_path, size: str = "base", device: str = "cpu", compute_type: str = "int8", **options):
+        with self.lease(size, device, compute_type) as model:
+            return model.transcribe(audio_path, **options)
+
+    def _run(self, entry, audio_path, options):
+        if entry.batched is not None and "batch_size" not in options:
+            segments, info = entry.batched.transcribe(audio_path, batch_size=self.batch_size, **options)
+        else:
+            segments, info = entry.model.transcribe(audio_path, **options)
+        # Segment dikonsumsi di worker antrean, supaya decoding benar-benar terjadi di slot ini.
+        result = (list(segments), info)
+        entry.last_used = time.time()
+        return result
+
+    def _submit(self, entry, audio_path, options) -> Future:
+        try:
+            stamp = os.stat(audio_path).st_mtime_ns
+        except OSError:
+            stamp = None
+        req_key = (os.path.abspath(audio_path), stamp, repr(sorted(options.items())))
+        with self._lock:
+            fut = entry.inflight.get(req_key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut
+            fut = entry.queue.submit(self._run, entry, audio_path, options)
+            entry.inflight[req_key] = fut
+        fut.add_done_callback(lambda _: self._forget(entry, req_key))
+        return fut
+
+    def _forget(self, entry, req_key):
+        with self._lock:
+            entry.inflight.pop(req_key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cpu_threads": self.cpu_threads, "num_workers": self.num_workers, "loads": self.loads, "coalesced": self.coalesced,
+                "resident_mb": self.resident_bytes() >> 20,
+                "models": [{"size": m.key[0], "device": m.key[1], "compute_type": m.key[2], "refs": m.refs,
+                            "idle_seconds": round(time.time() - m.last_used, 1)} for m in self._models.values() if m.model is not None],
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_whisper_pool(kernel=None) -> WhisperPool:
+    """The process-wide pool; with a kernel it joins the AI provider's model memory budget."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WhisperPool()
+    if kernel is not None and _pool.residency is None:
+        try:
+            ai_manager = kernel.get_service("ai_provider_manager_service")
+            _pool.attach_residency(getattr(ai_manager, "model_residency", None))
+        except Exception:
+            pass
+    return _pool
@@ -0,0 +1,130 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\gguf_server.py total lines 131 
+########################################################################
+
+"""
+Resident llama.cpp worker. Loads one GGUF model once, then serves framed requests on stdin/stdout
+until told to shut down or the pipe closes.
+
+Frame: 4-byte big-endian length + UTF-8 JSON.
+Requests : {"id", "op": "generate", "messages": [...], "stream": bool, "params": {...}}
+           | {"op": "ping"} | {"op": "shutdown"}
+Responses: {"type": "ready"} once after load, then per request {"id", "type": "token"|"done"|"error", ...}
+"""
+
+import sys
+import os
+import json
+import time
+import struct
+import argparse
+import traceback
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+PROMPT_CACHE_MB = int(os.getenv("AI_GGUF_PROMPT_CACHE_MB", "512"))
+
+def write_frame(stream, obj):
+    data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    stream.write(_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+def _read_exact(stream, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = stream.read(n - len(buf))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+def read_frame(stream):
+    header = _read_exact(stream, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame too large: {length} bytes")
+    body = _read_exact(stream, length)
+    if body is None:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+def force_print(msg):
+    print(f"[{time.strftime('%X')}] {msg}", file=sys.stderr, flush=True)
+
+GENERATION_KEYS = ("temperature", "top_p", "top_k", "max_tokens", "stop", "seed", "repeat_penalty")
+
+def _generate(llm, out, req):
+    req_id = req.get("id")
+    messages = req.get("messages") or [{"role": "user", "content": req.get("prompt", "")}]
+    params = {k: v for k, v in (req.get("params") or {}).items() if k in GENERATION_KEYS}
+    stream = bool(req.get("stream"))
+    started = time.time()
+    if not stream:
+        res = llm.create_chat_completion(messages=messages, stream=False, **params)
+        content = res["choices"][0]["message"].get("content") or ""
+        write_frame(out, {"id": req_id, "type": "done", "content": content, "usage": res.get("usage"), "seconds": round(time.time() - started, 3)})
+        return
+    for chunk in llm.create_chat_completion(messages=messages, stream=True, **params):
+        delta = chunk["choices"][0]["delta"]
+        if delta.get("content"):
+            write_frame(out, {"id": req_id, "type": "token", "content": delta["content"]})
+    write_frame(out, {"id": req_id, "type": "done", "seconds": round(time.time() - started, 3)})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident GGUF inference worker.")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--n-ctx", type=int, default=4096)
+    parser.add_argument("--gpu-layers", type=int, default=-1)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # stdout dipakai khusus untuk frame; semua print/log lain (termasuk llama.cpp) dialihkan ke stderr.
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    inp = sys.stdin.buffer
+
+    try:
+        from llama_cpp import Llama
+        started = time.time()
+        llm_kwargs = {"model_path": args.model, "n_ctx": args.n_ctx, "n_gpu_layers": args.gpu_layers, "verbose": False}
+        if args.threads > 0:
+            llm_kwargs["n_threads"] = args.threads
+        llm = Llama(**llm_kwargs)
+        if PROMPT_CACHE_MB > 0:
+            # Agent loop & chat mengirim prefix prompt yang sama tiap giliran; KV state-nya disimpan dan dipakai ulang.
+            try:
+                from llama_cpp import LlamaRAMCache
+                llm.set_cache(LlamaRAMCache(capacity_bytes=PROMPT_CACHE_MB << 20))
+            except Exception as e:
+                force_print(f"[GGUF Server] Prompt cache disabled: {e}")
+        force_print(f"[GGUF Server] Loaded {os.path.basename(args.model)} in {time.time() - started:.1f}s (pid {os.getpid()})")
+        write_frame(out, {"type": "ready", "pid": os.getpid(), "load_seconds": round(time.time() - started, 3)})
+    except Exception as e:
+        force_print(f"[GGUF Server] Load failed: {e}")
+        write_frame(out, {"type": "error", "content": f"Model load failed: {e}"})
+        return 1
+
+    while True:
+        try:
+            req = read_frame(inp)
+        except Exception as e:
+            force_print(f"[GGUF Server] Bad frame: {e}")
+            return 1
+        if req is None or req.get("op") == "shutdown":
+            return 0
+        if req.get("op") == "ping":
+            write_frame(out, {"id": req.get("id"), "type": "done", "content": "pong"})
+            continue
+        try:
+            _generate(llm, out, req)
+        except BrokenPipeError:
+            return 0
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            write_frame(out, {"id": req.get("id"), "type": "error", "content": str(e)})
+
+if __name__ == "__main__":
+    sys.exit(main())
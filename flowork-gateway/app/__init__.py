@@ -82,7 +82,7 @@ def create_app(config_class=Config):
         allowed_origins.extend(extra_origins)
 
 
-    CORS(app, origins=allowed_origins, supports_credentials=True)
+    CORS(app, origins=allowed_origins, supports_credentials=True, expose_headers=["X-Session-Token", "X-Session-Token-Expires"])
 
     gateway_db.init_app(app)
     migrate.init_app(app, gateway_db)
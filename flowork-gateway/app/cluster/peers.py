@@ -1,27 +1,35 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\cluster\peers.py total lines 98 
+# File NAME : C:\FLOWORK\flowork-gateway\app\cluster\peers.py total lines 197 
 ########################################################################
 
 import os
+import math
 import time
+import threading
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 from urllib.parse import urlparse
 import requests
-try:
-    from eventlet import spawn_n, sleep
-    _HAVE_EVENTLET = True
-except Exception:
-    _HAVE_EVENTLET = False
 log = logging.getLogger(__name__)
 SELF_ID = os.getenv("GATEWAY_ID", "gw-0")
 SELF_URL = os.getenv("GATEWAY_URL", "http://localhost:8000")
 _RAW = os.getenv("GATEWAY_PEERS", "").strip()
+_RAW_WEIGHTS = os.getenv("GATEWAY_PEER_WEIGHTS", "").strip()
 _PING_PATH = os.getenv("PEER_PING_PATH", "/").strip() or "/"
 _PING_INTERVAL = int(os.getenv("PEER_PING_INTERVAL", "5"))
+_PING_TIMEOUT = float(os.getenv("PEER_PING_TIMEOUT", "1.0"))
+_PHI_THRESHOLD = float(os.getenv("PEER_PHI_THRESHOLD", "8.0"))
+_FAIL_THRESHOLD = int(os.getenv("PEER_FAIL_THRESHOLD", "3"))
+_MAX_BACKOFF = float(os.getenv("PEER_MAX_BACKOFF", "60"))
+_RTT_ALPHA = 0.2
 _peer_map: Dict[str, str] = {}
 _peer_state: Dict[str, dict] = {}
+_peer_weights: Dict[str, float] = {}
+_state_lock = threading.Lock()
+_prober_started = False
 def _parse_peers(raw: str) -> Dict[str, str]:
     m: Dict[str, str] = {}
     if not raw:
@@ -39,13 +47,26 @@ def _parse_peers(raw: str) -> Dict[str, str]:
             pid = host.replace(".", "-")
             m[pid] = url
     return m
+def _parse_weights(raw: str) -> Dict[str, float]:
+    m: Dict[str, float] = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        pid, w = item.split("=", 1)
+        try:
+            m[pid.strip()] = max(0.0, float(w))
+        except ValueError:
+            log.warning(f"[peers] ignoring invalid weight for {pid.strip()}: {w!r}")
+    return m
 def _init_peers():
-    global _peer_map
+    global _peer_map, _peer_weights
     _peer_map = _parse_peers(_RAW)
+    _peer_weights = _parse_weights(_RAW_WEIGHTS)
     if SELF_ID not in _peer_map:
         _peer_map[SELF_ID] = SELF_URL
     for pid, url in _peer_map.items():
-        _peer_state[pid] = {"up": True, "rtt": 0.0, "ts": int(time.time()), "url": url}
+        _peer_state[pid] = {"up": True, "rtt": 0.0, "rtt_ewma": 0.0, "phi": 0.0, "fails": 0,
+                            "ts": int(time.time()), "next_probe": 0.0, "url": url}
 def get_peer_map() -> Dict[str, str]:
 
     return dict(_peer_map)
@@ -55,43 +76,121 @@ def get_candidate_ids() -> List[str]:
 def get_all_up_candidates() -> List[str]:
 
     return [pid for pid, st in _peer_state.items() if st.get("up")]
+def get_peer_weights() -> Dict[str, float]:
+
+    return {pid: _peer_weights.get(pid, 1.0) for pid in _peer_map}
 def get_url_for(peer_id: str) -> str:
 
     return _peer_map.get(peer_id, "")
 def peers_state() -> Dict[str, dict]:
 
-    return {k: dict(v) for k, v in _peer_state.items()}
+    with _state_lock:
+        return {k: dict(v) for k, v in _peer_state.items()}
+class PhiAccrualDetector:
+    """
+    Phi accrual failure detector over the intervals between successful probes
+    (Hayashibara et al.). phi = -log10(P(no success for this long)).
+    """
+    def __init__(self, window: int = 100, min_std: float = 0.5, first_interval: float = _PING_INTERVAL):
+        self.intervals = deque(maxlen=window)
+        self.min_std = min_std
+        self.first_interval = first_interval
+        self.last_ok = None
+    def heartbeat(self, now: float):
+        if self.last_ok is not None:
+            self.intervals.append(now - self.last_ok)
+        self.last_ok = now
+    def phi(self, now: float) -> float:
+        if self.last_ok is None:
+            return 0.0
+        if self.intervals:
+            mean = sum(self.intervals) / len(self.intervals)
+            var = sum((x - mean) ** 2 for x in self.intervals) / len(self.intervals)
+        else:
+            mean, var = self.first_interval, (self.first_interval / 4) ** 2
+        std = max(math.sqrt(var), self.min_std)
+        y = (now - self.last_ok - mean) / std
+        p_later = 0.5 * math.erfc(y / math.sqrt(2))
+        return -math.log10(max(p_later, 1e-300))
+_detectors: Dict[str, PhiAccrualDetector] = {}
 def _ping_once(url: str, timeout: float = 1.0) -> Tuple[bool, float]:
     start = time.time()
     try:
         r = requests.head(url + _PING_PATH, timeout=timeout)
-        if r.status_code >= 500:
-            return False, (time.time() - start)
-        return True, (time.time() - start)
+        if r.status_code == 405:
+            r = requests.get(url + _PING_PATH, timeout=timeout)
+        return (r.status_code < 500), (time.time() - start)
     except Exception:
+        return False, (time.time() - start)
+def _apply_probe(pid: str, url: str, ok: bool, rtt: float, now: float) -> bool:
+    det = _detectors.setdefault(pid, PhiAccrualDetector())
+    with _state_lock:
+        st = _peer_state[pid]
+        was_up = st["up"]
+        if ok:
+            det.heartbeat(now)
+            st["fails"] = 0
+            st["rtt"] = rtt
+            st["rtt_ewma"] = rtt if not st["rtt_ewma"] else (1 - _RTT_ALPHA) * st["rtt_ewma"] + _RTT_ALPHA * rtt
+            st["up"] = True
+            st["next_probe"] = now + _PING_INTERVAL
+        else:
+            st["fails"] += 1
+            phi = det.phi(now)
+            if phi >= _PHI_THRESHOLD or st["fails"] >= _FAIL_THRESHOLD:
+                st["up"] = False
+            # dead peers are probed less often: interval * 2^(fails-1), capped
+            st["next_probe"] = now + min(_MAX_BACKOFF, _PING_INTERVAL * (2 ** (st["fails"] - 1)))
+        st["phi"] = round(det.phi(now), 3)
+        st["ts"] = int(now)
+        st["url"] = url
+        changed = st["up"] != was_up
+    if changed:
+        log.warning(f"[peers] {pid} state changed -> {'UP' if ok else 'DOWN'} (phi={_peer_state[pid]['phi']}, fails={_peer_state[pid]['fails']})")
+    return changed
+def _publish_membership():
+    try:
+        from .sticky import set_live_members
+        weights = get_peer_weights()
+        set_live_members({pid: weights.get(pid, 1.0) for pid in get_all_up_candidates()})
+    except Exception as e:
+        log.warning(f"[peers] failed to publish membership to sticky ring: {e}")
+def probe_due_peers(pool: ThreadPoolExecutor, now: float = None) -> int:
+
+    now = now or time.time()
+    with _state_lock:
+        due = [(pid, url) for pid, url in _peer_map.items()
+               if pid != SELF_ID and _peer_state[pid]["next_probe"] <= now]
+    if not due:
+        return 0
+    futures = {pid: (url, pool.submit(_ping_once, url, _PING_TIMEOUT)) for pid, url in due}
+    changed = False
+    for pid, (url, fut) in futures.items():
         try:
-            r = requests.get(url + _PING_PATH, timeout=timeout)
-            return (r.status_code < 500), (time.time() - start)
+            ok, rtt = fut.result(timeout=_PING_TIMEOUT * 3)
         except Exception:
-            return False, (time.time() - start)
+            ok, rtt = False, _PING_TIMEOUT
+        changed = _apply_probe(pid, url, ok, rtt, time.time()) or changed
+    if changed:
+        _publish_membership()
+    return len(due)
 def _health_loop(interval: float):
+    pool = ThreadPoolExecutor(max_workers=min(32, max(1, len(_peer_map))), thread_name_prefix="peer-probe")
+    tick = max(0.5, interval / 5)
     while True:
         try:
-            for pid, url in list(_peer_map.items()):
-                up, rtt = _ping_once(url, timeout=1.0)
-                was_up = _peer_state[pid]["up"]
-                _peer_state[pid].update({"up": up, "rtt": rtt, "ts": int(time.time()), "url": url})
-                if up != was_up:
-                    log.warning(f"[peers] {pid} state changed -> {'UP' if up else 'DOWN'}")
+            probe_due_peers(pool)
         except Exception as e:
             log.warning(f"[peers] health loop error: {e}")
-        finally:
-            if _HAVE_EVENTLET:
-                sleep(interval)
-            else:
-                break
+        time.sleep(tick)
+def start_health_prober():
+
+    global _prober_started
+    with _state_lock:
+        if _prober_started or len(_peer_map) <= 1:
+            return
+        _prober_started = True
+    threading.Thread(target=_health_loop, args=(_PING_INTERVAL,), daemon=True, name="peer-health").start()
 _init_peers()
-if _HAVE_EVENTLET:
-    spawn_n(_health_loop, _PING_INTERVAL)
-else:
-    pass
+_publish_membership()
+start_health_prober()
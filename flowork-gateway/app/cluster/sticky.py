@@ -1,27 +1,151 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\cluster\sticky.py total lines 28 
+# File NAME : C:\FLOWORK\flowork-gateway\app\cluster\sticky.py total lines 152 
 ########################################################################
 
 import hashlib
 import os
-from typing import List, Optional
+import sys
+import json
+import math
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Iterable, Tuple
 SELF_ID = os.getenv("GATEWAY_ID", "gw-0")
-def _score(key: str, node_id: str, weight: float = 1.0) -> float:
+VNODES_PER_WEIGHT = int(os.getenv("STICKY_VNODES", "160"))
+BOUNDED_LOAD_FACTOR = float(os.getenv("STICKY_LOAD_FACTOR", "1.25"))
+LOOKUP_CACHE_SIZE = int(os.getenv("STICKY_CACHE_SIZE", "65536"))
+def _hash64(data: str) -> int:
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+class HashRing:
+    def __init__(self, weights: Dict[str, float], vnodes: int = VNODES_PER_WEIGHT, cache_size: int = LOOKUP_CACHE_SIZE):
+        self.weights = {nid: float(w) for nid, w in weights.items() if w and w > 0}
+        points: List[Tuple[int, str]] = []
+        for nid, w in self.weights.items():
+            for i in range(max(1, int(round(vnodes * w)))):
+                points.append((_hash64(f"{nid}#{i}"), nid))
+        points.sort()
+        self._hashes = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+    def __len__(self):
+        return len(self.weights)
+    def _index(self, key: str) -> int:
+        i = bisect.bisect(self._hashes, _hash64(key))
+        return 0 if i == len(self._hashes) else i
+    def lookup(self, key: str) -> Optional[str]:
+        if not self._owners:
+            return None
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+        nid = self._owners[self._index(key)]
+        with self._lock:
+            self._cache[key] = nid
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return nid
+    def lookup_bounded(self, key: str, loads: Dict[str, int], factor: float = BOUNDED_LOAD_FACTOR) -> Optional[str]:
+        """
+        Consistent hashing with bounded loads: walk clockwise from the key's point and skip
+        nodes already above factor * their weighted share of (total + 1).
+        """
+        if not self._owners:
+            return None
+        total = sum(loads.get(n, 0) for n in self.weights) + 1
+        wsum = sum(self.weights.values())
+        caps = {n: math.ceil(factor * total * w / wsum) for n, w in self.weights.items()}
+        start = self._index(key)
+        seen = set()
+        for step in range(len(self._owners)):
+            nid = self._owners[(start + step) % len(self._owners)]
+            if nid in seen:
+                continue
+            if loads.get(nid, 0) < caps[nid]:
+                return nid
+            seen.add(nid)
+            if len(seen) == len(self.weights):
+                break
+        return self._owners[start]
+_RING_SLOTS = 8
+_rings: "OrderedDict[Tuple, HashRing]" = OrderedDict()
+_ring_lock = threading.Lock()
+def _signature(weights: Dict[str, float]) -> Tuple:
+    return tuple(sorted(weights.items()))
+def rebuild_ring(weights: Dict[str, float]) -> HashRing:
 
-    h = hashlib.sha256((key + "@" + node_id).encode("utf-8")).hexdigest()
-    v = (int(h[:8], 16) / 0xFFFFFFFF) or 1e-9
-    return weight * (1.0 / (1.0 - v))
-def pick_home_gateway(key: str, candidates: List[str]) -> Optional[str]:
+    sig = _signature(weights)
+    with _ring_lock:
+        ring = _rings.get(sig)
+        if ring is None:
+            ring = HashRing(weights)
+            _rings[sig] = ring
+            while len(_rings) > _RING_SLOTS:
+                _rings.popitem(last=False)
+        _rings.move_to_end(sig)
+        return ring
+_live_members: Optional[Dict[str, float]] = None
+_live_ring: Optional[HashRing] = None
+def set_live_members(weights: Dict[str, float]):
 
-    if not candidates:
+    # Pushed by peers.py on every up/down transition; lookups never poll peer state.
+    global _live_members, _live_ring
+    _live_members = dict(weights) or {SELF_ID: 1.0}
+    _live_ring = rebuild_ring(_live_members)
+def _live_weights() -> Dict[str, float]:
+    if _live_members is not None:
+        return _live_members
+    try:
+        from .peers import get_all_up_candidates, get_peer_weights
+        ups = get_all_up_candidates()
+        weights = get_peer_weights()
+        return {pid: weights.get(pid, 1.0) for pid in ups}
+    except Exception:
+        return {SELF_ID: 1.0}
+def _ring_for(candidates: Optional[Iterable[str]], weights: Optional[Dict[str, float]]) -> HashRing:
+    if candidates is None and not weights and _live_ring is not None:
+        return _live_ring
+    if candidates is None:
+        members = dict(weights) if weights else _live_weights()
+    else:
+        members = {nid: (weights or {}).get(nid, 1.0) for nid in candidates}
+    ring = _rings.get(_signature(members))
+    if ring is not None:
+        return ring
+    return rebuild_ring(members)
+def pick_home_gateway(key: str, candidates: Optional[List[str]] = None, weights: Optional[Dict[str, float]] = None) -> Optional[str]:
+
+    if candidates is not None and not candidates:
+        return None
+    return _ring_for(candidates, weights).lookup(key)
+def pick_home_gateway_bounded(key: str, loads: Dict[str, int], candidates: Optional[List[str]] = None,
+                              weights: Optional[Dict[str, float]] = None) -> Optional[str]:
+
+    if candidates is not None and not candidates:
         return None
-    best, best_s = None, -1.0
-    for nid in candidates:
-        s = _score(key, nid, 1.0)
-        if s > best_s:
-            best_s, best = s, nid
-    return best
-def is_home_gateway(key: str, candidates: List[str]) -> bool:
+    return _ring_for(candidates, weights).lookup_bounded(key, loads)
+def is_home_gateway(key: str, candidates: Optional[List[str]] = None) -> bool:
 
     return pick_home_gateway(key, candidates) == SELF_ID
+def measure_key_movement(before: Dict[str, float], after: Dict[str, float], samples: int = 20000) -> float:
+
+    a, b = HashRing(before, cache_size=0), HashRing(after, cache_size=0)
+    moved = sum(1 for i in range(samples) if a.lookup(f"k{i}") != b.lookup(f"k{i}"))
+    return moved / samples
+if __name__ == "__main__":
+    base = {f"gw-{i}": 1.0 for i in range(int(sys.argv[1]) if len(sys.argv) > 1 else 5)}
+    grown = dict(base, **{"gw-new": 1.0})
+    shrunk = {k: v for k, v in base.items() if k != "gw-0"}
+    reweighted = dict(base, **{"gw-0": 2.0})
+    print(json.dumps({
+        "add_one_node": round(measure_key_movement(base, grown), 4),
+        "ideal_add": round(1 / len(grown), 4),
+        "remove_one_node": round(measure_key_movement(base, shrunk), 4),
+        "ideal_remove": round(1 / len(base), 4),
+        "double_weight_of_one": round(measure_key_movement(base, reweighted), 4),
+    }, indent=2))
@@ -0,0 +1,97 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\app\engine\audience.py total lines 98 
+########################################################################
+
+import threading
+import logging
+from typing import Dict, Set, Optional, Iterable
+from app.extensions import socketio as sio
+log = logging.getLogger(__name__)
+GUI_NAMESPACE = '/gui-socket'
+def engine_room(engine_id: str) -> str:
+    return f"engine_audience:{engine_id}"
+class EngineAudienceIndex:
+    """
+    engine_id -> {owner_id + shared user_ids}. Setiap engine punya room Socket.IO sendiri,
+    jadi broadcast cukup satu emit tanpa query DB. Dijaga tetap sinkron oleh event share create/delete.
+    """
+    def __init__(self):
+        self._audience: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+    def _load(self, engine_id: str) -> Set[str]:
+        from app.helpers import get_db_session
+        from app.models import RegisteredEngine, EngineShare
+        session = get_db_session()
+        try:
+            owner = session.query(RegisteredEngine.user_id).filter_by(id=engine_id).first()
+            users = {str(r[0]) for r in session.query(EngineShare.user_id).filter_by(engine_id=engine_id).all()}
+            if owner:
+                users.add(str(owner[0]))
+            return users
+        finally:
+            session.close()
+    def _user_sids(self, user_id: str) -> Iterable[str]:
+        try:
+            return [sid for sid, _ in sio.server.manager.get_participants(GUI_NAMESPACE, str(user_id))]
+        except Exception:
+            return []
+    def _enter(self, engine_id: str, user_id: str):
+        room = engine_room(engine_id)
+        for sid in self._user_sids(user_id):
+            sio.server.enter_room(sid, room, namespace=GUI_NAMESPACE)
+    def _leave(self, engine_id: str, user_id: str):
+        room = engine_room(engine_id)
+        for sid in self._user_sids(user_id):
+            sio.server.leave_room(sid, room, namespace=GUI_NAMESPACE)
+    def ensure(self, engine_id: str) -> Set[str]:
+        engine_id = str(engine_id)
+        with self._lock:
+            users = self._audience.get(engine_id)
+        if users is not None:
+            return users
+        users = self._load(engine_id)
+        if not users:
+            return users
+        with self._lock:
+            if engine_id in self._audience:
+                return self._audience[engine_id]
+            self._audience[engine_id] = users
+        # GUI yang sudah terhubung sebelum engine ini dikenal index: masukkan sekali ke room engine.
+        for uid in users:
+            self._enter(engine_id, uid)
+        return users
+    def audience(self, engine_id: str) -> Set[str]:
+        return set(self.ensure(engine_id))
+    def join_gui(self, sid: str, engine_ids: Iterable[str]):
+        for eid in engine_ids:
+            sio.server.enter_room(sid, engine_room(str(eid)), namespace=GUI_NAMESPACE)
+    def on_share_created(self, engine_id: str, user_id: str):
+        engine_id, user_id = str(engine_id), str(user_id)
+        with self._lock:
+            users = self._audience.get(engine_id)
+            if users is not None:
+                users.add(user_id)
+        self._enter(engine_id, user_id)
+    def on_share_deleted(self, engine_id: str, user_id: str, owner_id: Optional[str] = None):
+        engine_id, user_id = str(engine_id), str(user_id)
+        if owner_id is not None and str(owner_id) == user_id:
+            return
+        with self._lock:
+            users = self._audience.get(engine_id)
+            if users is not None:
+                users.discard(user_id)
+        self._leave(engine_id, user_id)
+    def invalidate(self, engine_id: str):
+        engine_id = str(engine_id)
+        with self._lock:
+            users = self._audience.pop(engine_id, None)
+        try:
+            sio.server.close_room(engine_room(engine_id), namespace=GUI_NAMESPACE)
+        except Exception:
+            pass
+        return users
+    def broadcast(self, engine_id: str, event_name: str, data):
+        self.ensure(engine_id)
+        sio.emit(event_name, data, room=engine_room(str(engine_id)), namespace=GUI_NAMESPACE)
+engine_audience = EngineAudienceIndex()
@@ -8,6 +8,7 @@ from flask import Blueprint, request, jsonify, current_app
 import os
 from app.extensions import db
 from app.models import RegisteredEngine as Engine
+from app.engine.registry import engine_registry
 engine_hb_bp = Blueprint('engine_heartbeat', __name__, url_prefix='/internal/engine')
 @engine_hb_bp.route('/heartbeat', methods=['POST'])
 def heartbeat():
@@ -25,6 +26,7 @@ def heartbeat():
             from datetime import datetime, timezone
             engine.last_seen = datetime.now(timezone.utc)
             db.session.commit()
+            engine_registry.observe_heartbeat(engine_id, url=data.get('internal_api_url'), vitals=data)
         else:
             current_app.logger.warning(f"Heartbeat received for unknown engine: {engine_id}")
         return jsonify({"status": "acknowledged"}), 200
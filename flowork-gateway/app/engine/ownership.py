@@ -0,0 +1,225 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\app\engine\ownership.py total lines 226 
+########################################################################
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
+from app.metrics import OWNERSHIP_ENTRIES, OWNERSHIP_EVICTIONS
+log = logging.getLogger(__name__)
+DB_PATH = os.getenv("SQLITE_DB_PATH", "/app/data/gateway.db")
+OWNERSHIP_BACKEND = os.getenv("OWNERSHIP_BACKEND", "memory").strip().lower()
+OWNERSHIP_TTL = int(os.getenv("OWNERSHIP_TTL_SECONDS", str(6 * 3600)))
+OWNERSHIP_GRACE = int(os.getenv("OWNERSHIP_GRACE_SECONDS", "120"))
+OWNERSHIP_MAX_ENTRIES = int(os.getenv("OWNERSHIP_MAX_ENTRIES", "100000"))
+OWNERSHIP_TOUCH_INTERVAL = float(os.getenv("OWNERSHIP_TOUCH_INTERVAL_SECONDS", "5"))
+TERMINAL_STATUSES = {"SUCCEEDED", "SUCCESS", "COMPLETED", "DONE", "FAILED", "ERROR", "STOPPED", "CANCELLED", "CANCELED", "ABORTED"}
+def _conn():
+    con = sqlite3.connect(DB_PATH, timeout=5.0, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL;")
+    con.execute("PRAGMA synchronous=NORMAL;")
+    con.execute("PRAGMA busy_timeout=5000;")
+    return con
+class MemoryBackend:
+    """Per-process OrderedDict with TTL + LRU. Default for a single gateway worker."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._maps: Dict[str, "OrderedDict[str, Tuple[str, float]]"] = {}
+        self._lock = threading.Lock()
+    def _map(self, name: str):
+        m = self._maps.get(name)
+        if m is None:
+            m = self._maps[name] = OrderedDict()
+        return m
+    def get(self, name: str, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            m = self._map(name)
+            entry = m.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del m[key]
+                OWNERSHIP_EVICTIONS.labels(name, "ttl").inc()
+                return None
+            m.move_to_end(key)
+            return value
+    def set(self, name: str, key: str, value: str, expires_at: float):
+        evicted = 0
+        with self._lock:
+            m = self._map(name)
+            m[key] = (value, expires_at)
+            m.move_to_end(key)
+            while len(m) > self.max_entries:
+                m.popitem(last=False)
+                evicted += 1
+            size = len(m)
+        if evicted:
+            OWNERSHIP_EVICTIONS.labels(name, "lru").inc(evicted)
+        OWNERSHIP_ENTRIES.labels(name).set(size)
+    def expire_at(self, name: str, key: str, expires_at: float):
+        with self._lock:
+            m = self._map(name)
+            entry = m.get(key)
+            if entry is not None and entry[1] > expires_at:
+                m[key] = (entry[0], expires_at)
+    def pop(self, name: str, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._map(name).pop(key, None)
+        return entry[0] if entry else None
+    def sweep(self, now: float) -> int:
+        removed = 0
+        with self._lock:
+            for name, m in self._maps.items():
+                # entries are mostly in insertion order, so expired ones cluster at the front
+                dead = [k for k, (_, exp) in m.items() if exp <= now]
+                for k in dead:
+                    del m[k]
+                if dead:
+                    OWNERSHIP_EVICTIONS.labels(name, "ttl").inc(len(dead))
+                OWNERSHIP_ENTRIES.labels(name).set(len(m))
+                removed += len(dead)
+        return removed
+    def size(self, name: str) -> int:
+        with self._lock:
+            return len(self._map(name))
+class SQLiteBackend:
+    """Shared across gateway worker processes through the gateway SQLite DB (WAL), like rl/limiter and idem/store."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        con = _conn()
+        con.executescript("""
+        CREATE TABLE IF NOT EXISTS gw_ownership(
+            map TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            touched_at REAL NOT NULL,
+            PRIMARY KEY(map, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_gw_ownership_exp ON gw_ownership(expires_at);
+        CREATE INDEX IF NOT EXISTS idx_gw_ownership_lru ON gw_ownership(map, touched_at);
+        """)
+        con.close()
+        self._local = threading.local()
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = _conn()
+        return con
+    def get(self, name: str, key: str, now: float) -> Optional[str]:
+        con = self._con()
+        row = con.execute(
+            "SELECT value, touched_at FROM gw_ownership WHERE map=? AND key=? AND expires_at>?", (name, key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        # hit ikut memperbarui touched_at (LRU, bukan FIFO); dibatasi per interval supaya read tidak selalu jadi write
+        if now - row[1] >= OWNERSHIP_TOUCH_INTERVAL:
+            con.execute("UPDATE gw_ownership SET touched_at=? WHERE map=? AND key=?", (now, name, key))
+        return row[0]
+    def set(self, name: str, key: str, value: str, expires_at: float):
+        self._con().execute(
+            "INSERT INTO gw_ownership(map, key, value, expires_at, touched_at) VALUES(?,?,?,?,?) "
+            "ON CONFLICT(map, key) DO UPDATE SET value=excluded.value, expires_at=excluded.expires_at, touched_at=excluded.touched_at",
+            (name, key, value, expires_at, time.time())
+        )
+    def expire_at(self, name: str, key: str, expires_at: float):
+        self._con().execute(
+            "UPDATE gw_ownership SET expires_at=? WHERE map=? AND key=? AND expires_at>?", (expires_at, name, key, expires_at)
+        )
+    def pop(self, name: str, key: str) -> Optional[str]:
+        value = self.get(name, key, time.time())
+        self._con().execute("DELETE FROM gw_ownership WHERE map=? AND key=?", (name, key))
+        return value
+    def sweep(self, now: float) -> int:
+        con = self._con()
+        removed = 0
+        for (name,) in con.execute("SELECT DISTINCT map FROM gw_ownership").fetchall():
+            n = con.execute("DELETE FROM gw_ownership WHERE map=? AND expires_at<=?", (name, now)).rowcount
+            if n:
+                OWNERSHIP_EVICTIONS.labels(name, "ttl").inc(n)
+            size = con.execute("SELECT COUNT(*) FROM gw_ownership WHERE map=?", (name,)).fetchone()[0]
+            if size > self.max_entries:
+                extra = size - self.max_entries
+                con.execute(
+                    "DELETE FROM gw_ownership WHERE map=? AND key IN (SELECT key FROM gw_ownership WHERE map=? ORDER BY touched_at ASC LIMIT ?)",
+                    (name, name, extra)
+                )
+                OWNERSHIP_EVICTIONS.labels(name, "lru").inc(extra)
+                size = self.max_entries
+            OWNERSHIP_ENTRIES.labels(name).set(size)
+            removed += n
+        return removed
+    def size(self, name: str) -> int:
+        return self._con().execute("SELECT COUNT(*) FROM gw_ownership WHERE map=?", (name,)).fetchone()[0]
+class OwnershipMap:
+    def __init__(self, registry: "OwnershipRegistry", name: str):
+        self._registry = registry
+        self.name = name
+    def get(self, key) -> Optional[str]:
+        if not key:
+            return None
+        return self._registry.backend.get(self.name, str(key), time.time())
+    def set(self, key, value, ttl: int = None):
+        if not key or value is None:
+            return
+        self._registry.backend.set(self.name, str(key), str(value), time.time() + (ttl or self._registry.ttl))
+        self._registry.maybe_sweep()
+    def expire_soon(self, key, grace: int = None):
+        if key:
+            self._registry.backend.expire_at(self.name, str(key), time.time() + (self._registry.grace if grace is None else grace))
+    def pop(self, key) -> Optional[str]:
+        return self._registry.backend.pop(self.name, str(key)) if key else None
+    def __len__(self):
+        return self._registry.backend.size(self.name)
+class OwnershipRegistry:
+    """
+    Routing state untuk event engine -> GUI: job -> user, execution -> user, engine -> job aktif.
+    Entry punya TTL, dibatasi LRU, dan dipercepat kedaluwarsanya saat eksekusi selesai.
+    """
+    def __init__(self, backend=None, ttl: int = OWNERSHIP_TTL, grace: int = OWNERSHIP_GRACE, sweep_interval: int = 60):
+        if backend is None:
+            backend = SQLiteBackend(OWNERSHIP_MAX_ENTRIES) if OWNERSHIP_BACKEND == "sqlite" else MemoryBackend(OWNERSHIP_MAX_ENTRIES)
+        self.backend = backend
+        self.ttl = ttl
+        self.grace = grace
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.time()
+        self.jobs = OwnershipMap(self, "job")
+        self.executions = OwnershipMap(self, "execution")
+        self.engine_jobs = OwnershipMap(self, "engine_job")
+    def maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        try:
+            self.backend.sweep(now)
+        except Exception as e:
+            log.warning(f"[Ownership] Sweep failed: {e}")
+    def claim(self, job_id: str, user_id: str):
+        self.jobs.set(job_id, user_id)
+        self.executions.set(job_id, user_id)
+    def on_completed(self, engine_id: Optional[str], job_id: Optional[str], execution_id: Optional[str]):
+        self.jobs.expire_soon(job_id)
+        self.executions.expire_soon(execution_id)
+        self.executions.expire_soon(job_id)
+        if engine_id and job_id and self.engine_jobs.get(engine_id) == str(job_id):
+            self.engine_jobs.pop(engine_id)
+    def stats(self) -> Dict[str, int]:
+        return {m.name: len(m) for m in (self.jobs, self.executions, self.engine_jobs)}
+_registry: Optional[OwnershipRegistry] = None
+_registry_lock = threading.Lock()
+def get_ownership_registry() -> OwnershipRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = OwnershipRegistry()
+    return _registry
@@ -0,0 +1,149 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\app\engine\placement.py total lines 150 
+########################################################################
+
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Iterable
+from .registry import engine_registry, EngineNode
+log = logging.getLogger(__name__)
+PLACEMENT_STRATEGY = os.getenv("ENGINE_PLACEMENT_STRATEGY", "p2c").strip().lower()
+AFFINITY_TTL = int(os.getenv("ENGINE_AFFINITY_TTL_SECONDS", "3600"))
+AFFINITY_MAX = int(os.getenv("ENGINE_AFFINITY_MAX_ENTRIES", "50000"))
+def load_score(node: EngineNode) -> float:
+    # Lower is better: pending work per unit of capacity, inflated by CPU/RAM pressure and divided by the operator weight.
+    capacity = max(1, node.capacity)
+    pending = (node.queue_depth + node.active_fac_sessions) / capacity
+    pressure = 1.0 + 2.0 * min(node.utilization, 1.0) ** 2
+    return (pending + 0.01) * pressure / max(node.weight, 0.01)
+class PlacementEngine:
+    def __init__(self, registry=None, strategy: str = None, rng: random.Random = None):
+        self.registry = registry or engine_registry
+        self.strategy = strategy or PLACEMENT_STRATEGY
+        self._rng = rng or random.Random()
+        self._affinity: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    def _candidates(self, engine_ids: Optional[Iterable[str]]) -> List[EngineNode]:
+        if engine_ids is None:
+            return self.registry.get_active_engines()
+        nodes = []
+        for eid in engine_ids:
+            node = self.registry.get_node(eid)
+            if node is not None:
+                nodes.append(node)
+        return nodes
+    def _sticky(self, affinity_key: str, alive_ids) -> Optional[str]:
+        with self._lock:
+            entry = self._affinity.get(affinity_key)
+            if entry is None:
+                return None
+            engine_id, expires_at = entry
+            if expires_at < time.time() or engine_id not in alive_ids:
+                self._affinity.pop(affinity_key, None)
+                return None
+            self._affinity.move_to_end(affinity_key)
+            return engine_id
+    def pin(self, affinity_key: str, engine_id: str):
+        with self._lock:
+            self._affinity[affinity_key] = (engine_id, time.time() + AFFINITY_TTL)
+            self._affinity.move_to_end(affinity_key)
+            while len(self._affinity) > AFFINITY_MAX:
+                self._affinity.popitem(last=False)
+    def release(self, affinity_key: str):
+        with self._lock:
+            self._affinity.pop(affinity_key, None)
+    def _pick(self, nodes: List[EngineNode]) -> EngineNode:
+        if len(nodes) == 1:
+            return nodes[0]
+        if self.strategy == "least_loaded":
+            return min(nodes, key=load_score)
+        if self.strategy == "random":
+            return self._rng.choice(nodes)
+        a, b = self._rng.sample(nodes, 2)
+        return a if load_score(a) <= load_score(b) else b
+    def choose(self, engine_ids: Optional[Iterable[str]] = None, affinity_key: str = None, exclude: Iterable[str] = ()) -> Optional[str]:
+        nodes = self._candidates(engine_ids)
+        excluded = set(exclude or ())
+        nodes = [n for n in nodes if n.id not in excluded]
+        if not nodes:
+            return None
+        if affinity_key:
+            sticky = self._sticky(affinity_key, {n.id for n in nodes})
+            if sticky:
+                return sticky
+        saturated = [n for n in nodes if n.free_capacity <= 0]
+        if len(saturated) < len(nodes):
+            nodes = [n for n in nodes if n.free_capacity > 0]
+        chosen = self._pick(nodes)
+        if affinity_key:
+            self.pin(affinity_key, chosen.id)
+        return chosen.id
+_placement = PlacementEngine()
+def get_placement_engine() -> PlacementEngine:
+    return _placement
+class _SimRegistry:
+    def __init__(self, nodes: List[EngineNode]):
+        self.nodes = {n.id: n for n in nodes}
+    def get_active_engines(self):
+        return list(self.nodes.values())
+    def get_node(self, engine_id):
+        return self.nodes.get(engine_id)
+def simulate(strategy: str, engines: int = 8, jobs: int = 20000, skew: float = 4.0, utilization: float = 0.85,
+             heartbeat_interval: float = 10.0, seed: int = 7) -> Dict[str, float]:
+    """
+    Discrete-event simulation: engine 0 is `skew` times slower than the rest,
+    vitals/queue depth are only refreshed every `heartbeat_interval` seconds
+    (like the real heartbeat), and we report job sojourn-time percentiles.
+    """
+    rng = random.Random(seed)
+    speeds = [1.0 / skew] + [1.0] * (engines - 1)
+    arrival_rate = utilization * sum(speeds)
+    nodes = [EngineNode(f"sim-{i}", 1.0, 100, 0.0, None) for i in range(engines)]
+    placement = PlacementEngine(registry=_SimRegistry(nodes), strategy=strategy, rng=random.Random(seed + 1))
+    busy_until = [0.0] * engines
+    inflight: List[List[float]] = [[] for _ in range(engines)]
+    latencies = []
+    now, next_hb = 0.0, 0.0
+    for _ in range(jobs):
+        now += rng.expovariate(arrival_rate)
+        if now >= next_hb:
+            for i, node in enumerate(nodes):
+                while inflight[i] and inflight[i][0] <= now:
+                    heapq.heappop(inflight[i])
+                node.queue_depth = len(inflight[i])
+                node.cpu_percent = 100.0 if busy_until[i] > now else 10.0
+            next_hb = now + heartbeat_interval
+        idx = int(placement.choose().split("-")[1])
+        start = max(now, busy_until[idx])
+        done = start + rng.expovariate(speeds[idx])
+        busy_until[idx] = done
+        heapq.heappush(inflight[idx], done)
+        # the dispatcher bumps queue depth locally between heartbeats
+        nodes[idx].queue_depth += 1
+        latencies.append(done - now)
+    latencies.sort()
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+    return {"strategy": strategy, "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": round(latencies[-1], 3)}
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tail-latency simulation for engine placement strategies.")
+    parser.add_argument("--engines", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--skew", type=float, default=4.0)
+    parser.add_argument("--utilization", type=float, default=0.85)
+    parser.add_argument("--heartbeat", type=float, default=10.0)
+    args = parser.parse_args(argv)
+    for strategy in ("random", "p2c", "least_loaded"):
+        print(json.dumps(simulate(strategy, args.engines, args.jobs, args.skew, args.utilization, args.heartbeat)))
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\engine\registry.py total lines 110 
+# File NAME : C:\FLOWORK\flowork-gateway\app\engine\registry.py total lines 236 
 ########################################################################
 
 """
@@ -10,13 +10,15 @@ document : https://flowork.cloud/p-tinjauan-arsitektur-registrypy-monitor-denyut
 import os
 import sqlite3
 import time
+import threading
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 
 log = logging.getLogger(__name__)
 DB_PATH = os.getenv("SQLITE_DB_PATH", "/app/data/gateway.db")
+DEFAULT_ENGINE_URL = "http://flowork_core:8989"
 
 def _conn():
     con = sqlite3.connect(DB_PATH, timeout=5.0, isolation_level=None)
@@ -25,6 +27,12 @@ def _conn():
     con.execute("PRAGMA busy_timeout=5000;")
     return con
 
+def _as_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
 class EngineNode:
     def __init__(self, engine_id: str, weight: float, capacity: int, last_seen_ts: float, url: str = None):
         self.id = engine_id
@@ -32,78 +40,196 @@ class EngineNode:
         self.capacity = capacity
         self.last_seen_ts = last_seen_ts
         self.url = url
+        self.online = True
+        self.cpu_percent = 0.0
+        self.memory_percent = 0.0
+        self.active_fac_sessions = 0
+        self.queue_depth = 0
 
     @property
     def last_heartbeat_utc(self) -> datetime:
         return datetime.fromtimestamp(self.last_seen_ts, tz=timezone.utc)
 
-class EngineRegistry:
-    def __init__(self):
-        self.hb_ttl = int(os.getenv("ENGINE_HB_TTL", "60"))
+    def is_alive(self, now: float, ttl: int) -> bool:
+        return self.online and (now - self.last_seen_ts) <= ttl
 
-    def get_active_engines(self) -> List[EngineNode]:
-        now = int(time.time())
-        cutoff = now - self.hb_ttl
-        active_nodes = []
+    @property
+    def utilization(self) -> float:
+        return max(self.cpu_percent, self.memory_percent) / 100.0
 
-        default_dev_url = "http://flowork_core:8989"
+    @property
+    def free_capacity(self) -> int:
+        return max(0, self.capacity - self.queue_depth - self.active_fac_sessions)
+
+    @property
+    def effective_weight(self) -> float:
+        headroom = max(0.05, 1.0 - min(self.utilization, 1.0))
+        fill = self.free_capacity / self.capacity if self.capacity else 0.0
+        return self.weight * headroom * fill
+
+    def apply_vitals(self, vitals: Dict[str, Any]):
+        metrics = vitals.get("metrics") or {}
+        self.cpu_percent = _as_float(vitals.get("cpu_percent", metrics.get("cpuPercent")), self.cpu_percent)
+        self.memory_percent = _as_float(vitals.get("memory_percent", metrics.get("memoryPercent")), self.memory_percent)
+        self.active_fac_sessions = int(_as_float(metrics.get("active_fac_sessions", vitals.get("active_fac_sessions")), self.active_fac_sessions))
+        if "queue_depth" in vitals:
+            self.queue_depth = int(_as_float(vitals.get("queue_depth"), self.queue_depth))
+        if "weight" in vitals:
+            self.weight = _as_float(vitals.get("weight"), self.weight)
+        if "capacity" in vitals:
+            self.capacity = int(_as_float(vitals.get("capacity"), self.capacity))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "weight": self.weight,
+            "capacity": self.capacity,
+            "free_capacity": self.free_capacity,
+            "effective_weight": round(self.effective_weight, 4),
+            "cpu_percent": self.cpu_percent,
+            "memory_percent": self.memory_percent,
+            "active_fac_sessions": self.active_fac_sessions,
+            "queue_depth": self.queue_depth,
+            "last_seen": int(self.last_seen_ts),
+            "url": self.url,
+        }
 
+class EngineRegistry:
+    def __init__(self):
+        self.hb_ttl = int(os.getenv("ENGINE_HB_TTL", "60"))
+        self.resync_interval = int(os.getenv("ENGINE_REGISTRY_RESYNC_SECONDS", "30"))
+        self.default_weight = _as_float(os.getenv("ENGINE_DEFAULT_WEIGHT", "1.0"), 1.0)
+        self.default_capacity = int(os.getenv("ENGINE_DEFAULT_CAPACITY", "100"))
+        self._nodes: Dict[str, EngineNode] = {}
+        self._lock = threading.RLock()
+        self._last_sync = 0.0
+
+    def _node_for(self, engine_id: str, now: float) -> EngineNode:
+        node = self._nodes.get(engine_id)
+        if node is None:
+            node = EngineNode(engine_id, self.default_weight, self.default_capacity, now, None)
+            self._nodes[engine_id] = node
+        return node
+
+    def observe_heartbeat(self, engine_id: str, url: str = None, vitals: Dict[str, Any] = None, ts: float = None) -> EngineNode:
+        """
+        Dipanggil dari heartbeat HTTP dan event 'engine_vitals_update'. Tidak menyentuh DB.
+        """
+        now = ts or time.time()
+        with self._lock:
+            node = self._node_for(str(engine_id), now)
+            node.last_seen_ts = now
+            node.online = True
+            if url:
+                node.url = url
+            if vitals:
+                node.apply_vitals(vitals)
+        try:
+            from app.metrics import GATEWAY_ENGINE_HEARTBEAT, GATEWAY_ENGINE_STATUS
+            GATEWAY_ENGINE_HEARTBEAT.labels(str(engine_id)).inc()
+            GATEWAY_ENGINE_STATUS.labels(str(engine_id)).set(1)
+        except Exception:
+            pass
+        return node
+
+    def set_queue_depth(self, engine_id: str, depth: int):
+        with self._lock:
+            node = self._nodes.get(str(engine_id))
+            if node is not None:
+                node.queue_depth = int(depth)
+
+    def mark_offline(self, engine_id: str):
+        with self._lock:
+            node = self._nodes.get(str(engine_id))
+            if node is not None:
+                node.online = False
+        try:
+            from app.metrics import GATEWAY_ENGINE_STATUS
+            GATEWAY_ENGINE_STATUS.labels(str(engine_id)).set(0)
+        except Exception:
+            pass
+
+    def get_node(self, engine_id: str) -> Optional[EngineNode]:
+        self._maybe_resync()
+        with self._lock:
+            node = self._nodes.get(str(engine_id))
+        if node is not None and node.is_alive(time.time(), self.hb_ttl):
+            return node
+        return None
+
+    def _maybe_resync(self):
+        # Safety net: engine yang heartbeat-nya diterima worker gateway lain tetap terlihat lewat DB, paling sering tiap resync_interval.
+        now = time.time()
+        if now - self._last_sync < self.resync_interval:
+            return
+        with self._lock:
+            if now - self._last_sync < self.resync_interval:
+                return
+            self._last_sync = now
+        self._sync_from_db(now)
+
+    def _sync_from_db(self, now: float):
+        cutoff = datetime.fromtimestamp(now - self.hb_ttl, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
         try:
             con = _conn()
-
-
-            cur = con.execute("""
-                SELECT id,
-                       1.0 as weight,
-                       100 as capacity,
-                       last_seen
-                FROM registered_engines
-            """)
-
-            rows = cur.fetchall()
-            con.close()
-
-            for row in rows:
-                eid, w, cap, last_seen_val = row
-
-                last_seen_ts = 0
-                if last_seen_val:
-                    try:
-                        if isinstance(last_seen_val, str):
-                            dt = datetime.fromisoformat(last_seen_val)
-                            last_seen_ts = dt.timestamp()
-                        elif isinstance(last_seen_val, (int, float)):
-                            last_seen_ts = last_seen_val
-                    except:
-                        last_seen_ts = now
-
-                active_nodes.append(EngineNode(eid, w, cap, last_seen_ts, default_dev_url))
-
+            try:
+                rows = con.execute(
+                    "SELECT id, last_seen FROM registered_engines WHERE last_seen IS NOT NULL AND last_seen >= ?",
+                    (cutoff,)
+                ).fetchall()
+            finally:
+                con.close()
         except sqlite3.OperationalError as e:
             if "no such table" in str(e):
                 log.warning("[EngineRegistry] Table 'registered_engines' missing. Using Fallback Dev Engine.")
-                active_nodes.append(EngineNode("dev-fallback", 1.0, 100, now, default_dev_url))
+                with self._lock:
+                    node = self._node_for("dev-fallback", now)
+                    node.url = DEFAULT_ENGINE_URL
+                    node.last_seen_ts = now
             else:
                 log.error(f"[EngineRegistry] SQL Error: {e}")
+            return
         except Exception as e:
-            log.error(f"[EngineRegistry] Failed to fetch active engines: {e}")
-            active_nodes.append(EngineNode("emergency-fallback", 1.0, 100, now, default_dev_url))
+            log.error(f"[EngineRegistry] Failed to resync engines from DB: {e}")
+            return
+
+        with self._lock:
+            for eid, last_seen_val in rows:
+                last_seen_ts = now
+                try:
+                    if isinstance(last_seen_val, str):
+                        dt = datetime.fromisoformat(last_seen_val)
+                        if dt.tzinfo is None:
+                            dt = dt.replace(tzinfo=timezone.utc)
+                        last_seen_ts = dt.timestamp()
+                    elif isinstance(last_seen_val, (int, float)):
+                        last_seen_ts = float(last_seen_val)
+                except ValueError:
+                    pass
+                node = self._node_for(str(eid), last_seen_ts)
+                if last_seen_ts > node.last_seen_ts:
+                    node.last_seen_ts = last_seen_ts
+                    node.online = True
+
+    def get_active_engines(self) -> List[EngineNode]:
+        self._maybe_resync()
+        now = time.time()
+        with self._lock:
+            return [n for n in self._nodes.values() if n.is_alive(now, self.hb_ttl)]
 
-        return active_nodes
+    def capacity_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {n.id: n.to_dict() for n in self.get_active_engines()}
 
 engine_registry = EngineRegistry()
 
 def list_up_engines() -> Dict[str, Dict]:
-    nodes = engine_registry.get_active_engines()
-    return {n.id: {"weight": n.weight, "capacity": n.capacity} for n in nodes}
+    return engine_registry.capacity_snapshot()
 
 def get_engine_url(engine_id: str) -> Optional[str]:
     """
     Mencari Full URL dari Engine ID.
     """
-    active_nodes = engine_registry.get_active_engines()
-    for node in active_nodes:
-        if node.id == engine_id:
-            return node.url
+    node = engine_registry.get_node(engine_id)
+    if node is not None and node.url:
+        return node.url
 
-    return "http://flowork_core:8989"
+    return DEFAULT_ENGINE_URL
@@ -1,44 +1,201 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\etl\exporter.py total lines 45 
+# File NAME : C:\FLOWORK\flowork-gateway\app\etl\exporter.py total lines 202 
 ########################################################################
 
 import os
 import threading
 import time
 import json
+import gzip
+import random
 import requests
 import logging
-from .outbox import init_outbox_schema, pull_batch, mark_sent
+from requests.adapters import HTTPAdapter
+from .outbox import init_outbox_schema, pull_batch, pending_topics, mark_sent, purge_sent
+from app.metrics import ETL_EVENTS_EXPORTED, ETL_EXPORT_FAILURES, ETL_BATCH_SIZE, ETL_PURGED_TOTAL
 log = logging.getLogger(__name__)
 ETL_URL = os.getenv("ETL_URL", "").strip()
 ETL_API_KEY = os.getenv("ETL_API_KEY", "")
 ETL_INTERVAL = int(os.getenv("ETL_INTERVAL_SECONDS", "15"))
+ETL_FORMAT = os.getenv("ETL_FORMAT", "ndjson").strip().lower()
+ETL_GZIP = os.getenv("ETL_GZIP", "1") == "1"
+ETL_BATCH_MIN = int(os.getenv("ETL_BATCH_MIN", "50"))
+ETL_BATCH_MAX = int(os.getenv("ETL_BATCH_MAX", "5000"))
+ETL_TARGET_LATENCY = float(os.getenv("ETL_TARGET_LATENCY_SECONDS", "1.0"))
+ETL_MAX_LANES = int(os.getenv("ETL_MAX_LANES", "4"))
+ETL_MAX_RETRIES = int(os.getenv("ETL_MAX_RETRIES", "4"))
+ETL_RETRY_BASE = float(os.getenv("ETL_RETRY_BASE_SECONDS", "0.5"))
+ETL_RETRY_CAP = float(os.getenv("ETL_RETRY_CAP_SECONDS", "10"))
+ETL_RETENTION = int(os.getenv("ETL_RETENTION_SECONDS", str(3 * 24 * 3600)))
+ETL_PURGE_INTERVAL = int(os.getenv("ETL_PURGE_INTERVAL_SECONDS", "300"))
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+class _Lane:
+    def __init__(self, topic:str):
+        self.topic = topic
+        self.batch_size = ETL_BATCH_MIN
+        self.session = None
+        self.thread = None
+    def grow(self):
+        self.batch_size = min(ETL_BATCH_MAX, self.batch_size * 2)
+        ETL_BATCH_SIZE.labels(self.topic).set(self.batch_size)
+    def shrink(self, factor:float=0.5):
+        self.batch_size = max(ETL_BATCH_MIN, int(self.batch_size * factor))
+        ETL_BATCH_SIZE.labels(self.topic).set(self.batch_size)
+class EtlExporter:
+    def __init__(self, url:str=None, api_key:str=None, max_lanes:int=None):
+        self.url = ETL_URL if url is None else url
+        self.api_key = ETL_API_KEY if api_key is None else api_key
+        self.max_lanes = max_lanes or ETL_MAX_LANES
+        self._lanes = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._stop = threading.Event()
+    def _session(self) -> requests.Session:
+        s = requests.Session()
+        s.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        s.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        return s
+    def _encode(self, batch):
+        if ETL_FORMAT == "json":
+            body = json.dumps({"events": batch}).encode("utf-8")
+            ctype = "application/json"
+        else:
+            # payload is already serialized JSON in the outbox; splice it in without a decode/encode round trip
+            body = "".join(
+                '{"id":%s,"topic":%s,"payload":%s}\n' % (json.dumps(b["id"]), json.dumps(b["topic"]), b["payload"])
+                for b in batch
+            ).encode("utf-8")
+            ctype = "application/x-ndjson"
+        headers = {"Content-Type": ctype}
+        if ETL_GZIP:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+    def _post(self, lane:_Lane, batch) -> bool:
+        body, headers = self._encode(batch)
+        for attempt in range(ETL_MAX_RETRIES + 1):
+            delay = random.uniform(0, min(ETL_RETRY_CAP, ETL_RETRY_BASE * (2 ** attempt)))
+            try:
+                r = lane.session.post(self.url, data=body, headers=headers, timeout=10)
+                if r.status_code < 400:
+                    return True
+                if r.status_code not in _RETRYABLE_STATUS:
+                    log.warning(f"[ETL] Sink rejected batch for topic '{lane.topic}' with HTTP {r.status_code}.")
+                    return False
+                retry_after = r.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, min(ETL_RETRY_CAP, float(retry_after)))
+                log.warning(f"[ETL] Sink returned HTTP {r.status_code} for topic '{lane.topic}' (attempt {attempt + 1}).")
+            except requests.RequestException as e:
+                log.warning(f"[ETL] Export attempt {attempt + 1} failed for topic '{lane.topic}': {e}")
+            if attempt < ETL_MAX_RETRIES:
+                time.sleep(delay)
+        return False
+    def _drain_lane(self, lane:_Lane) -> int:
+        if lane.session is None:
+            lane.session = self._session()
+        exported = 0
+        while True:
+            # ukuran saat pull disimpan: grow() di bawah mengubah lane.batch_size sebelum cek batch terakhir
+            size = lane.batch_size
+            batch = pull_batch(limit=size, topic=lane.topic)
+            if not batch:
+                break
+            started = time.monotonic()
+            if not self._post(lane, batch):
+                ETL_EXPORT_FAILURES.labels(lane.topic).inc()
+                lane.shrink()
+                break
+            elapsed = time.monotonic() - started
+            mark_sent([b["id"] for b in batch])
+            exported += len(batch)
+            ETL_EVENTS_EXPORTED.labels(lane.topic).inc(len(batch))
+            if elapsed > ETL_TARGET_LATENCY:
+                lane.shrink(0.75)
+            elif len(batch) >= size:
+                lane.grow()
+            if len(batch) < size:
+                break
+        return exported
+    def _lane(self, topic:str) -> _Lane:
+        lane = self._lanes.get(topic)
+        if lane is None:
+            lane = self._lanes[topic] = _Lane(topic)
+        return lane
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if ETL_RETENTION <= 0 or now - self._last_purge < ETL_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        try:
+            total = 0
+            while True:
+                n = purge_sent(ETL_RETENTION)
+                total += n
+                if n <= 0:
+                    break
+            if total:
+                ETL_PURGED_TOTAL.inc(total)
+                log.info(f"[ETL] Purged {total} sent outbox rows older than {ETL_RETENTION}s.")
+        except Exception as e:
+            log.warning(f"[ETL] Outbox purge failed: {e}")
+    def export_once(self) -> int:
+        if not self.url:
+            return 0
+        total = 0
+        for topic in pending_topics():
+            total += self._drain_lane(self._lane(topic))
+        return total
+    def dispatch_lanes(self) -> int:
+        if not self.url:
+            return 0
+        started = 0
+        with self._lock:
+            running = sum(1 for l in self._lanes.values() if l.thread and l.thread.is_alive())
+            for topic in pending_topics():
+                if running >= self.max_lanes:
+                    break
+                lane = self._lane(topic)
+                if lane.thread and lane.thread.is_alive():
+                    continue
+                lane.thread = threading.Thread(target=self._run_lane, args=(lane,), daemon=True, name=f"etl-lane-{topic}")
+                lane.thread.start()
+                running += 1
+                started += 1
+        return started
+    def _run_lane(self, lane:_Lane):
+        try:
+            self._drain_lane(lane)
+        except Exception as e:
+            log.warning(f"[ETL] Lane '{lane.topic}' crashed: {e}")
+    def busy(self) -> bool:
+        with self._lock:
+            return any(l.thread and l.thread.is_alive() for l in self._lanes.values())
+    def stop(self):
+        self._stop.set()
+    def loop(self):
+        while not self._stop.is_set():
+            try:
+                self.dispatch_lanes()
+                self._maybe_purge()
+            except Exception as e:
+                log.warning(f"[ETL] Exporter sweep failed: {e}")
+            # re-sweep quickly while lanes are draining so freed lane slots pick up waiting topics
+            self._stop.wait(1.0 if self.busy() else ETL_INTERVAL)
+_exporter = EtlExporter()
 def _export_once():
-    if not ETL_URL:
-        return
-    batch = pull_batch(limit=200)
-    if not batch:
-        return
-    ids = [b["id"] for b in batch]
     try:
-        r = requests.post(ETL_URL, json={"events": batch}, headers={
-            "Authorization": f"Bearer {ETL_API_KEY}",
-            "Content-Type": "application/json",
-        }, timeout=10)
-        r.raise_for_status()
-        mark_sent(ids)
+        return _exporter.export_once()
     except Exception as e:
         log.warning("ETL export failed: %s", e)
+        return 0
 def start_exporter_thread(app=None):
     if app:
         log.info("Starting ETL exporter thread (attached to Flask app).")
     else:
         log.info("Starting ETL exporter thread (standalone mode).")
     init_outbox_schema()
-    def _loop():
-        while True:
-            _export_once()
-            time.sleep(ETL_INTERVAL)
-    t = threading.Thread(target=_loop, daemon=True)
+    t = threading.Thread(target=_exporter.loop, daemon=True)
     t.start()
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\etl\outbox.py total lines 53 
+# File NAME : C:\FLOWORK\flowork-gateway\app\etl\outbox.py total lines 91 
 ########################################################################
 
 import os
@@ -8,8 +8,9 @@ import sqlite3
 import json
 import time
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 DB_PATH = os.getenv("SQLITE_DB_PATH", "/app/data/gateway.db")
+_SQLITE_MAX_VARS = 500
 def _conn():
     con = sqlite3.connect(DB_PATH, timeout=5.0, isolation_level=None)
     con.execute("PRAGMA journal_mode=WAL;")
@@ -26,6 +27,8 @@ def init_outbox_schema():
       sent_at INTEGER
     );
     CREATE INDEX IF NOT EXISTS idx_outbox_unsent ON etl_outbox(sent_at) WHERE sent_at IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_outbox_topic_unsent ON etl_outbox(topic, created_at) WHERE sent_at IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_outbox_sent_at ON etl_outbox(sent_at) WHERE sent_at IS NOT NULL;
     """)
     con.close()
 def enqueue_event(topic:str, payload:Dict[str,Any]):
@@ -37,16 +40,51 @@ def enqueue_event(topic:str, payload:Dict[str,Any]):
     )
     con.commit(); con.close()
     return eid
-def pull_batch(limit:int=500):
+def pull_batch(limit:int=500, topic:Optional[str]=None):
     con = _conn()
-    rows = con.execute(
-      "SELECT id, topic, payload FROM etl_outbox WHERE sent_at IS NULL ORDER BY created_at ASC LIMIT ?",
-      (limit,)
-    ).fetchall()
+    if topic is None:
+        rows = con.execute(
+          "SELECT id, topic, payload FROM etl_outbox WHERE sent_at IS NULL ORDER BY created_at ASC LIMIT ?",
+          (limit,)
+        ).fetchall()
+    else:
+        rows = con.execute(
+          "SELECT id, topic, payload FROM etl_outbox WHERE sent_at IS NULL AND topic=? ORDER BY created_at ASC LIMIT ?",
+          (topic, limit)
+        ).fetchall()
     con.close()
     return [{"id":r[0], "topic": r[1], "payload": r[2]} for r in rows]
+def pending_topics() -> List[str]:
+    con = _conn()
+    rows = con.execute("SELECT DISTINCT topic FROM etl_outbox WHERE sent_at IS NULL").fetchall()
+    con.close()
+    return [r[0] for r in rows]
 def mark_sent(ids):
+    ids = list(ids)
+    if not ids:
+        return
     con = _conn()
     now = int(time.time())
-    con.executemany("UPDATE etl_outbox SET sent_at=? WHERE id=?", [(now, i) for i in ids])
-    con.commit(); con.close()
+    try:
+        con.execute("BEGIN")
+        for i in range(0, len(ids), _SQLITE_MAX_VARS):
+            chunk = ids[i:i + _SQLITE_MAX_VARS]
+            con.execute(
+              f"UPDATE etl_outbox SET sent_at=? WHERE id IN ({','.join('?' * len(chunk))})",
+              [now, *chunk]
+            )
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+def purge_sent(older_than_seconds:int, limit:int=5000) -> int:
+    con = _conn()
+    cutoff = int(time.time()) - older_than_seconds
+    cur = con.execute(
+      "DELETE FROM etl_outbox WHERE id IN (SELECT id FROM etl_outbox WHERE sent_at IS NOT NULL AND sent_at < ? LIMIT ?)",
+      (cutoff, limit)
+    )
+    con.close()
+    return cur.rowcount
@@ -0,0 +1,142 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\app\etl\sink.py total lines 143 
+########################################################################
+
+import os
+import sys
+import json
+import gzip
+import time
+import random
+import argparse
+import tempfile
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+log = logging.getLogger(__name__)
+class SinkStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = 0
+        self.batches = 0
+        self.bytes_in = 0
+        self.rejected = 0
+        self.first_at = None
+        self.last_at = None
+    def record(self, events:int, nbytes:int):
+        with self.lock:
+            now = time.monotonic()
+            self.first_at = self.first_at or now
+            self.last_at = now
+            self.events += events
+            self.batches += 1
+            self.bytes_in += nbytes
+    def snapshot(self):
+        with self.lock:
+            span = (self.last_at - self.first_at) if self.first_at and self.last_at else 0.0
+            return {
+                "events": self.events,
+                "batches": self.batches,
+                "bytes_in": self.bytes_in,
+                "rejected": self.rejected,
+                "events_per_sec": round(self.events / span, 1) if span > 0 else None,
+            }
+def _make_handler(stats:SinkStats, fail_rate:float, latency:float):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def log_message(self, *args):
+            pass
+        def _reply(self, code:int, body:dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        def do_GET(self):
+            self._reply(200, stats.snapshot())
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", "0") or 0))
+            if latency:
+                time.sleep(latency)
+            if fail_rate and random.random() < fail_rate:
+                with stats.lock:
+                    stats.rejected += 1
+                self._reply(503, {"error": "injected_failure"})
+                return
+            try:
+                body = gzip.decompress(raw) if self.headers.get("Content-Encoding") == "gzip" else raw
+                if "ndjson" in (self.headers.get("Content-Type") or ""):
+                    count = sum(1 for line in body.splitlines() if line.strip())
+                else:
+                    count = len(json.loads(body).get("events", []))
+            except Exception as e:
+                self._reply(400, {"error": str(e)})
+                return
+            stats.record(count, len(raw))
+            self._reply(200, {"accepted": count})
+    return _Handler
+def start_sink(host:str="127.0.0.1", port:int=0, fail_rate:float=0.0, latency:float=0.0):
+    stats = SinkStats()
+    server = ThreadingHTTPServer((host, port), _make_handler(stats, fail_rate, latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+def run_load_test(events:int=20000, topics:int=4, fail_rate:float=0.0, latency:float=0.0):
+    from . import outbox, exporter
+    server, stats = start_sink(fail_rate=fail_rate, latency=latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}/ingest"
+    tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    tmp.close()
+    outbox.DB_PATH = tmp.name
+    try:
+        outbox.init_outbox_schema()
+        con = outbox._conn()
+        con.execute("BEGIN")
+        now = int(time.time())
+        con.executemany(
+            "INSERT INTO etl_outbox(id, topic, payload, created_at) VALUES(?,?,?,?)",
+            [(f"evt-{i}", f"topic-{i % topics}", json.dumps({"seq": i, "data": "x" * 64}), now) for i in range(events)]
+        )
+        con.execute("COMMIT"); con.close()
+        exp = exporter.EtlExporter(url=url, api_key="loadtest", max_lanes=topics)
+        started = time.monotonic()
+        # drive the real sweep loop (same re-sweep pacing as production), not a tight dispatch loop
+        runner = threading.Thread(target=exp.loop, daemon=True, name="etl-loadtest-loop")
+        runner.start()
+        while outbox.pending_topics() or exp.busy():
+            time.sleep(0.05)
+        elapsed = time.monotonic() - started
+        exp.stop()
+        runner.join(timeout=5)
+        result = stats.snapshot()
+        result["elapsed_sec"] = round(elapsed, 3)
+        result["throughput_events_per_sec"] = round(events / elapsed, 1) if elapsed > 0 else None
+        return result
+    finally:
+        server.shutdown()
+        os.unlink(tmp.name)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local ETL sink for offline exporter load tests.")
+    parser.add_argument("--serve", action="store_true", help="Only run the sink and print stats on exit.")
+    parser.add_argument("--port", type=int, default=9911)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--topics", type=int, default=4)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    if args.serve:
+        server, stats = start_sink(port=args.port, fail_rate=args.fail_rate, latency=args.latency)
+        print(f"[ETL Sink] Listening on http://127.0.0.1:{args.port}/ingest (GET for stats)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(json.dumps(stats.snapshot()))
+            server.shutdown()
+        return 0
+    print(json.dumps(run_load_test(args.events, args.topics, args.fail_rate, args.latency), indent=2))
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\helpers.py total lines 666 
+# File NAME : C:\FLOWORK\flowork-gateway\app\helpers.py total lines 813 
 ########################################################################
 
 """
@@ -8,7 +8,7 @@ document : https://flowork.cloud/p-tinjauan-arsitektur-helperspy-dewa-tersembuny
 """
 
 import functools
-from flask import request, current_app as app, jsonify, g
+from flask import request, current_app as app, jsonify, g, after_this_request
 from functools import wraps
 import jwt
 import logging
@@ -18,8 +18,14 @@ import aiohttp
 import datetime
 import requests
 import threading
+import hashlib
+import hmac
+import base64
+import time
+from collections import OrderedDict
 
 from types import SimpleNamespace
+from sqlalchemy import func, text
 from sqlalchemy.orm import joinedload
 
 from .extensions import db
@@ -32,6 +38,12 @@ from eth_account.messages import encode_defunct
 
 logger = logging.getLogger('flowork_gateway')
 
+AUTH_MESSAGE_MAX_AGE = 300
+AUTH_SIG_CACHE_MAX = int(os.getenv("AUTH_SIG_CACHE_MAX", "20000"))
+AUTH_SESSION_TOKEN_TTL = int(os.getenv("AUTH_SESSION_TOKEN_TTL", "600"))
+_DUMMY_SECRETS = {"", "dev_dummy_secret_do_not_use_in_prod"}
+_session_token_warned = False
+
 
 def get_db():
 
@@ -112,6 +124,110 @@ def verify_web3_signature(address: str, message: str, signature: str) -> bool:
         return False
 
 
+def normalize_address(address: str) -> str:
+
+    return (address or "").strip().lower()
+
+_address_index_ready = False
+
+def _ensure_address_index(session):
+
+    # Tabel lama dibuat sebelum index lower(public_address) ada di model; create_all tidak menambahkannya.
+    global _address_index_ready
+    if _address_index_ready:
+        return
+    _address_index_ready = True
+    try:
+        session.execute(text("CREATE INDEX IF NOT EXISTS ix_users_public_address_lower ON users (lower(public_address))"))
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"[Helper] Could not ensure public_address index: {e}")
+
+def find_user_by_address(address: str, session=None):
+
+    session = session or db.session
+    _ensure_address_index(session)
+    return session.query(User).filter(func.lower(User.public_address) == normalize_address(address)).first()
+
+class VerifiedSignatureCache:
+    """
+    sha256(address|message|signature) -> (user_id, expires_at). Entry hidup selama pesan yang ditandatangani
+    masih valid (timestamp + AUTH_MESSAGE_MAX_AGE), jadi ECDSA recovery cukup sekali per pesan.
+    """
+    def __init__(self, max_entries: int = AUTH_SIG_CACHE_MAX):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(address: str, message: str, signature: str) -> str:
+        return hashlib.sha256(f"{normalize_address(address)}\x00{message}\x00{signature}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, user_id: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+signature_cache = VerifiedSignatureCache()
+
+def _session_token_secret():
+    """HMAC key for session tokens, or None when no real JWT_SECRET_KEY is configured (tokens disabled)."""
+    global _session_token_warned
+    secret = os.getenv("JWT_SECRET_KEY") or app.config.get('JWT_SECRET_KEY') or ''
+    if secret in _DUMMY_SECRETS:
+        if not _session_token_warned:
+            _session_token_warned = True
+            logger.warning("[Gateway Auth] JWT_SECRET_KEY is not set (or is the dev default). Session tokens are disabled; every request needs a signature.")
+        return None
+    return str(secret).encode('utf-8')
+
+def session_tokens_enabled() -> bool:
+    return AUTH_SESSION_TOKEN_TTL > 0 and _session_token_secret() is not None
+
+def issue_session_token(user_id: str, address: str, ttl: int = AUTH_SESSION_TOKEN_TTL):
+
+    secret = _session_token_secret()
+    if secret is None:
+        return None, None
+    expires_at = int(time.time()) + ttl
+    body = base64.urlsafe_b64encode(f"{user_id}|{normalize_address(address)}|{expires_at}".encode('utf-8')).decode('ascii').rstrip('=')
+    mac = hmac.new(secret, body.encode('ascii'), hashlib.sha256).hexdigest()
+    return f"{body}.{mac}", expires_at
+
+def verify_session_token(token: str, address: str):
+
+    secret = _session_token_secret()
+    if secret is None:
+        return None
+    try:
+        body, mac = token.rsplit('.', 1)
+        expected = hmac.new(secret, body.encode('ascii'), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(mac, expected):
+            return None
+        user_id, token_address, expires_at = base64.urlsafe_b64decode(body + '=' * (-len(body) % 4)).decode('utf-8').rsplit('|', 2)
+        if int(expires_at) < time.time() or token_address != normalize_address(address):
+            return None
+        return user_id
+    except Exception:
+        return None
+
 async def emit_error(sid, event_name, message, data=None):
 
     if data is None:
@@ -191,6 +307,19 @@ def crypto_auth_required(f):
         message = request.headers.get("X-Signed-Message")
         signature = request.headers.get("X-Signature")
         payload_v = request.headers.get("X-Payload-Version")
+        session_token = request.headers.get("X-Session-Token")
+
+        if not payload_v:
+            app_log.warning("[Gateway Auth] Access denied: Missing payload version header.")
+            return jsonify({"error": "Missing required authentication headers."}), 401
+
+        if address and session_token and session_tokens_enabled():
+            token_user_id = verify_session_token(session_token, address)
+            if token_user_id:
+                user = db.session.get(User, token_user_id)
+                if user:
+                    g.user = user
+                    return f(*args, **kwargs)
 
         if not all([address, message, signature, payload_v]):
             app_log.warning("[Gateway Auth] Access denied: Missing required auth headers.")
@@ -199,19 +328,27 @@ def crypto_auth_required(f):
         try:
             ts = int(message.split('|')[-1])
             now = int(datetime.datetime.utcnow().timestamp())
-            if abs(now - ts) > 300:
+            if abs(now - ts) > AUTH_MESSAGE_MAX_AGE:
                 app_log.warning(f"[Gateway Auth] Access denied: Stale timestamp for {address[:10]}.")
                 return jsonify({"error": "Stale authentication signature."}), 401
         except Exception:
             app_log.warning(f"[Gateway Auth] Access denied: Invalid message format for {address[:10]}.")
             return jsonify({"error": "Invalid authentication message format."}), 401
 
+        cache_key = signature_cache.key(address, message, signature)
+        cached_user_id = signature_cache.get(cache_key, time.time())
+        if cached_user_id:
+            user = db.session.get(User, cached_user_id)
+            if user:
+                g.user = user
+                return f(*args, **kwargs)
+
         if not verify_web3_signature(address, message, signature):
             app_log.warning(f"[Gateway Auth] Access denied: Invalid signature for {address[:10]}.")
             return jsonify({"error": "Invalid signature."}), 401
 
         try:
-            user = db.session.query(User).filter(User.public_address.ilike(address)).first()
+            user = find_user_by_address(address)
             if not user:
                 app_log.info(f"[Gateway Auth] New user authenticated: {address[:10]}. Creating user entry.")
                 placeholder_username = f"user_{address[:6]}...{address[-4:]}"
@@ -219,6 +356,16 @@ def crypto_auth_required(f):
                 db.session.add(user)
                 db.session.commit()
 
+            signature_cache.put(cache_key, user.id, ts + AUTH_MESSAGE_MAX_AGE)
+            if session_tokens_enabled():
+                token, token_expires = issue_session_token(user.id, address)
+
+                @after_this_request
+                def _attach_session_token(response):
+                    response.headers["X-Session-Token"] = token
+                    response.headers["X-Session-Token-Expires"] = str(token_expires)
+                    return response
+
             g.user = user
             return f(*args, **kwargs)
         except Exception as e:
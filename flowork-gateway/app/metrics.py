@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\metrics.py total lines 127 
+# File NAME : C:\FLOWORK\flowork-gateway\app\metrics.py total lines 156 
 ########################################################################
 
 """
@@ -108,6 +108,35 @@ ENQ_ENGINE_WINDOW_SIZE = Gauge(
     "Current engine rate limit window size.",
     ["engine_id"]
 )
+ETL_EVENTS_EXPORTED = Counter(
+    "gateway_etl_events_exported_total",
+    "Total outbox events delivered to the ETL sink.",
+    ["topic"]
+)
+ETL_EXPORT_FAILURES = Counter(
+    "gateway_etl_export_failures_total",
+    "Total failed ETL batch deliveries (after retries).",
+    ["topic"]
+)
+ETL_BATCH_SIZE = Gauge(
+    "gateway_etl_batch_size",
+    "Current adaptive ETL batch size per topic lane.",
+    ["topic"]
+)
+ETL_PURGED_TOTAL = Counter(
+    "gateway_etl_purged_total",
+    "Total sent outbox rows deleted by the retention purge."
+)
+OWNERSHIP_ENTRIES = Gauge(
+    "gateway_ownership_entries",
+    "Live entries in the job/execution/engine ownership maps.",
+    ["map"]
+)
+OWNERSHIP_EVICTIONS = Counter(
+    "gateway_ownership_evictions_total",
+    "Ownership entries dropped, by reason (ttl, lru).",
+    ["map", "reason"]
+)
 gateway_enqueue_engine_window_size = ENQ_ENGINE_WINDOW_SIZE
 _metrics_bp: Optional[Blueprint] = None
 def register_metrics(app):
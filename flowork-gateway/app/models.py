@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\models.py total lines 397 
+# File NAME : C:\FLOWORK\flowork-gateway\app\models.py total lines 398 
 ########################################################################
 
 from .extensions import db
@@ -29,6 +29,7 @@ class User(db.Model):
     status = db.Column(db.String, nullable=False, server_default='active')
     last_login_ip = db.Column(db.String, nullable=True)
     public_address = db.Column(db.String, unique=True, index=True, nullable=True)
+    __table_args__ = (Index('ix_users_public_address_lower', func.lower(public_address)),)
     engines = db.relationship('RegisteredEngine', foreign_keys='RegisteredEngine.user_id', back_populates='owner')
     subscriptions = db.relationship('Subscription', back_populates='user')
     states = db.relationship('State', back_populates='user')
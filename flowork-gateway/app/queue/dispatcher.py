@@ -1,12 +1,12 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\queue\dispatcher.py total lines 63 
+# File NAME : C:\FLOWORK\flowork-gateway\app\queue\dispatcher.py total lines 91 
 ########################################################################
 
 import os
 import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 USE_SHARDED = os.getenv("ENGINE_QUEUE_SHARDED", "true").lower() == "true"
 if USE_SHARDED:
     from .models_sharded import enqueue_job, queue_depth
@@ -15,6 +15,8 @@ else:
 from app.metrics import QUEUE_DEPTH
 from app.etl.outbox import enqueue_event
 from app.rl.limiter import RateLimitExceeded
+from app.engine.registry import engine_registry
+from app.engine.placement import get_placement_engine
 log = logging.getLogger(__name__)
 class QueueFullError(Exception):
 
@@ -30,6 +32,30 @@ class JobDispatcher:
     def check_rate_limit(self, remote_addr: str):
 
         pass
+    def _place(self, data: Dict[str, Any]) -> Tuple[str, int]:
+
+        # Callers pass the engines the user may run on (owned + shared); we never widen that set.
+        candidates = data.get("candidate_engines")
+        if not candidates:
+            raise ValueError("engine_id or candidate_engines is required.")
+        affinity_key = data.get("execution_id") if data.get("resumable", True) else None
+        placement = get_placement_engine()
+        tried = []
+        while True:
+            engine_id = placement.choose(candidates, affinity_key=affinity_key, exclude=tried)
+            if not engine_id:
+                if tried:
+                    raise QueueFullError("All candidate engine queues are full.")
+                raise NoEngineAvailableError("No live engine among candidates.")
+            current_depth = queue_depth(engine_id)
+            QUEUE_DEPTH.set(current_depth)
+            engine_registry.set_queue_depth(engine_id, current_depth)
+            if current_depth < self.max_queue:
+                return engine_id, current_depth
+            log.warning(f"[Dispatcher] Backpressure: Engine {engine_id} queue full ({current_depth}/{self.max_queue}), trying next candidate.")
+            if affinity_key:
+                placement.release(affinity_key)
+            tried.append(engine_id)
     def dispatch(self, data: Dict[str, Any], job_key: Optional[str] = None) -> str:
 
         user_id = data.get("user_id")
@@ -37,16 +63,18 @@ class JobDispatcher:
         payload = data.get("payload", {})
         priority = int(data.get("priority", self.default_priority))
         job_id = data.get("job_id")
-        if not engine_id:
-            raise ValueError("engine_id is currently required until smart routing is enabled.")
         if not user_id:
              raise ValueError("user_id is required.")
-        current_depth = queue_depth(engine_id)
-        QUEUE_DEPTH.set(current_depth)
-        if current_depth >= self.max_queue:
-            log.warning(f"[Dispatcher] Backpressure: Engine {engine_id} queue full ({current_depth}/{self.max_queue})")
-            raise QueueFullError(f"Queue for engine {engine_id} is full.")
+        if not engine_id:
+            engine_id, current_depth = self._place(data)
+        else:
+            current_depth = queue_depth(engine_id)
+            QUEUE_DEPTH.set(current_depth)
+            if current_depth >= self.max_queue:
+                log.warning(f"[Dispatcher] Backpressure: Engine {engine_id} queue full ({current_depth}/{self.max_queue})")
+                raise QueueFullError(f"Queue for engine {engine_id} is full.")
         final_jid = enqueue_job(engine_id, user_id, payload, priority=priority, job_id=job_id)
+        engine_registry.set_queue_depth(engine_id, current_depth + 1)
         enqueue_event("job_enqueued", {
             "job_id": final_jid,
             "engine_id": engine_id,
@@ -1,12 +1,12 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\routes\cluster.py total lines 61 
+# File NAME : C:\FLOWORK\flowork-gateway\app\routes\cluster.py total lines 66 
 ########################################################################
 
 import os
-import hashlib
 from typing import Dict, Tuple, Optional
 from flask import Blueprint, jsonify, request, current_app
+from app.cluster.sticky import pick_home_gateway
 cluster_bp = Blueprint("cluster_api", __name__, url_prefix="/api/v1/cluster")
 def _parse_peers(env_val: str) -> Dict[str, str]:
 
@@ -26,9 +26,14 @@ def _public_map(env_val: str) -> Dict[str, str]:
 def _sticky_pick(key: str, choices: Tuple[str, ...]) -> Optional[str]:
     if not choices:
         return None
-    h = hashlib.sha256(key.encode("utf-8")).digest()
-    idx = int.from_bytes(h[:4], "big") % len(choices)
-    return choices[idx]
+    try:
+        from app.cluster.peers import get_all_up_candidates, get_peer_weights
+        up = set(get_all_up_candidates())
+        weights = get_peer_weights()
+    except Exception:
+        up, weights = set(), {}
+    live = [c for c in choices if c in up] or list(choices)
+    return pick_home_gateway(key, live, weights)
 @cluster_bp.route("/resolve-home", methods=["GET"])
 def resolve_home():
 
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\routes\proxy.py total lines 531 
+# File NAME : C:\FLOWORK\flowork-gateway\app\routes\proxy.py total lines 555 
 ########################################################################
 
 """
@@ -10,10 +10,11 @@ from flask import Blueprint, request, jsonify, make_response, g, current_app, Re
 import requests
 import os
 from functools import wraps
-from ..helpers import crypto_auth_required, find_active_engine_session, get_db_session
-from ..extensions import db
+from ..helpers import crypto_auth_required, get_db_session
 from ..globals import globals_instance
-from ..models import RegisteredEngine, EngineShare
+from ..models import RegisteredEngine, EngineShare, UserEngineSession
+from ..engine.registry import engine_registry
+from ..engine.placement import get_placement_engine
 
 proxy_bp = Blueprint("proxy", __name__)
 
@@ -25,7 +26,8 @@ def handle_cors_options(f):
         if request.method == 'OPTIONS':
             response = make_response()
             response.headers.add("Access-Control-Allow-Origin", request.headers.get('Origin', '*'))
-            response.headers.add("Access-Control-Allow-Headers", "Content-Type, Authorization, X-API-Key, X-Flowork-User-ID, X-Flowork-Engine-ID, X-Gateway-Secret, x-signed-message, x-signature, x-user-address, x-payload-version, x-gateway-token")
+            response.headers.add("Access-Control-Allow-Headers", "Content-Type, Authorization, X-API-Key, X-Flowork-User-ID, X-Flowork-Engine-ID, X-Gateway-Secret, x-signed-message, x-signature, x-user-address, x-payload-version, x-gateway-token, x-session-token")
+            response.headers.add("Access-Control-Expose-Headers", "X-Session-Token, X-Session-Token-Expires")
             response.headers.add("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, PATCH, OPTIONS")
             response.headers.add("Access-Control-Allow-Credentials", "true")
             return response
@@ -35,6 +37,10 @@ def handle_cors_options(f):
 def _resolve_target_engine_url(user, target_engine_id):
     engine_manager = globals_instance.engine_manager
 
+    node = engine_registry.get_node(target_engine_id)
+    if node is not None and node.url:
+        return node.url, None
+
     if target_engine_id in engine_manager.engine_url_map:
         return engine_manager.engine_url_map[target_engine_id], None
 
@@ -60,6 +66,25 @@ def _resolve_target_engine_url(user, target_engine_id):
     finally:
         session.close()
 
+def _pick_active_engine_for_user(user):
+    """
+    Pilih engine aktif milik user dengan beban paling ringan (vitals + queue depth dari registry).
+    """
+    session = get_db_session()
+    try:
+        rows = session.query(UserEngineSession.engine_id).filter_by(user_id=user.id, is_active=True).all()
+    except Exception as e:
+        current_app.logger.error(f"[Proxy] DB Error while listing active engines: {str(e)}")
+        return None
+    finally:
+        session.close()
+    engine_ids = [str(r[0]) for r in rows]
+    if not engine_ids:
+        return None
+    if len(engine_ids) == 1:
+        return engine_ids[0]
+    return get_placement_engine().choose(engine_ids) or engine_ids[0]
+
 def _proxy_generic_request(subpath):
     """
     Generic Proxy Function with Enhanced Error Handling & Streaming Support
@@ -86,9 +111,8 @@ def _proxy_generic_request(subpath):
 
         if not core_server_url:
             if current_user:
-                active_session = find_active_engine_session(db.session, current_user.id)
-                if active_session and active_session.engine:
-                     active_id = active_session.engine.id
+                active_id = _pick_active_engine_for_user(current_user)
+                if active_id:
                      url, err = _resolve_target_engine_url(current_user, active_id)
                      if url:
                          core_server_url = url
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\routes\shares.py total lines 255 
+# File NAME : C:\FLOWORK\flowork-gateway\app\routes\shares.py total lines 258 
 ########################################################################
 
 from flask import Blueprint, jsonify, g, request, current_app
@@ -9,7 +9,8 @@ import secrets
 import uuid  # [FIX] Wajib import uuid di sini biar gak error pas bikin user baru
 from app.extensions import db, socketio
 from app.models import User, RegisteredEngine, EngineShare
-from app.helpers import crypto_auth_required, get_request_data
+from app.helpers import crypto_auth_required, get_request_data, find_user_by_address
+from app.engine.audience import engine_audience
 from web3.auto import w3
 from werkzeug.security import generate_password_hash
 
@@ -83,7 +84,7 @@ def create_share():
     except Exception:
         return jsonify({"error": "Invalid guest public address format"}), 400
 
-    guest_user = User.query.filter(User.public_address.ilike(checked_guest_address)).first()
+    guest_user = find_user_by_address(checked_guest_address)
 
     if not guest_user:
         current_app.logger.info(f"[Shares] Creating new user record for guest: {checked_guest_address}")
@@ -156,6 +157,7 @@ def create_share():
             )
             db.session.add(new_share)
             db.session.commit()
+            engine_audience.on_share_created(engine.id, guest_user.id)
 
             socketio.emit(
                 'force_refresh_auth_list',
@@ -228,6 +230,7 @@ def delete_share():
 
         db.session.delete(share)
         db.session.commit()
+        engine_audience.on_share_deleted(engine_id_str, user_id_revoked, owner_id=engine.user_id)
 
         current_app.logger.info(f"[Shares] Share (User: {user_address_revoked}) deleted from engine {engine_id_str} by owner.")
 
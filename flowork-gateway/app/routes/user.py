@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\routes\user.py total lines 725 
+# File NAME : C:\FLOWORK\flowork-gateway\app\routes\user.py total lines 730 
 ########################################################################
 
 from flask import Blueprint, jsonify, request, current_app, g
@@ -15,10 +15,12 @@ from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 from ..models import User, RegisteredEngine, Subscription, EngineShare
 from ..extensions import db, socketio
+from ..engine.audience import engine_audience
 from ..helpers import (
     crypto_auth_required,
     get_request_data,
-    get_user_permissions
+    get_user_permissions,
+    find_user_by_address
 )
 from ..globals import globals_instance, pending_auths
 from web3.auto import w3
@@ -224,7 +226,7 @@ def update_user_profile():
 @user_bp.route('/public/<identifier>', methods=['GET'])
 def get_public_profile(identifier):
     try:
-        user = User.query.filter(User.public_address.ilike(identifier)).first()
+        user = find_user_by_address(identifier)
         if not user:
             user = User.query.filter(User.username.ilike(identifier)).first()
         if not user:
@@ -476,6 +478,7 @@ def delete_user_engine(engine_id):
 
         db.session.delete(engine)
         db.session.commit()
+        engine_audience.invalidate(engine_id)
 
         socketio.emit("engine_deleted", {"engine_id": engine_id}, to=current_user.id, namespace="/gui-socket")
         return jsonify({'message': 'Engine deleted successfully'})
@@ -533,7 +536,7 @@ def share_engine(engine_id):
     except Exception:
         return jsonify({"error": "Invalid guest public address"}), 400
 
-    guest_user = User.query.filter(User.public_address.ilike(checked_guest_address)).first()
+    guest_user = find_user_by_address(checked_guest_address)
     if not guest_user:
         placeholder_email = f"{checked_guest_address.lower()}@flowork.crypto"
         existing_email = User.query.filter(User.email.ilike(placeholder_email)).first()
@@ -578,6 +581,7 @@ def share_engine(engine_id):
             )
             db.session.add(new_share)
             db.session.commit()
+            engine_audience.on_share_created(engine.id, guest_user.id)
 
             socketio.emit('new_shared_engine', {
                 'id': engine.id,
@@ -611,6 +615,7 @@ def revoke_share_endpoint(engine_id, shared_user_id):
     try:
         db.session.delete(share)
         db.session.commit()
+        engine_audience.on_share_deleted(engine_id, shared_user_id, owner_id=engine.user_id)
         socketio.emit('removed_shared_engine', {'engine_id': engine_id}, room=str(shared_user_id), namespace='/gui-socket')
         return jsonify({"message": "Share revoked successfully"}), 200
     except Exception as e:
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\sockets.py total lines 2009 
+# File NAME : C:\FLOWORK\flowork-gateway\app\sockets.py total lines 2011 
 ########################################################################
 
 """
@@ -25,14 +25,19 @@ from .globals import globals_instance
 from .helpers import (
     get_db_session,
     find_active_engine_session,
+    find_user_by_address,
     verify_web3_signature
 )
 from .sharing_fac import build_fac_for_shared_engine
+from .engine.registry import engine_registry
+from .engine.audience import engine_audience
+from .engine.ownership import get_ownership_registry, TERMINAL_STATUSES
 
 g_swarm_task_registry = {}
-g_job_ownership = {}       # Maps Job ID -> User ID
-g_execution_ownership = {} # Maps Execution ID -> User ID
-g_engine_active_job = {}   # Maps Engine ID -> Current Job ID (For events missing job_id like Popups)
+g_ownership = get_ownership_registry()
+g_job_ownership = g_ownership.jobs             # Maps Job ID -> User ID
+g_execution_ownership = g_ownership.executions # Maps Execution ID -> User ID
+g_engine_active_job = g_ownership.engine_jobs  # Maps Engine ID -> Current Job ID (For events missing job_id like Popups)
 
 def _redact_content(text: str) -> str:
     if not isinstance(text, str):
@@ -84,25 +89,12 @@ def _broadcast_response(engine_id: str, event_name: str, data):
     """
     Mengirimkan event ke Owner DAN semua Guest yang punya akses ke Engine ini.
     Hanya digunakan untuk event umum (Status Engine, Vitals).
+    Audience diambil dari index in-memory (room per engine), bukan query DB per event.
     """
-    app = current_app._get_current_object()
-    session = get_db_session()
     try:
-        engine = session.query(RegisteredEngine).filter_by(id=engine_id).first()
-        if engine:
-            sio.emit(event_name, data, room=str(engine.user_id), namespace='/gui-socket')
-
-        shares = session.query(EngineShare).filter_by(engine_id=engine_id).all()
-        for share in shares:
-            try:
-                sio.emit(event_name, data, room=str(share.user_id), namespace='/gui-socket')
-            except Exception as loop_err:
-                app.logger.error(f"[Broadcast] Failed to emit to guest {share.user_id}: {loop_err}")
-
+        engine_audience.broadcast(engine_id, event_name, data)
     except Exception as e:
-        app.logger.error(f"[Broadcast] Error broadcasting {event_name}: {e}")
-    finally:
-        session.close()
+        current_app.logger.error(f"[Broadcast] Error broadcasting {event_name}: {e}")
 
 def _resolve_sid_via_share_token(session, share_token):
     """
@@ -196,6 +188,7 @@ def on_engine_disconnect():
     app.logger.info(f"[Gateway Engine Disconnect] Engine {engine_id} (User: {user_id}) disconnected. SID: {sid}")
 
     removed_sid = globals_instance.engine_manager.active_engine_sessions.pop(engine_id, None)
+    engine_registry.mark_offline(engine_id)
     if removed_sid:
         app.logger.info(f"[Gateway Engine Disconnect] Removed live SID {removed_sid} for Engine {engine_id} from active session map.")
     else:
@@ -269,6 +262,7 @@ def handle_engine_ready(data):
     globals_instance.engine_manager.active_engine_sessions[engine_id] = sid
     if internal_api_url:
         globals_instance.engine_manager.engine_url_map[engine_id] = internal_api_url
+    engine_registry.observe_heartbeat(engine_id, url=internal_api_url)
 
     session = get_db_session()
     try:
@@ -332,6 +326,7 @@ def handle_engine_vitals_update(data=None):
 
     if internal_url:
         globals_instance.engine_manager.engine_url_map[engine_id] = internal_url
+    engine_registry.observe_heartbeat(engine_id, url=internal_url, vitals=payload)
 
     session = get_db_session()
     try:
@@ -543,26 +538,34 @@ def on_forward_event_to_gui(data):
     job_id = event_data.get('job_id')
     execution_id = event_data.get('execution_id')
 
+    is_completion = event_name == 'JOB_COMPLETED_CHECK'
     if event_name == 'WORKFLOW_EXECUTION_UPDATE':
         status = event_data.get('status') or (event_data.get('status_data') or {}).get('status')
         if status == 'RUNNING' and current_engine_id and job_id:
-            g_engine_active_job[current_engine_id] = job_id
-            if execution_id and g_execution_ownership.get(execution_id):
-                g_job_ownership[job_id] = g_execution_ownership[execution_id]
+            g_engine_active_job.set(current_engine_id, job_id)
+            owner = g_execution_ownership.get(execution_id)
+            if owner:
+                g_job_ownership.set(job_id, owner)
+        elif isinstance(status, str) and status.upper() in TERMINAL_STATUSES:
+            is_completion = True
 
     if not job_id and current_engine_id:
         inferred_job_id = g_engine_active_job.get(current_engine_id)
         if inferred_job_id:
             job_id = inferred_job_id
 
-    if not target_user_id and execution_id and g_execution_ownership.get(execution_id):
-         target_user_id = g_execution_ownership[execution_id]
+    if not target_user_id:
+        target_user_id = g_execution_ownership.get(execution_id)
+
+    if not target_user_id:
+        target_user_id = g_job_ownership.get(job_id)
 
-    if not target_user_id and job_id and g_job_ownership.get(job_id):
-        target_user_id = g_job_ownership[job_id]
+    if not target_user_id:
+        target_user_id = g_execution_ownership.get(job_id)
 
-    if not target_user_id and job_id and g_execution_ownership.get(job_id):
-         target_user_id = g_execution_ownership[job_id]
+    if is_completion:
+        # Keep the entries for a short grace window so trailing log/popup events still route.
+        g_ownership.on_completed(current_engine_id, job_id, execution_id)
 
     BROADCAST_EVENTS = {
         'JOB_COMPLETED_CHECK',
@@ -655,7 +658,7 @@ def on_gui_connect(auth):
 
     session = get_db_session()
     try:
-        user = session.query(User).filter(User.public_address.ilike(address)).first()
+        user = find_user_by_address(address, session)
 
         if not user:
             app.logger.info(f"[Gateway GUI] First-time login for {address}. Auto-provisioning new user record.")
@@ -711,6 +714,7 @@ def on_gui_connect(auth):
                 'vitals': None
             })
 
+        engine_audience.join_gui(sid, [eng.id for eng in all_engines if eng])
         sio.emit('initial_engine_statuses', statuses, room=sid, namespace='/gui-socket')
         return True
 
@@ -1246,8 +1250,7 @@ def on_execute_workflow(data):
     job_id = payload.get('job_id') # Get Job ID provided by Frontend
 
     if job_id:
-        g_job_ownership[job_id] = user_id
-        g_execution_ownership[job_id] = user_id
+        g_ownership.claim(job_id, user_id)
 
     session = get_db_session()
     try:
@@ -1290,8 +1293,7 @@ def on_execute_standalone_node(data):
     job_id = payload.get('job_id')
 
     if job_id:
-        g_job_ownership[job_id] = user_id
-        g_execution_ownership[job_id] = user_id
+        g_ownership.claim(job_id, user_id)
 
     session = get_db_session()
     try:
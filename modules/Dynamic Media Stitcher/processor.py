@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\modules\Dynamic Media Stitcher\processor.py total lines 365 
+# File NAME : C:\FLOWORK\modules\Dynamic Media Stitcher\processor.py total lines 362 
 ########################################################################
 
 import os
@@ -11,8 +11,11 @@ import math
 import time
 import random
 import shutil
+import importlib.util
 from flowork_kernel.api_contract import BaseModule, IExecutable, IDataPreviewer
 from flowork_kernel.utils.file_helper import sanitize_filename
+from flowork_kernel.utils.media_probe import get_media_probe
+from flowork_kernel.utils.whisper_pool import get_whisper_pool
 import uuid
 import re
 
@@ -23,11 +26,8 @@ def get_startup_info():
         return info
     return None
 
-try:
-    from faster_whisper import WhisperModel
-    FASTER_WHISPER_AVAILABLE = True
-except ImportError:
-    FASTER_WHISPER_AVAILABLE = False
+# Model dimuat lewat whisper_pool; di sini cukup cek library-nya ada.
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
 
 class DynamicMediaStitcherModule(BaseModule, IExecutable, IDataPreviewer):
 
@@ -36,7 +36,8 @@ class DynamicMediaStitcherModule(BaseModule, IExecutable, IDataPreviewer):
     def __init__(self, module_id, services):
         super().__init__(module_id, services)
         self.ffmpeg_path, self.ffprobe_path = self._find_ffmpeg_tools()
-        self.whisper_model_cache = {}
+        self.media_probe = get_media_probe(self.ffprobe_path, self.kernel.data_path)
+        self.whisper_pool = get_whisper_pool(self.kernel)
         self.fonts_path = os.path.join(self.kernel.data_path, "fonts")
         os.makedirs(self.fonts_path, exist_ok=True)
         self._ensure_icon()
@@ -127,6 +128,9 @@ class DynamicMediaStitcherModule(BaseModule, IExecutable, IDataPreviewer):
                 self.logger(f"{job_label} empty folders.", "WARN")
                 continue
 
+            # Probe semua file sekali (paralel); _gather_clips berikutnya cuma baca cache.
+            self.media_probe.prime(v_files + a_files)
+
             if duration_ref == "audio":
                 for audio_idx, a_path in enumerate(a_files):
                     status_updater(f"Processing Audio {audio_idx+1}/{len(a_files)}: {os.path.basename(a_path)}", "INFO")
@@ -214,11 +218,7 @@ class DynamicMediaStitcherModule(BaseModule, IExecutable, IDataPreviewer):
 
     def _get_duration(self, p):
         if not self.ffprobe_path: return 0
-        cmd = [self.ffprobe_path, "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", p]
-        try:
-            res = subprocess.run(cmd, capture_output=True, text=True, startupinfo=get_startup_info())
-            return float(res.stdout.strip())
-        except: return 0
+        return self.media_probe.duration(p)
 
     def _gather_clips(self, pool, target):
         used = []
@@ -263,8 +263,8 @@ class DynamicMediaStitcherModule(BaseModule, IExecutable, IDataPreviewer):
 
         if cfg.get("add_subtitles", True):
             try:
-                model = self._get_whisper_model(cfg.get("subtitle_model_size", "base"), updater)
-                ass = self._gen_ass(aud, model, cfg)
+                with self._get_whisper_model(cfg.get("subtitle_model_size", "base"), updater) as model:
+                    ass = self._gen_ass(aud, model, cfg)
                 if ass:
                      safe_ass = ass.replace("\\", "/").replace(":", "\\:")
                      vf += f",subtitles='{safe_ass}'"
@@ -275,13 +275,10 @@ class DynamicMediaStitcherModule(BaseModule, IExecutable, IDataPreviewer):
         subprocess.run(cmd, check=True, timeout=self.process_timeout, startupinfo=get_startup_info())
 
     def _get_whisper_model(self, size, updater):
-        if size in self.whisper_model_cache: return self.whisper_model_cache[size]
         if not FASTER_WHISPER_AVAILABLE:
             raise Exception("faster-whisper library not installed. Please run 'pip install faster-whisper'")
         updater("Loading AI...", "INFO")
-        m = WhisperModel(size, device="auto", compute_type="int8")
-        self.whisper_model_cache[size] = m
-        return m
+        return self.whisper_pool.lease(size, device="auto")
 
     def _gen_ass(self, aud, model, cfg):
         segments, _ = model.transcribe(aud, language="id", word_timestamps=True)
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\modules\auto_content_factory_v1\processor.py total lines 306 
+# File NAME : C:\FLOWORK\modules\auto_content_factory_v1\processor.py total lines 307 
 ########################################################################
 
 import os
@@ -12,14 +12,15 @@ import shutil
 import time
 import math
 import gc
+import importlib.util
+from contextlib import ExitStack
 from flowork_kernel.api_contract import BaseModule, IExecutable
 from flowork_kernel.utils.file_helper import sanitize_filename
+from flowork_kernel.utils.media_probe import get_media_probe
+from flowork_kernel.utils.whisper_pool import get_whisper_pool
 
-try:
-    from faster_whisper import WhisperModel
-    FASTER_WHISPER_AVAILABLE = True
-except ImportError:
-    FASTER_WHISPER_AVAILABLE = False
+# Model dimuat lewat whisper_pool; di sini cukup cek library-nya ada.
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
 
 class AutoContentFactoryModule(BaseModule, IExecutable):
 
@@ -54,6 +55,7 @@ class AutoContentFactoryModule(BaseModule, IExecutable):
         if not self.temp_root: self.temp_root = os.path.join(self.kernel.data_path, "factory_cache")
         if not self.ffmpeg_path: self.ffmpeg_path, self.ffprobe_path = self._find_ffmpeg_tools()
         if not self.ffmpeg_path: return self._error("FFmpeg not found.", status_updater)
+        self.media_probe = get_media_probe(self.ffprobe_path, self.kernel.data_path)
 
         layer_pairs = config.get("layer_pairs", [])
         output_folder = config.get("output_folder")
@@ -72,14 +74,6 @@ class AutoContentFactoryModule(BaseModule, IExecutable):
         os.makedirs(shreds_root, exist_ok=True)
         os.makedirs(parts_root, exist_ok=True)
 
-        whisper = None
-        if do_subs and FASTER_WHISPER_AVAILABLE:
-            status_updater("Fase 0: Loading AI Subtitle Model...", "INFO")
-            try:
-                whisper = WhisperModel("base", device="auto", compute_type="int8")
-            except Exception as e:
-                self.logger(f"Failed to load Whisper: {e}", "WARN")
-
         layer_shred_pools = {}
         layer_audio_sources = {}
 
@@ -93,6 +87,7 @@ class AutoContentFactoryModule(BaseModule, IExecutable):
             audios = [os.path.join(aud_src, f) for f in os.listdir(aud_src) if f.lower().endswith(('.mp3','.wav','.m4a'))]
             random.shuffle(audios)
             layer_audio_sources[idx] = audios
+            self.media_probe.prime(audios)
 
             current_shred_folder = os.path.join(shreds_root, f"L{idx}")
             os.makedirs(current_shred_folder, exist_ok=True)
@@ -119,54 +114,65 @@ class AutoContentFactoryModule(BaseModule, IExecutable):
 
         generated_parts_pools = {}
 
-        for idx, audios in layer_audio_sources.items():
-            shreds_pool = layer_shred_pools.get(idx, [])
-            generated_parts_pools[idx] = []
-            layer_part_folder = os.path.join(parts_root, f"L{idx}")
-            os.makedirs(layer_part_folder, exist_ok=True)
+        # Lease dipegang sepanjang Fase 2, supaya model tidak di-evict budget memori di antara part.
+        with ExitStack() as whisper_lease:
+            whisper = None
+            if do_subs and FASTER_WHISPER_AVAILABLE:
+                status_updater("Fase 2: Loading AI Subtitle Model...", "INFO")
+                self.whisper_pool = get_whisper_pool(self.kernel)
+                try:
+                    whisper = whisper_lease.enter_context(self.whisper_pool.lease("base", device="auto"))
+                except Exception as e:
+                    self.logger(f"Failed to load Whisper: {e}", "WARN")
 
-            status_updater(f"Fase 2: Compositing Layer {idx+1}...", "INFO")
+            for idx, audios in layer_audio_sources.items():
+                shreds_pool = layer_shred_pools.get(idx, [])
+                generated_parts_pools[idx] = []
+                layer_part_folder = os.path.join(parts_root, f"L{idx}")
+                os.makedirs(layer_part_folder, exist_ok=True)
 
-            for aud_path in audios:
-                if not shreds_pool:
-                    self.logger(f"Layer {idx+1} kehabisan stok video unik. Stop produksi layer ini.", "WARN")
-                    break
+                status_updater(f"Fase 2: Compositing Layer {idx+1}...", "INFO")
 
-                dur = self._get_duration(aud_path)
-                if dur <= 0: continue
+                for aud_path in audios:
+                    if not shreds_pool:
+                        self.logger(f"Layer {idx+1} kehabisan stok video unik. Stop produksi layer ini.", "WARN")
+                        break
 
-                needed_clips_count = math.ceil(dur / clip_duration)
+                    dur = self._get_duration(aud_path)
+                    if dur <= 0: continue
 
-                if len(shreds_pool) < needed_clips_count:
-                    self.logger(f"Layer {idx+1} sisa stok ({len(shreds_pool)}) tidak cukup untuk audio {os.path.basename(aud_path)} (butuh {needed_clips_count}). Skip audio ini.", "WARN")
-                    continue
+                    needed_clips_count = math.ceil(dur / clip_duration)
 
-                chosen_clips = []
-                for _ in range(needed_clips_count):
-                    chosen_clips.append(shreds_pool.pop(0))
+                    if len(shreds_pool) < needed_clips_count:
+                        self.logger(f"Layer {idx+1} sisa stok ({len(shreds_pool)}) tidak cukup untuk audio {os.path.basename(aud_path)} (butuh {needed_clips_count}). Skip audio ini.", "WARN")
+                        continue
 
-                temp_vis = os.path.join(session_root, f"t_vis_{uuid.uuid4()}.mp4")
-                self._safe_concat_clips(chosen_clips, temp_vis)
+                    chosen_clips = []
+                    for _ in range(needed_clips_count):
+                        chosen_clips.append(shreds_pool.pop(0))
 
-                for used_clip in chosen_clips:
-                    try: os.remove(used_clip)
-                    except: pass
+                    temp_vis = os.path.join(session_root, f"t_vis_{uuid.uuid4()}.mp4")
+                    self._safe_concat_clips(chosen_clips, temp_vis)
 
-                part_name = f"part_L{idx}_{uuid.uuid4().hex[:6]}.mp4"
-                part_path = os.path.join(layer_part_folder, part_name)
+                    for used_clip in chosen_clips:
+                        try: os.remove(used_clip)
+                        except: pass
 
-                try:
-                    self._render_part_final(temp_vis, aud_path, part_path, dur, config, whisper)
-                    if os.path.exists(part_path):
-                        generated_parts_pools[idx].append(part_path)
-                except Exception as e:
-                    self.logger(f"Gagal render part layer {idx+1}: {e}", "ERROR")
+                    part_name = f"part_L{idx}_{uuid.uuid4().hex[:6]}.mp4"
+                    part_path = os.path.join(layer_part_folder, part_name)
 
-                if os.path.exists(temp_vis):
-                    try: os.remove(temp_vis)
-                    except: pass
+                    try:
+                        self._render_part_final(temp_vis, aud_path, part_path, dur, config, whisper)
+                        if os.path.exists(part_path):
+                            generated_parts_pools[idx].append(part_path)
+                    except Exception as e:
+                        self.logger(f"Gagal render part layer {idx+1}: {e}", "ERROR")
 
-                gc.collect()
+                    if os.path.exists(temp_vis):
+                        try: os.remove(temp_vis)
+                        except: pass
+
+                    gc.collect()
 
         counts = [len(pool) for idx, pool in generated_parts_pools.items()]
 
@@ -213,12 +219,7 @@ class AutoContentFactoryModule(BaseModule, IExecutable):
 
 
     def _get_duration(self, path):
-        cmd = [self.ffprobe_path, "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", path]
-        try:
-            r = subprocess.run(cmd, capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW if os.name=='nt' else 0)
-            val = r.stdout.strip()
-            return float(val) if val else 0
-        except: return 0
+        return self.media_probe.duration(path)
 
     def _safe_concat_clips(self, clips, out):
         list_f = out + ".txt"
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\modules\batch_video_splitter_c3d4\processor.py total lines 180 
+# File NAME : C:\FLOWORK\modules\batch_video_splitter_c3d4\processor.py total lines 236 
 ########################################################################
 
 import os
@@ -9,6 +9,8 @@ import subprocess
 import shutil
 from flowork_kernel.api_contract import BaseModule, IExecutable, IDataPreviewer
 from flowork_kernel.utils.file_helper import sanitize_filename
+from flowork_kernel.utils.media_probe import get_media_probe
+from flowork_kernel.utils.media_jobs import get_media_jobs, job_key, mp4_copy_compatible, outputs_valid
 import uuid
 
 def get_startup_info():
@@ -25,6 +27,9 @@ class BatchVideoSplitterModule(BaseModule, IExecutable, IDataPreviewer):
     def __init__(self, module_id, services):
         super().__init__(module_id, services)
         self.ffmpeg_path = self._find_ffmpeg()
+        self.ffprobe_path = self._find_ffprobe()
+        self.media_probe = get_media_probe(self.ffprobe_path, self.kernel.data_path)
+        self.media_jobs = get_media_jobs()
         self._ensure_icon()
 
     def _ensure_icon(self):
@@ -47,6 +52,15 @@ class BatchVideoSplitterModule(BaseModule, IExecutable, IDataPreviewer):
             return path
         return "ffmpeg"
 
+    def _find_ffprobe(self):
+        ffprobe_executable = "ffprobe.exe" if os.name == "nt" else "ffprobe"
+        path = os.path.join(
+            self.kernel.project_root_path, "vendor", "ffmpeg", "bin", ffprobe_executable
+        )
+        if os.path.exists(path):
+            return path
+        return shutil.which("ffprobe") or "ffprobe"
+
     def execute(
         self, payload: dict, config: dict, status_updater, mode="EXECUTE", **kwargs
     ):
@@ -63,6 +77,7 @@ class BatchVideoSplitterModule(BaseModule, IExecutable, IDataPreviewer):
         segment_duration = config.get("segment_duration", 3)
         folder_pairs = config.get("folder_pairs", [])
         process_timeout = config.get("process_timeout", 600)
+        max_parallel = int(config.get("max_parallel_jobs", 0) or 0)
 
         if not folder_pairs:
             self.logger("No folder pairs provided.", "WARN")
@@ -70,9 +85,8 @@ class BatchVideoSplitterModule(BaseModule, IExecutable, IDataPreviewer):
 
         status_updater(f"Starting batch split (Duration: {segment_duration}s)...", "INFO")
 
-        total_processed_all_jobs = 0
-        total_segments_all_jobs = 0
         all_results = []
+        jobs = []
 
         for pair in folder_pairs:
             source_folder = pair.get("source")
@@ -97,75 +111,53 @@ class BatchVideoSplitterModule(BaseModule, IExecutable, IDataPreviewer):
 
             video_extensions = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".ts")
             files = [
-                f for f in os.listdir(source_folder)
+                os.path.join(source_folder, f) for f in os.listdir(source_folder)
                 if f.lower().endswith(video_extensions)
             ]
 
             status_updater(f"Found {len(files)} videos in {source_folder}", "INFO")
+            # Probe paralel sekali di depan; keputusan copy/encode per file lalu tinggal baca cache.
+            self.media_probe.prime(files)
 
-            processed_count_job = 0
-            total_segments_job = 0
-
-            for i, filename in enumerate(files):
-                input_path = os.path.join(source_folder, filename)
-                file_base_name = os.path.splitext(filename)[0]
-                safe_base_name = sanitize_filename(file_base_name)
-
-                output_pattern = os.path.join(
-                    output_folder, f"{safe_base_name}_%03d.mp4"
-                )
-
-                cmd = [
-                    self.ffmpeg_path,
-                    "-i", input_path,
-                    "-c", "copy",
-                    "-map", "0",
-                    "-segment_time", str(segment_duration),
-                    "-f", "segment",
-                    "-reset_timestamps", "1",
-                    output_pattern,
-                    "-y"
-                ]
-
-                status_updater(f"Processing: {filename} ({i+1}/{len(files)})", "INFO")
-
-                try:
-                    subprocess.run(
-                        cmd,
-                        check=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        timeout=process_timeout,
-                        startupinfo=get_startup_info(),
-                        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-                    )
-
-                    processed_count_job += 1
-
-                    generated_segments = len([
-                        f for f in os.listdir(output_folder)
-                        if f.startswith(safe_base_name) and f.endswith(".mp4")
-                    ])
-                    total_segments_job += generated_segments
-
-                except subprocess.TimeoutExpired:
-                    self.logger(f"Timeout processing '{filename}'. Killed.", "ERROR")
-                    continue
-                except Exception as e:
-                    self.logger(f"Error on '{filename}': {str(e)}", "ERROR")
-                    continue
-
-            total_processed_all_jobs += processed_count_job
-            total_segments_all_jobs += total_segments_job
-
-            all_results.append({
+            result = {
                 "source": source_folder,
                 "output": output_folder,
-                "files_processed": processed_count_job
-            })
+                "files_processed": 0,
+                "files_skipped": 0,
+                "segments_created": 0
+            }
+            all_results.append(result)
+            jobs.extend((result, input_path) for input_path in files)
+
+        status_updater(f"Queued {len(jobs)} videos ({max_parallel or self.media_jobs.default_parallel()} in parallel).", "INFO")
+
+        def run_job(job):
+            result, input_path = job
+            return self._split_file(input_path, result["output"], segment_duration, process_timeout)
+
+        finished = 0
+        for (result, input_path), outcome, error in self.media_jobs.map(run_job, jobs, max_parallel, "video-split"):
+            finished += 1
+            filename = os.path.basename(input_path)
+            if isinstance(error, subprocess.TimeoutExpired):
+                self.logger(f"Timeout processing '{filename}'. Killed.", "ERROR")
+                continue
+            if error is not None:
+                self.logger(f"Error on '{filename}': {str(error)}", "ERROR")
+                continue
+            segments, skipped = outcome
+            result["files_processed"] += 1
+            if skipped:
+                result["files_skipped"] += 1
+            else:
+                result["segments_created"] += len(segments)
+            status_updater(f"{'Already split' if skipped else 'Processed'}: {filename} ({finished}/{len(jobs)})", "INFO")
+
+        total_processed_all_jobs = sum(r["files_processed"] for r in all_results)
+        total_skipped_all_jobs = sum(r["files_skipped"] for r in all_results)
 
         status_updater(
-            f"Batch split complete. Processed: {total_processed_all_jobs} files.",
+            f"Batch split complete. Processed: {total_processed_all_jobs} files ({total_skipped_all_jobs} already done).",
             "SUCCESS",
         )
 
@@ -173,7 +165,71 @@ class BatchVideoSplitterModule(BaseModule, IExecutable, IDataPreviewer):
             payload["data"] = {}
 
         payload["data"]["batch_results"] = all_results
+        payload["data"]["total_files_processed"] = total_processed_all_jobs
         return {"payload": payload, "output_name": "success"}
 
+    def _split_file(self, input_path, output_folder, segment_duration, process_timeout):
+        """Returns (segment paths, skipped). Skips sources whose segments from an earlier run are still complete."""
+        ledger = self.media_jobs.ledger(output_folder)
+        stat = os.stat(input_path)
+        key = job_key("split", os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns, segment_duration)
+        done = ledger.done(key)
+        if done:
+            self.media_probe.prime(done)
+            if outputs_valid(self.media_probe, done):
+                return done, True
+
+        safe_base_name = sanitize_filename(os.path.splitext(os.path.basename(input_path))[0])
+        stream_copy = mp4_copy_compatible(self.media_probe, input_path)
+
+        # ffmpeg menulis ke folder sementara; segmen setengah jadi tidak pernah muncul di output.
+        temp_dir = os.path.join(output_folder, f".split_{uuid.uuid4().hex[:8]}")
+        os.makedirs(temp_dir)
+        try:
+            cmd = [self.ffmpeg_path, "-y", "-i", input_path]
+            if stream_copy:
+                cmd += ["-map", "0:V", "-map", "0:a?", "-dn", "-sn", "-c", "copy"]
+            else:
+                # Codec tidak bisa masuk mp4: encode, keyframe dipaksa di tiap batas segmen.
+                cmd += [
+                    "-map", "0:v:0", "-map", "0:a:0?",
+                    "-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-pix_fmt", "yuv420p",
+                    "-c:a", "aac",
+                    "-force_key_frames", f"expr:gte(t,n_forced*{segment_duration})"
+                ]
+            cmd += [
+                "-segment_time", str(segment_duration),
+                "-f", "segment",
+                "-reset_timestamps", "1",
+                os.path.join(temp_dir, f"{safe_base_name}_%03d.mp4")
+            ]
+
+            self.media_jobs.run_ffmpeg(
+                cmd,
+                encode=not stream_copy,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=process_timeout,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+
+            outputs = []
+            for name in sorted(os.listdir(temp_dir)):
+                final_path = os.path.join(output_folder, name)
+                os.replace(os.path.join(temp_dir, name), final_path)
+                outputs.append(final_path)
+
+            self.media_probe.prime(outputs)
+            if not outputs_valid(self.media_probe, outputs, self.media_probe.duration(input_path)):
+                for path in outputs:
+                    os.remove(path)
+                raise RuntimeError("Segment check failed (unreadable segment or total duration mismatch)")
+
+            ledger.mark(key, outputs, source=os.path.abspath(input_path), stream_copy=stream_copy)
+            return outputs, False
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
     def get_data_preview(self, config: dict):
         return [{"status": "preview_not_available"}]
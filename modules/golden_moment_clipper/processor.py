@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\modules\golden_moment_clipper\processor.py total lines 588 
+# File NAME : C:\FLOWORK\modules\golden_moment_clipper\processor.py total lines 641 
 ########################################################################
 
 import os
@@ -12,9 +12,17 @@ import re
 import traceback
 import json
 import math
+import threading
 import numpy as np
 import importlib.util # Added for smart check
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flowork_kernel.api_contract import BaseModule, IExecutable
+from flowork_kernel.utils.media_probe import get_media_probe
+from flowork_kernel.utils.transcript_cache import get_transcript_cache
+from flowork_kernel.utils.whisper_pool import get_whisper_pool
+from flowork_kernel.utils.frame_sampler import sample_frames, scaled_size
+from flowork_kernel.utils.ffmpeg_graph import FilterGraph, escape_filter_path, escape_drawtext
+from flowork_kernel.utils.media_jobs import get_media_jobs, MEDIA_ENCODER_THREADS as ENCODER_THREADS, MEDIA_ENCODER_SLOTS as ENCODER_SLOT_COUNT
 
 print("--- [GoldenMoment] ATTEMPTING IMPORTS ---", file=sys.stderr)
 
@@ -22,11 +30,9 @@ def _check_deps_ready():
     module_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.exists(os.path.join(module_dir, ".deps_installed"))
 
-try:
-    from faster_whisper import WhisperModel
-    FASTER_WHISPER_AVAILABLE = True
-except ImportError:
-    FASTER_WHISPER_AVAILABLE = False
+# Model dimuat lewat whisper_pool; di sini cukup cek library-nya ada.
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+if not FASTER_WHISPER_AVAILABLE:
     print("❌ [GoldenMoment] Faster-Whisper NOT FOUND.", file=sys.stderr)
 
 try:
@@ -38,6 +44,13 @@ except ImportError:
     MEDIAPIPE_AVAILABLE = False
     print("❌ [GoldenMoment] MediaPipe/OpenCV NOT FOUND.", file=sys.stderr)
 
+SMART_CUT_LOOKAHEAD = 20.0
+FACE_SAMPLE_WIDTH = 640 # Bbox MediaPipe relatif, jadi deteksi di frame kecil tetap dipetakan ke resolusi asli
+MOTION_SAMPLE_FPS = 6.0
+MOTION_SAMPLE_WIDTH = 320
+# Semua clip & outro di-encode dengan parameter identik, jadi merge akhir cukup stream copy.
+CLIP_ENCODE_ARGS = ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', '-pix_fmt', 'yuv420p', '-c:a', 'aac', '-ar', '44100', '-ac', '2']
+
 class GoldenMomentClipper(BaseModule, IExecutable):
 
     TIER = "architect"
@@ -46,7 +59,12 @@ class GoldenMomentClipper(BaseModule, IExecutable):
         super().__init__(module_id, services)
         self.kernel = services.get("kernel")
         self.ffmpeg_path, self.ffprobe_path = self._find_ffmpeg_tools()
-        self.whisper_cache = {}
+        self.media_probe = get_media_probe(self.ffprobe_path, self.kernel.data_path if self.kernel else None)
+        self.transcripts = get_transcript_cache(self.kernel.data_path if self.kernel else None, self.ffmpeg_path)
+        self.whisper_pool = get_whisper_pool(self.kernel)
+        self.media_jobs = get_media_jobs()
+        self._silence_cache = {}
+        self._silence_lock = threading.Lock()
 
     def _find_ffmpeg_tools(self):
         return shutil.which("ffmpeg") or "ffmpeg", shutil.which("ffprobe") or "ffprobe"
@@ -90,6 +108,8 @@ class GoldenMomentClipper(BaseModule, IExecutable):
         closing_video = config.get("closing_video_path")
 
         do_merge = config.get("merge_clips", True)
+        max_parallel = int(config.get("max_parallel_clips", 0) or 0)
+        if max_parallel <= 0: max_parallel = ENCODER_SLOT_COUNT + 1 # +1: cut/analisis clip berikutnya jalan selagi encoder penuh
         out_folder = config.get("output_folder")
 
 
@@ -127,7 +147,6 @@ class GoldenMomentClipper(BaseModule, IExecutable):
         if not segments:
             return self._error("No valid timestamps found!", status_updater)
 
-        processed_clips = []
         session_id = uuid.uuid4().hex[:6]
         temp_dir = os.path.join(out_folder, f"temp_{session_id}")
         os.makedirs(temp_dir, exist_ok=True)
@@ -144,90 +163,56 @@ class GoldenMomentClipper(BaseModule, IExecutable):
                     status_updater("⚠️ Gagal normalize outro. Outro dilewati.", "WARNING")
                     normalized_outro_path = None
 
-            global_clip_index = 0
-            for vid_idx, input_video in enumerate(source_videos):
-                video_name = os.path.basename(input_video)
-                status_updater(f"🎬 Processing Video {vid_idx+1}/{len(source_videos)}: {video_name}", "INFO")
-
-                total_dur = self._get_exact_duration(input_video)
-
-                for i, (start, end) in enumerate(segments):
-                    global_clip_index += 1
-
-                    if start >= total_dur:
-                        status_updater(f"⚠️ Timestamp {start}s exceeds duration of {video_name}. Skipping.", "WARNING")
-                        continue
-
-                    actual_end = end
-                    if actual_end > total_dur:
-                        actual_end = total_dur
-                        status_updater(f"⚠️ End time capped to video duration for {video_name}.", "WARNING")
-
-                    if do_smart_cut and FASTER_WHISPER_AVAILABLE:
-                        status_updater(f"[Clip {global_clip_index}] 🎯 Sniper Mode: Hunting nearest DOT...", "INFO")
-                        new_end = self._smart_adjust_timestamps(
-                            input_video, start, actual_end, temp_dir,
-                            status_updater, whisper_model_size
-                        )
-                        if new_end != actual_end:
-                            actual_end = new_end
-                            status_updater(f"[Clip {global_clip_index}] ✅ Dot Found! Shifted end.", "INFO")
-                        else:
-                            status_updater(f"[Clip {global_clip_index}] ⚠️ No dot found. Keeping original.", "INFO")
-
-                    duration = actual_end - start
-                    if duration <= 1: continue # Skip ultra short clips
-
-                    clip_base = f"batch_{vid_idx}_{i+1}_{uuid.uuid4().hex[:4]}"
-                    raw_clip_path = os.path.join(temp_dir, f"raw_{clip_base}.mp4")
-                    working_clip_path = raw_clip_path
-                    final_clip_path = os.path.join(temp_dir, f"final_{clip_base}.mp4")
-
-                    status_updater(f"[Clip {global_clip_index}] Cutting Video...", "INFO")
-                    self._cut_video(input_video, start, duration, raw_clip_path)
-
-                    if do_remove_silence:
-                        status_updater(f"[Clip {global_clip_index}] Removing Silence...", "INFO")
-                        jump_cut_path = os.path.join(temp_dir, f"jump_{clip_base}.mp4")
-                        if self._remove_silence(raw_clip_path, jump_cut_path, silence_db):
-                            working_clip_path = jump_cut_path
-                            status_updater(f"[Clip {global_clip_index}] Jump Cut Applied.", "INFO")
-
-                    status_updater(f"[Clip {global_clip_index}] Processing Visuals...", "INFO")
-
-                    ass_path = None
-                    if do_subs and FASTER_WHISPER_AVAILABLE:
-                        try:
-                            ass_path = os.path.join(temp_dir, f"{clip_base}.ass")
-                            self._generate_original_style_ass(working_clip_path, ass_path, sub_size, whisper_model_size)
-                        except: ass_path = None
-
-                    crop_expr = None
-                    if MEDIAPIPE_AVAILABLE:
-                        if resize_mode == "face_jump":
-                            status_updater(f"[Clip {global_clip_index}] 🤖 AI Analyzing: Face Jump...", "INFO")
-                            crop_expr = self._analyze_face_jump_3s(working_clip_path)
-                        elif resize_mode == "mouse_smooth":
-                            status_updater(f"[Clip {global_clip_index}] 🖱️ AI Analyzing: Mouse Smooth...", "INFO")
-                            crop_expr = self._analyze_mouse_smooth(working_clip_path)
-
-                    self._apply_ffmpeg_processing(
-                        working_clip_path, final_clip_path, resize_mode,
-                        safety_margin, watermark_text, watermark_size,
-                        ass_path, crop_expr
-                    )
-
-                    if normalized_outro_path and not do_merge:
-                        status_updater(f"[Clip {global_clip_index}] Attaching Outro (Safe Mode)...", "INFO")
-                        temp_with_outro = os.path.join(temp_dir, f"outro_{clip_base}.mp4")
-
-                        success = self._concat_safe(final_clip_path, normalized_outro_path, temp_with_outro)
-                        if success:
-                            if os.path.exists(final_clip_path): os.remove(final_clip_path)
-                            os.rename(temp_with_outro, final_clip_path)
-
-                    if os.path.exists(final_clip_path):
-                        processed_clips.append(final_clip_path)
+            # DAG: transkripsi per video -> clip-clip video itu (independen, paralel) -> merge.
+            self.media_probe.prime(source_videos)
+            clip_jobs = []
+            transcript_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gmc-transcribe")
+            clip_pool = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="gmc-clip")
+            try:
+                for vid_idx, input_video in enumerate(source_videos):
+                    video_name = os.path.basename(input_video)
+                    total_dur = self._get_exact_duration(input_video)
+
+                    transcript_future = None
+                    if (do_smart_cut or do_subs) and FASTER_WHISPER_AVAILABLE:
+                        spans = [(s, min(e + SMART_CUT_LOOKAHEAD, total_dur)) for s, e in segments if s < total_dur]
+                        transcript_future = transcript_pool.submit(self._get_transcript, input_video, spans, whisper_model_size)
+
+                    for i, (start, end) in enumerate(segments):
+                        if start >= total_dur:
+                            status_updater(f"⚠️ Timestamp {start}s exceeds duration of {video_name}. Skipping.", "WARNING")
+                            continue
+                        actual_end = end
+                        if actual_end > total_dur:
+                            actual_end = total_dur
+                            status_updater(f"⚠️ End time capped to video duration for {video_name}.", "WARNING")
+                        clip_jobs.append({
+                            "input_video": input_video, "video_name": video_name, "start": start, "end": actual_end,
+                            "clip_base": f"batch_{vid_idx}_{i+1}_{uuid.uuid4().hex[:4]}", "transcript_future": transcript_future,
+                        })
+
+                total_clips = len(clip_jobs)
+                status_updater(f"🎬 {total_clips} clips queued ({max_parallel} in parallel, {ENCODER_SLOT_COUNT} encoders x {ENCODER_THREADS} threads)", "INFO")
+                opts = {
+                    "temp_dir": temp_dir, "resize_mode": resize_mode, "safety_margin": safety_margin, "do_smart_cut": do_smart_cut,
+                    "do_remove_silence": do_remove_silence, "silence_db": silence_db, "do_subs": do_subs, "sub_size": sub_size,
+                    "watermark_text": watermark_text, "watermark_size": watermark_size,
+                    "outro_path": normalized_outro_path if not do_merge else None,
+                }
+                futures = {clip_pool.submit(self._process_clip, n + 1, total_clips, job, opts, status_updater): n for n, job in enumerate(clip_jobs)}
+                results = [None] * total_clips
+                done_count = 0
+                for fut in as_completed(futures):
+                    results[futures[fut]] = fut.result()
+                    done_count += 1
+                    status_updater(f"📦 {done_count}/{total_clips} clips finished", "INFO")
+            finally:
+                # Tunggu ffmpeg yang masih jalan sebelum temp_dir dihapus; clip yang belum mulai dibatalkan.
+                clip_pool.shutdown(wait=True, cancel_futures=True)
+                transcript_pool.shutdown(wait=True, cancel_futures=True)
+
+            # Urutan merge tetap urutan video/timestamp, bukan urutan selesai.
+            processed_clips = [p for p in results if p]
 
             final_output = ""
             if do_merge and len(processed_clips) > 0:
@@ -248,15 +233,82 @@ class GoldenMomentClipper(BaseModule, IExecutable):
                         if os.path.exists(dst): os.remove(dst)
                         shutil.move(p, dst)
 
-            try: shutil.rmtree(temp_dir, ignore_errors=True)
-            except: pass
-
             status_updater("✅ All Batch Processing Done!", "SUCCESS")
             return {"payload": {"data": {"output_path": final_output}}, "output_name": "success"}
 
         except Exception as e:
             traceback.print_exc()
             return self._error(f"Processing Failed: {str(e)}", status_updater)
+        finally:
+            # Selalu dibersihkan, juga saat gagal; semua worker clip sudah berhenti di titik ini.
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _process_clip(self, n, total, job, opts, status_updater):
+        """One clip end to end: snap -> silence spans -> subs/reframe -> one ffmpeg render (cut+jump cut+layout+overlays+outro)."""
+        tag = f"[Clip {n}/{total}]"
+        input_video, start, actual_end, clip_base, temp_dir = job["input_video"], job["start"], job["end"], job["clip_base"], opts["temp_dir"]
+        transcript = None
+        if job["transcript_future"] is not None:
+            try:
+                transcript = job["transcript_future"].result()
+            except Exception as e:
+                status_updater(f"{tag} ⚠️ Transcription failed for {job['video_name']}: {e}", "WARNING")
+
+        if opts["do_smart_cut"] and transcript is not None:
+            new_end = self._smart_adjust_timestamps(transcript, start, actual_end)
+            if new_end != actual_end:
+                actual_end = new_end
+                status_updater(f"{tag} 🎯 Dot Found! Shifted end.", "INFO")
+            else:
+                status_updater(f"{tag} ⚠️ No dot found. Keeping original.", "INFO")
+
+        duration = actual_end - start
+        if duration <= 1: return None # Skip ultra short clips
+
+        ass_path = os.path.join(temp_dir, f"{clip_base}.ass")
+        final_clip_path = os.path.join(temp_dir, f"final_{clip_base}.mp4")
+        try:
+            keep_segments = None
+            if opts["do_remove_silence"]:
+                keep_segments = self._detect_silences(input_video, start, duration, opts["silence_db"])
+                if keep_segments:
+                    status_updater(f"{tag} Jump Cut: {len(keep_segments)} segments kept.", "INFO")
+
+            clip_ass = None
+            if opts["do_subs"] and transcript is not None:
+                try:
+                    self._generate_original_style_ass(transcript, start, duration, ass_path, opts["sub_size"], keep_segments)
+                    clip_ass = ass_path
+                except: clip_ass = None
+
+            # Analisis reframe langsung di rentang sumber (timeline sebelum jump cut, sama dengan 't' di filter crop).
+            crop_expr = None
+            resize_mode = opts["resize_mode"]
+            if MEDIAPIPE_AVAILABLE:
+                if resize_mode == "face_jump":
+                    status_updater(f"{tag} 🤖 AI Analyzing: Face Jump...", "INFO")
+                    crop_expr = self._analyze_face_jump_3s(input_video, start, duration)
+                elif resize_mode == "mouse_smooth":
+                    status_updater(f"{tag} 🖱️ AI Analyzing: Mouse Smooth...", "INFO")
+                    crop_expr = self._analyze_mouse_smooth(input_video, start, duration)
+
+            status_updater(f"{tag} Rendering {job['video_name']} @ {start}s...", "INFO")
+            self._render_clip(
+                input_video, start, duration, final_clip_path, resize_mode,
+                opts["safety_margin"], opts["watermark_text"], opts["watermark_size"],
+                clip_ass, crop_expr, keep_segments, opts["outro_path"]
+            )
+
+            status_updater(f"{tag} ✅ Done.", "INFO")
+            return final_clip_path if os.path.exists(final_clip_path) else None
+        finally:
+            try:
+                if os.path.exists(ass_path): os.remove(ass_path)
+            except OSError: pass
+
+    def _run_encoder(self, cmd, **kwargs):
+        # Slot encoder dibagi dengan semua modul media (splitter, stitcher) lewat executor bersama.
+        return self.media_jobs.run_ffmpeg(cmd, encode=True, **kwargs)
 
     def _force_normalize_video(self, input_path, output_path):
         try:
@@ -270,8 +322,8 @@ class GoldenMomentClipper(BaseModule, IExecutable):
                 cmd += ['-shortest']
             else:
                 cmd += ['-map', '0:v', '-map', '0:a']
-            cmd += ['-vf', vf, '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', '-c:a', 'aac', '-ar', '44100', output_path]
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            cmd += ['-vf', vf] + CLIP_ENCODE_ARGS + [output_path]
+            self._run_encoder(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             return True
         except subprocess.CalledProcessError as e:
             print(f"❌ [Normalize Error]: {e.stderr.decode()}", file=sys.stderr)
@@ -280,152 +332,157 @@ class GoldenMomentClipper(BaseModule, IExecutable):
             print(f"❌ [Normalize Exception]: {str(e)}", file=sys.stderr)
             return False
 
-    def _concat_safe(self, v1, v2, output_path):
-        try:
-            cmd = [self.ffmpeg_path, '-y', '-i', v1, '-i', v2, '-filter_complex', '[0:v][0:a][1:v][1:a]concat=n=2:v=1:a=1[outv][outa]', '-map', '[outv]', '-map', '[outa]', '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', '-c:a', 'aac', output_path]
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    def _layout_video(self, g, src, mode, margin, crop_expr=None):
+        clean = f"crop=w=iw-{2*margin}:h=ih-{2*margin}:x={margin}:y={margin}"
+        if mode == "podcast_split":
+            c1, c2 = g.add(src, [clean, "split=2"], outputs=2)
+            top = g.add(c1, "crop=w='min(iw, ih*1.125)':h=ih:x=0:y=0")
+            bottom = g.add(c2, "crop=w='min(iw, ih*1.125)':h=ih:x='iw-ow':y=0")
+            return g.add([top, bottom], ["vstack=inputs=2", "scale=1080:1920:force_original_aspect_ratio=increase", "crop=1080:1920", "setsar=1"])
+        if mode == "crop":
+            return g.add(src, [clean, "crop='ih*(9/16)':ih", "scale=1080:1920", "setsar=1"])
+        if mode in ["face_jump", "mouse_smooth"]:
+            if not crop_expr: crop_expr = "(iw-ow)/2"
+            return g.add(src, [f"crop=w='min(iw, ih*(9/16))':h=ih:x='{crop_expr}':y=0", "scale=1080:1920", "setsar=1"])
+        # Fit
+        return g.add(src, [clean, "scale=1080:-1", "pad=1080:1920:(ow-iw)/2:(oh-ih)/2", "setsar=1"])
+
+    def _can_stream_copy(self, input_path, start, mode, margin, wm_text, ass_path, crop_expr, keep_segments, outro_path):
+        # Hanya kalau tidak ada filter sama sekali dan sumber sudah sama persis dengan format output.
+        if mode != "fit" or margin or wm_text or ass_path or crop_expr or keep_segments or outro_path:
+            return False
+        vs = self.media_probe.video_stream(input_path) or {}
+        audio = self.media_probe.streams(input_path, "audio")
+        return (vs.get("codec_name") == "h264" and vs.get("width") == 1080 and vs.get("height") == 1920
+                and vs.get("pix_fmt") == "yuv420p" and vs.get("r_frame_rate") == "30/1"
+                and bool(audio) and audio[0].get("codec_name") == "aac" and str(audio[0].get("sample_rate")) == "44100"
+                and self._starts_on_keyframe(input_path, start))
+
+    def _starts_on_keyframe(self, input_path, start):
+        # -c copy memotong di keyframe sebelum `start`; copy hanya aman kalau start memang jatuh di keyframe.
+        if start <= 0:
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ [Concat Error]: {e.stderr.decode()}", file=sys.stderr)
+        cmd = [self.ffprobe_path, '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+               '-read_intervals', f"{max(0.0, start - 5):.3f}%{start + 0.1:.3f}", '-show_entries', 'frame=pts_time', '-of', 'csv=p=0', input_path]
+        try:
+            res = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            keyframes = [float(t) for t in res.stdout.split() if t.strip().replace('.', '', 1).isdigit()]
+        except (OSError, ValueError, subprocess.TimeoutExpired):
             return False
-
-    def _apply_ffmpeg_processing(self, input_path, output_path, mode, margin, wm_text, wm_size, ass_path, crop_expr=None):
+        return any(abs(t - start) <= 0.5 / 30 for t in keyframes)
+
+    def _render_clip(self, input_path, start, duration, output_path, mode, margin, wm_text, wm_size,
+                     ass_path=None, crop_expr=None, keep_segments=None, outro_path=None):
+        """
+        One ffmpeg run per output clip: accurate input seek, layout/crop, jump-cut trim+concat, watermark,
+        ASS burn-in and outro concat in a single filter graph, so the clip is encoded exactly once.
+        """
+        if self._can_stream_copy(input_path, start, mode, margin, wm_text, ass_path, crop_expr, keep_segments, outro_path):
+            cmd = [self.ffmpeg_path, '-y', '-ss', f"{start:.3f}", '-i', input_path, '-t', f"{duration:.3f}", '-c', 'copy', output_path]
+            self.media_jobs.run_ffmpeg(cmd, encode=False, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return
         has_audio = self._has_audio(input_path)
-        dur = self._get_exact_duration(input_path)
-        layout_filter = ""
-        if mode == "podcast_split":
-            layout_filter = (f"[0:v]crop=w=iw-{2*margin}:h=ih-{2*margin}:x={margin}:y={margin}[clean];"
-                             f"[clean]split=2[c1][c2];"
-                             f"[c1]crop=w='min(iw, ih*1.125)':h=ih:x=0:y=0[top];"
-                             f"[c2]crop=w='min(iw, ih*1.125)':h=ih:x='iw-ow':y=0[bottom];"
-                             f"[top][bottom]vstack=inputs=2[vstacked];"
-                             f"[vstacked]scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920,setsar=1[bg]")
-        elif mode == "crop":
-            layout_filter = (f"[0:v]crop=w=iw-{2*margin}:h=ih-{2*margin}:x={margin}:y={margin}[clean];"
-                             f"[clean]crop='ih*(9/16)':ih,scale=1080:1920,setsar=1[bg]")
-        elif mode in ["face_jump", "mouse_smooth"]:
-            if not crop_expr: crop_expr = "(iw-ow)/2"
-            layout_filter = (f"[0:v]crop=w='min(iw, ih*(9/16))':h=ih:x='{crop_expr}':y=0[cropped];"
-                             f"[cropped]scale=1080:1920,setsar=1[bg]")
-        else: # Fit
-            layout_filter = (f"[0:v]crop=w=iw-{2*margin}:h=ih-{2*margin}:x={margin}:y={margin}[clean];"
-                             f"[clean]scale=1080:-1,pad=1080:1920:(ow-iw)/2:(oh-ih)/2,setsar=1[bg]")
-        layout_filter += ";[bg]fps=30[bg_fps];"
-        current_stream = "[bg_fps]"
-        filter_chain = layout_filter
-        if wm_text:
-            wm_cmd = (f"drawtext=text='{wm_text}':fontcolor=white@0.3:fontsize={wm_size}:"
-                      f"x='(w-text_w)/2 + ((w-text_w)/2 - 50) * sin(t/2.5)':"
-                      f"y='(h-text_h)/2 + ((h-text_h)/2 - 50) * cos(t/3.5)':"
-                      f"shadowcolor=black@0.5:shadowx=2:shadowy=2")
-            filter_chain += f"{current_stream}{wm_cmd}[with_wm]"
-            current_stream = "[with_wm]"
+        g = FilterGraph()
+        cmd = [self.ffmpeg_path, '-y', '-ss', f"{start:.3f}", '-t', f"{duration:.3f}", '-i', input_path]
+        v = self._layout_video(g, "0:v", mode, margin, crop_expr)
+        if has_audio:
+            v, a = g.trim_concat(v, "0:a", keep_segments)
         else:
-            filter_chain += f"{current_stream}null[with_wm]"
-            current_stream = "[with_wm]"
+            v, _ = g.trim_concat(v, None, keep_segments)
+            out_dur = sum(e - s for s, e in keep_segments) if keep_segments else duration
+            cmd += ['-f', 'lavfi', '-t', f"{out_dur:.3f}", '-i', 'anullsrc=channel_layout=stereo:sample_rate=44100']
+            a = "1:a"
+        post = ["fps=30"]
+        if wm_text:
+            post.append(f"drawtext=text='{escape_drawtext(wm_text)}':fontcolor=white@0.3:fontsize={wm_size}:"
+                        f"x='(w-text_w)/2 + ((w-text_w)/2 - 50) * sin(t/2.5)':"
+                        f"y='(h-text_h)/2 + ((h-text_h)/2 - 50) * cos(t/3.5)':"
+                        f"shadowcolor=black@0.5:shadowx=2:shadowy=2")
         if ass_path and os.path.exists(ass_path):
-            safe_ass_path = ass_path.replace("\\", "/").replace(":", "\\:")
-            sub_cmd = f"subtitles='{safe_ass_path}'"
-            filter_chain += f";{current_stream}{sub_cmd}[v_final]"
-            current_stream = "[v_final]"
-        else:
-            filter_chain += f";{current_stream}null[v_final]"
-        cmd = [self.ffmpeg_path, '-y', '-i', input_path]
-        if not has_audio:
-            cmd += ['-f', 'lavfi', '-i', f'anullsrc=channel_layout=stereo:sample_rate=44100:d={dur}']
-            audio_map = '1:a'
-            cmd += ['-shortest']
-        else:
-            audio_map = '[a_final]'
-            filter_chain += f";[0:a]aresample=44100[a_final]"
-        cmd += ['-filter_complex', filter_chain]
-        cmd += ['-map', '[v_final]', '-map', audio_map]
-        cmd += ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', '-c:a', 'aac', '-ar', '44100', output_path]
-        try: subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            post.append(f"subtitles='{escape_filter_path(ass_path)}'")
+        post.append("format=yuv420p")
+        v = g.add(v, post)
+        a = g.add(a, ["aresample=44100", "aformat=sample_rates=44100:channel_layouts=stereo"])
+        if outro_path:
+            idx = 1 if has_audio else 2
+            cmd += ['-i', outro_path]
+            ov = g.add(f"{idx}:v", ["fps=30", "scale=1080:1920", "setsar=1", "format=yuv420p"])
+            oa = g.add(f"{idx}:a", ["aresample=44100", "aformat=sample_rates=44100:channel_layouts=stereo"])
+            v, a = g.concat([(v, a), (ov, oa)])
+        cmd += ['-filter_complex', str(g), '-map', v, '-map', a] + CLIP_ENCODE_ARGS + [output_path]
+        try: self._run_encoder(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         except subprocess.CalledProcessError as e:
             print(f"❌ [Processing Error]: {e.stderr.decode()}", file=sys.stderr)
             raise e
 
     def _has_audio(self, filepath):
-        cmd = [self.ffprobe_path, "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=codec_name", "-of", "default=noprint_wrappers=1:nokey=1", filepath]
-        try:
-            res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
-            return len(res.stdout.strip()) > 0
-        except: return False
+        return self.media_probe.has_audio(filepath)
 
     def _get_exact_duration(self, filepath):
-        cmd = [self.ffprobe_path, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', filepath]
-        try:
-            res = subprocess.run(cmd, capture_output=True, text=True)
-            return float(res.stdout.strip())
-        except: return 5.0
+        return self.media_probe.duration(filepath, default=5.0)
 
-    def _analyze_face_jump_3s(self, video_path):
+    def _analyze_face_jump_3s(self, video_path, start=0.0, duration=None):
         cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
         target_w = int(height * (9/16))
         if target_w > width: target_w = width
-        interval_frames = int(fps * 3)
         mp_face = mp_face_solutions # Fix: Using robust sub-module import
         keyframes = []
         with mp_face.FaceDetection(model_selection=1, min_detection_confidence=0.5) as face_detection:
-            frame_idx = 0
             current_x = (width - target_w) // 2
-            while cap.isOpened():
-                success, image = cap.read()
-                if not success: break
-                if frame_idx % interval_frames == 0:
-                    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                    results = face_detection.process(image_rgb)
-                    best_face_x = None
-                    max_size = 0
-                    if results.detections:
-                        for detection in results.detections:
-                            bboxC = detection.location_data.relative_bounding_box
-                            area = bboxC.width * bboxC.height
-                            cx = int((bboxC.xmin + bboxC.width / 2) * width)
-                            if area > max_size:
-                                max_size = area
-                                best_face_x = cx
-                        if best_face_x is not None:
-                            new_x = best_face_x - (target_w // 2)
-                            new_x = max(0, min(new_x, width - target_w))
-                            current_x = new_x
-                    time_sec = frame_idx / fps
-                    keyframes.append((time_sec, current_x))
-                frame_idx += 1
-        cap.release()
+            # Hanya 1 frame per 3 detik yang di-decode/dikirim (downscaled), bukan semua frame.
+            for time_sec, image in sample_frames(video_path, 3.0, FACE_SAMPLE_WIDTH, self.ffmpeg_path, src_size=(width, height), start=start, duration=duration):
+                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                results = face_detection.process(image_rgb)
+                best_face_x = None
+                max_size = 0
+                if results.detections:
+                    for detection in results.detections:
+                        bboxC = detection.location_data.relative_bounding_box
+                        area = bboxC.width * bboxC.height
+                        cx = int((bboxC.xmin + bboxC.width / 2) * width)
+                        if area > max_size:
+                            max_size = area
+                            best_face_x = cx
+                    if best_face_x is not None:
+                        new_x = best_face_x - (target_w // 2)
+                        new_x = max(0, min(new_x, width - target_w))
+                        current_x = new_x
+                keyframes.append((time_sec, current_x))
         return self._build_step_expression(keyframes, (width-target_w)//2)
 
-    def _analyze_mouse_smooth(self, video_path):
+    def _analyze_mouse_smooth(self, video_path, start=0.0, duration=None):
         cap = cv2.VideoCapture(video_path)
         fps = cap.get(cv2.CAP_PROP_FPS)
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
         target_w = int(height * (9/16))
         if target_w > width: target_w = width
-        backSub = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=50, detectShadows=False)
+        # MOG2 di frame kecil & fps rendah; history disesuaikan agar tetap ~500 frame asli (detik yang sama).
+        sample_w, _ = scaled_size(width, height, MOTION_SAMPLE_WIDTH)
+        scale = sample_w / width if width else 1.0
+        history = max(10, int(500 / (fps or 30.0) * MOTION_SAMPLE_FPS))
+        backSub = cv2.createBackgroundSubtractorMOG2(history=history, varThreshold=50, detectShadows=False)
+        min_area = 100 * scale * scale
         smoothed_x = (width - target_w) // 2
         alpha = 0.05
         keyframes = []
-        frame_idx = 0
-        step = int(fps * 0.5)
+        step = max(1, int(round(MOTION_SAMPLE_FPS * 0.5)))
         keyframes.append((0.0, smoothed_x))
-        while cap.isOpened():
-            success, image = cap.read()
-            if not success: break
+        for sample_idx, (time_sec, image) in enumerate(sample_frames(video_path, 1.0 / MOTION_SAMPLE_FPS, MOTION_SAMPLE_WIDTH, self.ffmpeg_path, src_size=(width, height), start=start, duration=duration)):
             fgMask = backSub.apply(image)
-            if frame_idx > 0 and frame_idx % step == 0:
+            if sample_idx > 0 and sample_idx % step == 0:
                 contours, _ = cv2.findContours(fgMask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
                 center_motion_x = None
                 max_area = 0
                 for cnt in contours:
                     area = cv2.contourArea(cnt)
-                    if area > 100:
+                    if area > min_area:
                         x, y, w, h = cv2.boundingRect(cnt)
-                        cx = x + w//2
+                        cx = int((x + w / 2) / scale)
                         if area > max_area:
                             max_area = area
                             center_motion_x = cx
@@ -435,10 +492,7 @@ class GoldenMomentClipper(BaseModule, IExecutable):
                     ideal_x = max(0, min(ideal_x, width - target_w))
                     target_x = ideal_x
                 smoothed_x = (smoothed_x * (1 - alpha)) + (target_x * alpha)
-                time_sec = frame_idx / fps
                 keyframes.append((time_sec, int(smoothed_x)))
-            frame_idx += 1
-        cap.release()
         return self._build_lerp_expression(keyframes, (width-target_w)//2)
 
     def _build_step_expression(self, keyframes, default_val):
@@ -469,91 +523,90 @@ class GoldenMomentClipper(BaseModule, IExecutable):
         terms.append(f"(gte(t,{last_t:.3f})*{last_v})")
         return "+".join(terms)
 
-    def _smart_adjust_timestamps(self, input_path, start_sec, end_sec, temp_dir, status_updater, model_size):
+    def _get_transcript(self, input_path, spans, model_size):
+        with self.whisper_pool.lease(model_size) as model:
+            def transcribe_words(audio_path):
+                segments, _ = model.transcribe(audio_path, word_timestamps=True)
+                for segment in segments:
+                    for word in (segment.words or []):
+                        yield word.start, word.end, word.word
+            return self.transcripts.ensure(input_path, spans, transcribe_words, model_tag=f"faster-whisper:{model_size}")
+
+    def _clip_words(self, transcript, clip_start, clip_duration, keep_segments=None):
+        """Words of [clip_start, clip_start+clip_duration) relative to the clip, remapped through jump-cut keep_segments."""
+        words = []
+        for s, e, w in transcript.words_between(clip_start, clip_start + clip_duration):
+            s, e = s - clip_start, min(e, clip_start + clip_duration) - clip_start
+            if keep_segments:
+                offset, mapped = 0.0, None
+                for ks, ke in keep_segments:
+                    if ks <= s < ke:
+                        mapped = (offset + s - ks, offset + min(e, ke) - ks)
+                        break
+                    offset += ke - ks
+                if mapped is None: continue # Kata jatuh di bagian hening yang dibuang
+                s, e = mapped
+            words.append((s, e, w))
+        return words
+
+    def _smart_adjust_timestamps(self, transcript, start_sec, end_sec):
         try:
-            buffer_after = 20.0
-            check_duration = (end_sec - start_sec) + buffer_after
-            temp_audio = os.path.join(temp_dir, f"smart_seek_{uuid.uuid4().hex}.mp3")
-            cmd = [self.ffmpeg_path, '-y', '-ss', str(start_sec), '-i', input_path, '-t', str(check_duration), '-vn', '-acodec', 'libmp3lame', '-q:a', '2', temp_audio]
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            if not os.path.exists(temp_audio): return end_sec
-            if model_size not in self.whisper_cache:
-                self.whisper_cache[model_size] = WhisperModel(model_size, device="cpu", compute_type="int8")
-            model = self.whisper_cache[model_size]
-            segments, _ = model.transcribe(temp_audio, word_timestamps=True)
+            check_duration = (end_sec - start_sec) + SMART_CUT_LOOKAHEAD
+            words = self._clip_words(transcript, start_sec, check_duration)
             target_relative_end = end_sec - start_sec
             dot_candidates = []
-            for segment in segments:
-                for word in segment.words:
-                    w = word.word.strip()
-                    if not w: continue
-                    if w.endswith('.'):
-                         dot_candidates.append({"time": word.end, "dist": abs(word.end - target_relative_end)})
+            for _, w_end, w in words:
+                if w.endswith('.'):
+                     dot_candidates.append({"time": w_end, "dist": abs(w_end - target_relative_end)})
             if not dot_candidates:
-                for segment in segments:
-                    for word in segment.words:
-                        w = word.word.strip()
-                        if w.endswith('?') or w.endswith('!'):
-                             dot_candidates.append({"time": word.end, "dist": abs(word.end - target_relative_end)})
-            os.remove(temp_audio)
+                for _, w_end, w in words:
+                    if w.endswith('?') or w.endswith('!'):
+                         dot_candidates.append({"time": w_end, "dist": abs(w_end - target_relative_end)})
             if dot_candidates:
                 dot_candidates.sort(key=lambda x: x['dist'])
                 return start_sec + dot_candidates[0]['time'] + 0.1
             return end_sec
         except: return end_sec
 
-    def _remove_silence(self, input_path, output_path, db_threshold="-30dB", min_duration=0.5):
+    def _detect_silences(self, input_path, start, duration, db_threshold="-30dB", min_duration=0.5):
+        """Clip-relative keep segments around silences (audio-only pass, memoized); None when nothing is cut."""
+        key = (input_path, round(start, 3), round(duration, 3), db_threshold, min_duration)
+        with self._silence_lock:
+            if key in self._silence_cache: return self._silence_cache[key]
+        keep_segments = None
         try:
-            cmd_detect = [self.ffmpeg_path, '-i', input_path, '-af', f'silencedetect=noise={db_threshold}:d={min_duration}', '-f', 'null', '-']
+            cmd_detect = [self.ffmpeg_path, '-ss', f"{start:.3f}", '-t', f"{duration:.3f}", '-i', input_path, '-vn', '-af', f'silencedetect=noise={db_threshold}:d={min_duration}', '-f', 'null', '-']
             result = subprocess.run(cmd_detect, capture_output=True, text=True)
             log_output = result.stderr
-            silence_starts = [float(x) for x in re.findall(r'silence_start: (\d+(?:\.\d+)?)', log_output)]
+            silence_starts = [float(x) for x in re.findall(r'silence_start: (-?\d+(?:\.\d+)?)', log_output)]
             silence_ends = [float(x) for x in re.findall(r'silence_end: (\d+(?:\.\d+)?)', log_output)]
-            if not silence_starts: return False
-            duration_cmd = [self.ffprobe_path, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', input_path]
-            dur_res = subprocess.run(duration_cmd, capture_output=True, text=True)
-            total_duration = float(dur_res.stdout.strip())
-            keep_segments = []
-            current_time = 0.0
-            count = min(len(silence_starts), len(silence_ends))
-            for i in range(count):
-                if silence_starts[i] > current_time: keep_segments.append((current_time, silence_starts[i]))
-                current_time = silence_ends[i]
-            if current_time < total_duration: keep_segments.append((current_time, total_duration))
-            if not keep_segments: return False
-            filter_str = ""
-            concat_str = ""
-            for idx, (start, end) in enumerate(keep_segments):
-                filter_str += f"[0:v]trim=start={start}:end={end},setpts=PTS-STARTPTS[v{idx}];"
-                filter_str += f"[0:a]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{idx}];"
-                concat_str += f"[v{idx}][a{idx}]"
-            concat_str += f"concat=n={len(keep_segments)}:v=1:a=1[outv][outa]"
-            cmd_process = [self.ffmpeg_path, '-y', '-i', input_path, '-filter_complex', filter_str + concat_str, '-map', '[outv]', '-map', '[outa]', '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', output_path]
-            subprocess.run(cmd_process, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
-            return True
-        except: return False
-
-    def _generate_original_style_ass(self, video_path, output_path, font_size, model_size):
-        audio_temp = video_path.replace(".mp4", ".mp3")
-        subprocess.run([self.ffmpeg_path, '-y', '-i', video_path, '-vn', '-acodec', 'libmp3lame', audio_temp], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        if model_size not in self.whisper_cache: self.whisper_cache[model_size] = WhisperModel(model_size, device="cpu", compute_type="int8")
-        model = self.whisper_cache[model_size]
-        segments, _ = model.transcribe(audio_temp, word_timestamps=True)
+            if silence_starts:
+                segments = []
+                current_time = 0.0
+                count = min(len(silence_starts), len(silence_ends))
+                for i in range(count):
+                    if silence_starts[i] > current_time: segments.append((current_time, silence_starts[i]))
+                    current_time = silence_ends[i]
+                if count < len(silence_starts): # Hening sampai akhir clip
+                    if silence_starts[count] > current_time: segments.append((current_time, silence_starts[count]))
+                elif current_time < duration: segments.append((current_time, duration))
+                keep_segments = segments or None
+        except Exception:
+            keep_segments = None
+        with self._silence_lock:
+            self._silence_cache[key] = keep_segments
+        return keep_segments
+
+    def _generate_original_style_ass(self, transcript, clip_start, clip_duration, output_path, font_size, keep_segments=None):
         header = f"""[Script Info]\nScriptType: v4.00+\nPlayResX: 1080\nPlayResY: 1920\n[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\nStyle: Default,Arial,{font_size},&H0000FFFF,&H0000FFFF,&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,3,0,2,135,135,250,1\n[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"""
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(header)
-            for segment in segments:
-                for word in segment.words:
-                    start = self._fmt_time(word.start)
-                    end = self._fmt_time(word.end)
-                    dur = int((word.end - word.start) * 100)
-                    text = f"{{\\k{dur}}}{word.word.strip()}"
-                    f.write(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
-        if os.path.exists(audio_temp): os.remove(audio_temp)
-
-    def _cut_video(self, input_path, start, duration, output_path):
-        cmd = [self.ffmpeg_path, '-y', '-ss', str(start), '-i', input_path, '-t', str(duration), '-c', 'copy', output_path]
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for w_start, w_end, w in self._clip_words(transcript, clip_start, clip_duration, keep_segments):
+                start = self._fmt_time(w_start)
+                end = self._fmt_time(w_end)
+                dur = int((w_end - w_start) * 100)
+                text = f"{{\\k{dur}}}{w}"
+                f.write(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
 
     def _merge_videos(self, clips, output_path):
         list_file = f"list_{uuid.uuid4().hex}.txt"
@@ -563,8 +616,8 @@ class GoldenMomentClipper(BaseModule, IExecutable):
         try:
             subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except:
-            cmd_reencode = [self.ffmpeg_path, '-y', '-f', 'concat', '-safe', '0', '-i', list_file, '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', output_path]
-            subprocess.run(cmd_reencode, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            cmd_reencode = [self.ffmpeg_path, '-y', '-f', 'concat', '-safe', '0', '-i', list_file] + CLIP_ENCODE_ARGS + [output_path]
+            self._run_encoder(cmd_reencode, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         os.remove(list_file)
 
     def _fmt_time(self, seconds):
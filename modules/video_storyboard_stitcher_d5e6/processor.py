@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\modules\video_storyboard_stitcher_d5e6\processor.py total lines 190 
+# File NAME : C:\FLOWORK\modules\video_storyboard_stitcher_d5e6\processor.py total lines 260 
 ########################################################################
 
 import os
@@ -11,6 +11,8 @@ import uuid
 import shutil
 from flowork_kernel.api_contract import BaseModule, IExecutable
 from flowork_kernel.utils.file_helper import sanitize_filename
+from flowork_kernel.utils.media_probe import get_media_probe
+from flowork_kernel.utils.media_jobs import get_media_jobs, job_key, part_path, concat_copy_compatible, outputs_valid
 
 def get_startup_info():
     if os.name == 'nt':
@@ -26,6 +28,9 @@ class VideoStoryboardStitcherModule(BaseModule, IExecutable):
     def __init__(self, module_id, services):
         super().__init__(module_id, services)
         self.ffmpeg_path = self._find_ffmpeg()
+        self.ffprobe_path = self._find_ffprobe()
+        self.media_probe = get_media_probe(self.ffprobe_path, self.kernel.data_path)
+        self.media_jobs = get_media_jobs()
         self._ensure_icon()
 
     def _ensure_icon(self):
@@ -52,6 +57,13 @@ class VideoStoryboardStitcherModule(BaseModule, IExecutable):
             return path
         return ffmpeg_executable
 
+    def _find_ffprobe(self):
+        ffprobe_executable = "ffprobe.exe" if os.name == "nt" else "ffprobe"
+        path = os.path.join(self.kernel.project_root_path, "vendor", "ffmpeg", "bin", ffprobe_executable)
+        if os.path.exists(path):
+            return path
+        return shutil.which("ffprobe") or ffprobe_executable
+
     def execute(
         self, payload: dict, config: dict, status_updater, mode="EXECUTE", **kwargs
     ):
@@ -75,6 +87,16 @@ class VideoStoryboardStitcherModule(BaseModule, IExecutable):
             except Exception as e:
                 return self.error_payload(f"Cannot create output folder: {e}")
 
+        max_parallel = int(config.get("max_parallel_jobs", 0) or 0)
+        ledger = self.media_jobs.ledger(output_folder)
+
+        # Output yang sudah selesai (run sebelumnya, mungkin terputus) dilewati, dan clip-nya tidak dipakai lagi.
+        completed = {}
+        for key, entry in ledger.items():
+            if entry.get("prefix") == prefix and ledger.done(key):
+                completed[key] = entry
+        used_clips = {tuple(c) for entry in completed.values() for c in entry.get("inputs", [])}
+
         section_pools = []
         folder_names = []
 
@@ -92,6 +114,7 @@ class VideoStoryboardStitcherModule(BaseModule, IExecutable):
                 for f in os.listdir(path)
                 if f.lower().endswith((".mp4", ".mov", ".mkv", ".avi", ".webm"))
             ]
+            clips = [c for c in clips if self._clip_id(c) not in used_clips]
 
             if not clips:
                 self.logger(f"Warning: Folder {os.path.basename(path)} is empty. Skipping.", "WARN")
@@ -107,46 +130,87 @@ class VideoStoryboardStitcherModule(BaseModule, IExecutable):
         min_count = min(len(pool) for pool in section_pools)
 
         status_updater(f"Found {len(section_pools)} folders. Generating {min_count} videos.", "INFO")
+        if completed:
+            status_updater(f"Resuming: {len(completed)} videos already stitched, skipping them.", "INFO")
 
-        created_videos = []
+        # Probe semua clip paralel sekali; cek stream copy per batch lalu hanya baca cache.
+        self.media_probe.prime([clip for pool in section_pools for clip in pool])
 
+        batches = []
+        number = 0
         for i in range(min_count):
             current_batch_files = []
 
             for pool in section_pools:
                 current_batch_files.append(pool[i]) # Access by index (shuffled)
 
-            output_filename = f"{prefix}_{i+1:03d}.mp4"
-            output_path = os.path.join(output_folder, output_filename)
-
-            status_updater(f"Stitching {i+1}/{min_count}: {output_filename}", "INFO")
+            number += 1
+            while job_key("storyboard", prefix, number) in completed:
+                number += 1
+            output_filename = f"{prefix}_{number:03d}.mp4"
+            batches.append((number, current_batch_files, os.path.join(output_folder, output_filename)))
 
-            try:
-                self._run_ffmpeg_concat(current_batch_files, output_path)
-                created_videos.append(output_path)
-
-                if delete_after_use:
-                    for f_path in current_batch_files:
-                        try:
-                            if os.path.exists(f_path):
-                                os.remove(f_path)
-                                self.logger(f"Deleted source: {os.path.basename(f_path)}", "DEBUG")
-                        except Exception as del_err:
-                            self.logger(f"Failed to delete {f_path}: {del_err}", "WARN")
+        def run_job(batch):
+            number, clip_list, output_path = batch
+            return self._stitch_batch(ledger, job_key("storyboard", prefix, number), prefix, clip_list, output_path, delete_after_use)
 
-            except Exception as e:
-                self.logger(f"Failed to stitch video {i+1}: {e}", "ERROR")
+        created_videos = []
+        stream_copies = 0
+        for (number, clip_list, output_path), outcome, error in self.media_jobs.map(run_job, batches, max_parallel, "storyboard"):
+            if error is not None:
+                self.logger(f"Failed to stitch video {os.path.basename(output_path)}: {error}", "ERROR")
+                continue
+            created_videos.append(output_path)
+            stream_copies += int(outcome)
+            status_updater(f"Stitched {len(created_videos)}/{len(batches)}: {os.path.basename(output_path)}{' (stream copy)' if outcome else ''}", "INFO")
 
-        status_updater(f"Completed. Created {len(created_videos)} videos.", "SUCCESS")
+        created_videos.sort()
+        status_updater(f"Completed. Created {len(created_videos)} videos ({stream_copies} without re-encoding).", "SUCCESS")
 
         if "data" not in payload:
             payload["data"] = {}
         payload["data"]["stitched_video_paths"] = created_videos
         payload["data"]["total_created"] = len(created_videos)
+        payload["data"]["total_resumed"] = len(completed)
 
         return {"payload": payload, "output_name": "success"}
 
-    def _run_ffmpeg_concat(self, clip_list, output_path):
+    def _clip_id(self, path):
+        try:
+            return (os.path.abspath(path), os.path.getsize(path))
+        except OSError:
+            return (os.path.abspath(path), None)
+
+    def _stitch_batch(self, ledger, key, prefix, clip_list, output_path, delete_after_use):
+        """Stitches one batch; returns True when it was a stream copy. The ledger entry is written only once the output checks out."""
+        inputs = [self._clip_id(c) for c in clip_list]
+        temp_path = part_path(output_path)
+        stream_copy = concat_copy_compatible(self.media_probe, clip_list, 1080, 1920, 30)
+
+        try:
+            self._run_ffmpeg_concat(clip_list, temp_path, stream_copy)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        expected = sum(self.media_probe.duration(c) for c in clip_list)
+        if not outputs_valid(self.media_probe, [output_path], expected, tolerance=0.05):
+            os.remove(output_path)
+            raise Exception("Output check failed (unreadable or duration mismatch)")
+        ledger.mark(key, [output_path], prefix=prefix, inputs=inputs, stream_copy=stream_copy)
+
+        if delete_after_use:
+            for f_path in clip_list:
+                try:
+                    if os.path.exists(f_path):
+                        os.remove(f_path)
+                        self.logger(f"Deleted source: {os.path.basename(f_path)}", "DEBUG")
+                except Exception as del_err:
+                    self.logger(f"Failed to delete {f_path}: {del_err}", "WARN")
+        return stream_copy
+
+    def _run_ffmpeg_concat(self, clip_list, output_path, stream_copy=False):
         temp_list_path = os.path.join(self.kernel.data_path, f"concat_{uuid.uuid4()}.txt")
 
         try:
@@ -155,22 +219,28 @@ class VideoStoryboardStitcherModule(BaseModule, IExecutable):
                     safe_path = os.path.abspath(clip_path).replace("\\", "/").replace("'", "'\\''")
                     f.write(f"file '{safe_path}'\n")
 
-
             command = [
                 self.ffmpeg_path,
                 "-y",
                 "-f", "concat",
                 "-safe", "0",
                 "-i", temp_list_path,
-                "-vf", "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2,setsar=1",
-                "-c:v", "libx264",
-                "-c:a", "aac",
-                "-r", "30",
-                output_path
             ]
-
-            subprocess.run(
+            if stream_copy:
+                # Semua clip sudah 1080x1920/30fps dengan codec sama: cukup remux.
+                command += ["-c", "copy", "-movflags", "+faststart", output_path]
+            else:
+                command += [
+                    "-vf", "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2,setsar=1",
+                    "-c:v", "libx264",
+                    "-c:a", "aac",
+                    "-r", "30",
+                    output_path
+                ]
+
+            self.media_jobs.run_ffmpeg(
                 command,
+                encode=not stream_copy,
                 check=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\modules\youtube_keyword_researcher\processor.py total lines 419 
+# File NAME : C:\FLOWORK\modules\youtube_keyword_researcher\processor.py total lines 417 
 ########################################################################
 
 import os
@@ -14,8 +14,10 @@ import subprocess
 import datetime
 import math
 import importlib
+import importlib.util
 from collections import Counter
 from flowork_kernel.api_contract import BaseModule, IExecutable
+from flowork_kernel.utils.whisper_pool import get_whisper_pool
 
 print("--- [YouTubeResearcher] System Check... ---", file=sys.stderr, flush=True)
 
@@ -26,9 +28,7 @@ def ensure_dependencies():
     except ImportError:
         missing.append("yt-dlp")
 
-    try:
-        from faster_whisper import WhisperModel
-    except ImportError:
+    if importlib.util.find_spec("faster_whisper") is None:
         missing.append("faster-whisper")
 
     if missing:
@@ -47,7 +47,6 @@ def ensure_dependencies():
 
 if ensure_dependencies():
     import yt_dlp
-    from faster_whisper import WhisperModel
     DEPENDENCIES_OK = True
 else:
     DEPENDENCIES_OK = False
@@ -327,8 +326,7 @@ class YouTubeKeywordResearcher(BaseModule, IExecutable):
                     audio_file = self._download_audio(video_url)
                     update_ui(f"🎙️ Transcribing Audio Stream ({whisper_model})...")
 
-                    model = WhisperModel(whisper_model, device="cpu", compute_type="int8")
-                    segments, info = model.transcribe(audio_file, language=lang_hint if lang_hint else None)
+                    segments, info = get_whisper_pool(self.kernel).transcribe(audio_file, size=whisper_model, language=lang_hint if lang_hint else None)
 
                     full_text_segments = []
                     hook_text = ""
@@ -44,7 +44,7 @@ class ArticleGeneratorModule(BaseModule, IExecutable, IDataPreviewer):
             if not prompt_text:
                 raise Exception("Prompt text is empty. Please select a template or provide a valid variable path.")
 
-            response = self.ai_manager.query_ai_by_task('text', prompt_text, endpoint_id=provider_id)
+            response = self.ai_manager.query_ai_by_task('text', prompt_text, endpoint_id=provider_id, response_cache=config.get('response_cache'))
 
             if "error" in response:
                 raise Exception(response["error"])